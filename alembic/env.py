@@ -12,6 +12,12 @@ sys.path.append(os.getcwd())
 from app.models.base import Base
 from app.models.user_model import User
 from app.models.account_model import Account
+from app.models.idempotency_model import IdempotencyKey
+from app.models.schedule_model import ScheduledTransfer
+from app.models.transaction_model import Transaction
+from app.models.category_rule_model import CategoryRule
+from app.models.audit_model import AccountAuditLog
+
 # Configurações do Alembic
 config = context.config
 
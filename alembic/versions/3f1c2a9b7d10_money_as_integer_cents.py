@@ -0,0 +1,71 @@
+"""Armazena valores monetários como BIGINT em centavos
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+Esta migração é versionada (as demais são geradas localmente com
+--autogenerate) porque a conversão dos dados não pode ser inferida:
+um ALTER TYPE simples arredondaria 10.50 para 11 sem nenhum erro.
+
+Por isso ela é a BASE da cadeia de migrações: rode `alembic upgrade head`
+antes de `alembic revision --autogenerate`, para que as revisões geradas
+venham depois dela (o banco já terá BIGINT e nenhum ALTER de tipo é gerado).
+Revisões locais antigas, geradas antes desta, devem ser regeradas ou ter a
+primeira delas apontando (down_revision) para a última versionada; com duas
+raízes o `alembic upgrade head` falha em vez de executar em ordem indefinida.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, coluna, tipo numérico original)
+MONEY_COLUMNS = [
+    ("accounts", "balance", sa.Numeric(7, 2)),
+    ("accounts", "credit_limit", sa.Numeric(15, 2)),
+    ("scheduled_transfers", "amount", sa.Numeric(15, 2)),
+]
+
+
+def _numeric_columns(to_numeric: bool):
+    """Retorna as colunas existentes que ainda precisam ser convertidas"""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, column, numeric_type in MONEY_COLUMNS:
+        if table not in tables:
+            continue
+        current = {c["name"]: c["type"] for c in inspector.get_columns(table)}.get(column)
+        if current is None:
+            continue
+        if isinstance(current, sa.Numeric) == to_numeric:
+            yield table, column, numeric_type
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, _ in _numeric_columns(to_numeric=True):
+        op.alter_column(
+            table,
+            column,
+            type_=sa.BigInteger(),
+            postgresql_using=f"round({column} * 100)::bigint",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, numeric_type in _numeric_columns(to_numeric=False):
+        op.alter_column(
+            table,
+            column,
+            type_=numeric_type,
+            postgresql_using=f"({column}::numeric / 100)",
+        )
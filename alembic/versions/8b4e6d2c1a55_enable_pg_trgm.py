@@ -0,0 +1,30 @@
+"""Habilita a extensão pg_trgm (busca fuzzy em transactions.description)
+
+Revision ID: 8b4e6d2c1a55
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-19 10:00:00.000000
+
+O --autogenerate não detecta extensões; sem ela o índice
+ix_transactions_description_trgm (gin_trgm_ops) não pode ser criado.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d2c1a55'
+down_revision: Union[str, None] = '3f1c2a9b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
@@ -0,0 +1,64 @@
+"""Armazena o tsvector de transactions.description (coluna gerada)
+
+Revision ID: c41d9e7a2b63
+Revises: 8b4e6d2c1a55
+Create Date: 2026-10-19 12:00:00.000000
+
+A relevância da busca (ts_rank_cd) passa a ler a coluna description_tsv em
+vez de executar to_tsvector em cada linha encontrada; o índice GIN de busca
+textual passa a ser sobre a coluna.
+
+Só no Postgres e só se a tabela já existir (em um banco novo, a coluna vem
+com a criação da tabela). O ADD COLUMN ... STORED reescreve a tabela: em
+produção, rode em uma janela de manutenção.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d9e7a2b63'
+down_revision: Union[str, None] = '8b4e6d2c1a55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _transaction_columns():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    inspector = sa.inspect(bind)
+    if "transactions" not in inspector.get_table_names():
+        return None
+    return {column["name"] for column in inspector.get_columns("transactions")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = _transaction_columns()
+    if columns is None or "description_tsv" in columns:
+        return
+    op.execute(
+        "ALTER TABLE transactions ADD COLUMN description_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('portuguese'::regconfig, description)) STORED"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_transactions_description_fts")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_description_tsv "
+        "ON transactions USING gin (description_tsv)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _transaction_columns()
+    if columns is None or "description_tsv" not in columns:
+        return
+    op.execute("DROP INDEX IF EXISTS ix_transactions_description_tsv")
+    op.drop_column("transactions", "description_tsv")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_description_fts "
+        "ON transactions USING gin (to_tsvector('portuguese'::regconfig, description))"
+    )
@@ -0,0 +1,206 @@
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from database.errors import is_overload_error
+import asyncio
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+
+# Limites por classe de rota: (requisições simultâneas, tamanho da fila, espera máxima em segundos).
+# Sobrescreva com ADMISSION_LIMITS="read=100:200:1.0;write=50:100:2.0"
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "auth": (20, 50, 2.0),      # login e cadastro (bcrypt)
+    "read": (100, 200, 1.0),
+    "write": (50, 100, 2.0),
+    "export": (4, 4, 0.5),      # streams longos: poucos por vez
+}
+
+OVERLOADED_DETAIL = "Servidor sobrecarregado, tente novamente em instantes"
+INTERNAL_ERROR_DETAIL = "Erro interno do servidor"
+
+
+def parse_limits(value: str) -> Dict[str, Tuple[int, int, float]]:
+    """Converte "read=100:200:1.0;write=..." em {classe: (concorrência, fila, espera)}"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in value.split(";"))):
+        name, _, spec = item.partition("=")
+        try:
+            concurrency, queue, timeout = spec.split(":")
+            limits[name.strip()] = (int(concurrency), int(queue), float(timeout))
+        except ValueError:
+            raise ValueError(f"Limite inválido em ADMISSION_LIMITS: {item!r}")
+    return limits
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """Classe de admissão da rota (None = sem limite)"""
+    if path.startswith("/static") or path == "/accounts/events":
+        # Arquivos estáticos não usam o banco; SSE mantém a conexão aberta indefinidamente
+        return None
+    if path == "/token" or (path == "/users/" and method == "POST"):
+        return "auth"
+    if path.startswith("/accounts/export"):
+        return "export"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+
+class AdmissionLimiter:
+    """
+    Limite de requisições simultâneas de uma classe de rota, com fila FIFO.
+
+    - Até `concurrency` requisições executam ao mesmo tempo
+    - As seguintes esperam na fila (no máximo `max_queue`) por até `timeout` segundos
+    - Se a espera estimada (fila x tempo médio de execução) já passa do `timeout`,
+      a requisição é recusada na chegada, sem ocupar a fila
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_service_time = 0.0  # média móvel exponencial, em segundos
+
+    def expected_wait(self) -> float:
+        """Estimativa de espera para quem chega agora"""
+        return (len(self._waiters) + 1) * self._avg_service_time / self.concurrency
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait()))
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue or self.expected_wait() > self.timeout:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            # Cliente desconectou enquanto esperava
+            if waiter.done():
+                self._hand_off()  # já tinha recebido a vaga: repassa
+            else:
+                self._leave_queue(waiter)
+            raise
+        if not waiter.done():
+            self._leave_queue(waiter)
+            self.rejected += 1
+            return False
+        return True  # a vaga foi transferida por release()
+
+    def _leave_queue(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        self._waiters.remove(waiter)
+
+    def _hand_off(self) -> None:
+        # Transfere a vaga ao primeiro da fila (in_flight não muda) ou a libera
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def release(self, service_time: float) -> None:
+        self._avg_service_time += 0.2 * (service_time - self._avg_service_time)
+        self._hand_off()
+
+
+def _overloaded_response(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": OVERLOADED_DETAIL},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI de controle de admissão (load shedding).
+
+    Limita as requisições simultâneas por classe de rota (classify_route), para
+    que, com o banco lento, as requisições excedentes recebam 503 + Retry-After
+    rapidamente em vez de se acumularem esperando conexões.
+    """
+
+    def __init__(
+        self,
+        app,
+        limits: Optional[Dict[str, Tuple[int, int, float]]] = None,
+        classify: Callable[[str, str], Optional[str]] = classify_route,
+    ):
+        self.app = app
+        self.classify = classify
+        limits = limits or parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+        self.limiters = {name: AdmissionLimiter(name, *limit) for name, limit in limits.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters.get(self.classify(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            logger.warning(f"Requisição recusada por sobrecarga ({limiter.name}): {scope['path']}")
+            await _overloaded_response(limiter.retry_after())(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+
+def setup_admission_control(app: FastAPI) -> None:
+    """Registra o middleware e as respostas 503 para espera de pool e statement_timeout"""
+    if ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionControlMiddleware)
+    register_overload_handlers(app)
+
+
+def register_overload_handlers(app: FastAPI) -> None:
+    """
+    Tratamento único dos erros não capturados pelas rotas e serviços:
+    503 + Retry-After para espera de pool e statement_timeout, 500 para os demais
+    """
+
+    @app.exception_handler(PoolTimeoutError)
+    async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+        logger.warning(f"Tempo de espera por conexão esgotado: {request.url.path}")
+        return _overloaded_response(1)
+
+    @app.exception_handler(DBAPIError)
+    async def statement_timeout_handler(request: Request, exc: DBAPIError):
+        if is_overload_error(exc):
+            logger.warning(f"Comando SQL cancelado por statement_timeout: {request.url.path}")
+            return _overloaded_response(1)
+        logger.error(f"Erro de banco não tratado: {exc}", exc_info=exc)
+        return JSONResponse(status_code=500, content={"detail": INTERNAL_ERROR_DETAIL})
+
+    @app.exception_handler(Exception)
+    async def unhandled_error_handler(request: Request, exc: Exception):
+        logger.error(f"Erro inesperado em {request.url.path}: {exc}", exc_info=exc)
+        return JSONResponse(status_code=500, content={"detail": INTERNAL_ERROR_DETAIL})
@@ -0,0 +1,118 @@
+from typing import Any, Dict, Optional
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from app.utils.cache import TTLCache
+from app.utils.profiling import RequestProfile, SQLTimeline, activate, ProfiledRoute, ProfiledJSONResponse
+from database.database import shard_router
+import hmac
+import json
+import logging
+import os
+import random
+
+logger = logging.getLogger(__name__)
+
+# Token que libera o profiling pelo cabeçalho X-Profile (vazio = desativado)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# Fração das requisições perfiladas por amostragem (0.0 = nenhuma)
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+# Intervalo de amostragem da pilha, em milissegundos
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", 1))
+# Diretório onde os relatórios também são gravados em JSON (vazio = só em memória)
+PROFILING_DIR = os.getenv("PROFILING_DIR", "")
+PROFILING_RETENTION_SECONDS = float(os.getenv("PROFILING_RETENTION_SECONDS", 3600))
+
+# Profiling ligado neste processo. Desligado, nem o middleware nem os wrappers
+# de rota/resposta são instalados: as rotas usam as classes padrão do FastAPI
+PROFILING_ENABLED = bool(PROFILING_TOKEN or PROFILING_SAMPLE_RATE)
+ROUTE_CLASS = ProfiledRoute if PROFILING_ENABLED else APIRoute
+RESPONSE_CLASS = ProfiledJSONResponse if PROFILING_ENABLED else JSONResponse
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Relatórios recentes, baixados por GET /debug/profiles/{id}
+profile_store = TTLCache(maxsize=256, ttl=PROFILING_RETENTION_SECONDS)
+
+sql_timeline = SQLTimeline(lambda: list(shard_router.engines.values()))
+
+
+def get_profile_report(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Relatório pelo id (memória e, se configurado, PROFILING_DIR)"""
+    report = profile_store.get(profile_id)
+    if report is None and PROFILING_DIR and profile_id.isalnum():
+        try:
+            with open(os.path.join(PROFILING_DIR, f"{profile_id}.json"), encoding="utf-8") as file:
+                report = json.load(file)
+        except FileNotFoundError:
+            return None
+    return report
+
+
+def _store(report: Dict[str, Any]) -> None:
+    profile_store.set(report["id"], report)
+    if PROFILING_DIR:
+        try:
+            os.makedirs(PROFILING_DIR, exist_ok=True)
+            with open(os.path.join(PROFILING_DIR, f"{report['id']}.json"), "w", encoding="utf-8") as file:
+                json.dump(report, file)
+        except OSError as e:
+            logger.error(f"Erro ao gravar o relatório de profiling {report['id']}: {e}")
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI de profiling sob demanda.
+
+    A requisição é perfilada quando traz `X-Profile: <PROFILING_TOKEN>` ou é
+    sorteada por PROFILING_SAMPLE_RATE. O relatório (SQL, bcrypt, serialização
+    e amostras de pilha) fica disponível em GET /debug/profiles/{id}, com o id
+    devolvido no cabeçalho X-Profile-Id.
+
+    Fora disso a requisição segue direto para a aplicação.
+    """
+
+    def __init__(self, app, token: str = PROFILING_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE,
+                 interval_ms: float = PROFILING_INTERVAL_MS):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and hmac.compare_digest(value, self.token):
+                    return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger)
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER, profile.id.encode())
+                ]
+            await send(message)
+
+        try:
+            with activate(profile, sql_timeline, self.interval):
+                await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.finish(status_code)
+            _store(profile.report())
+            logger.info(
+                f"Profiling {profile.id}: {profile.method} {profile.path} "
+                f"{profile.duration_ms} ms, {len(profile.sql)} SQLs"
+            )
@@ -2,5 +2,10 @@
 from .base import Base
 from .user_model import User
 from .account_model import Account
+from .idempotency_model import IdempotencyKey
+from .schedule_model import ScheduledTransfer
+from .transaction_model import Transaction
+from .category_rule_model import CategoryRule
+from .audit_model import AccountAuditLog
 
-__all__ = ['Base', 'User', 'Account']
+__all__ = ['Base', 'User', 'Account', 'IdempotencyKey', 'ScheduledTransfer', 'Transaction', 'CategoryRule', 'AccountAuditLog']
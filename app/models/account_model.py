@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Boolean
-from decimal import Decimal
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Boolean, DateTime
+from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from app.models.base import Base
@@ -10,12 +10,14 @@ class Account(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True)
-    balance = Column(Numeric(7, 2), default=Decimal('0.00'))
+    balance = Column(BigInteger, default=0)  # Em centavos
     is_credit = Column(Boolean, default=False)
 
     # Se for crédito:  
-    credit_limit = Column(Numeric(15, 2), default=Decimal('0.00'))  # Limite total  
+    credit_limit = Column(BigInteger, default=0)  # Limite total (em centavos)
     due_day = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Referencia um User
     user_id = Column(Integer, ForeignKey('users.id'))
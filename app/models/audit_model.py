@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON
+from datetime import datetime
+from app.models.base import Base
+
+
+class AccountAuditLog(Base):
+    __tablename__ = "account_audit_log"
+
+    # No SQLite só INTEGER PRIMARY KEY é autoincremento (backend de testes)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # account.created, account.updated, account.deleted ou account.scheduled_transfer
+    action = Column(String(32), nullable=False)
+
+    # Sem FK: o registro precisa sobreviver à exclusão da conta
+    account_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+
+    # Estado da conta antes e depois da alteração (valores em centavos)
+    before = Column(JSON(none_as_null=True), nullable=True)
+    after = Column(JSON(none_as_null=True), nullable=True)
+
+    # Momento da alteração (não o da gravação em lote)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
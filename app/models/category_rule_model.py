@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime
+from datetime import datetime
+from app.models.base import Base
+
+
+class CategoryRule(Base):
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String(50), nullable=False)
+    priority = Column(Integer, nullable=False, default=100)  # Menor = avaliada antes
+
+    # Texto: "substring" ou "regex" sobre a descrição (nulo = qualquer descrição)
+    match_type = Column(String(20), nullable=False, default="substring")
+    pattern = Column(String(255), nullable=True)
+
+    # Filtros opcionais (valores em centavos)
+    min_amount = Column(BigInteger, nullable=True)
+    max_amount = Column(BigInteger, nullable=True)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete="CASCADE"), nullable=True)
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
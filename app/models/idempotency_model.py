@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from datetime import datetime
+from app.models.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_scope_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), nullable=False)
+    # Escopo da chave: rota + usuário (ex.: "POST /accounts:user:1")
+    scope = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # HMAC-SHA256 do corpo da requisição
+
+    # Resposta original (status_code 0 = reservada, operação ainda em andamento)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)  # JSON serializado
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
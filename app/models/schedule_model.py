@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Boolean, DateTime, Index, text
+from datetime import datetime
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+
+
+class ScheduledTransfer(Base):
+    __tablename__ = "scheduled_transfers"
+    __table_args__ = (
+        # Índice parcial usado pelo scheduler para buscar os agendamentos vencidos
+        Index(
+            "ix_scheduled_transfers_due",
+            "next_run_at",
+            postgresql_where=text("is_active"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    description = Column(String(100), nullable=True)
+    # Valor em centavos: positivo = crédito na conta, negativo = débito
+    amount = Column(BigInteger, nullable=False, default=0)
+
+    # Recorrência (em dias). Nulo = execução única
+    interval_days = Column(Integer, nullable=True)
+    next_run_at = Column(DateTime, nullable=False)
+    last_run_at = Column(DateTime, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Referencia uma Account e o User dono
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True)
+    account = relationship("Account")
@@ -0,0 +1,81 @@
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, Index, DDL, Computed, event,
+    literal_column
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from datetime import datetime
+from sqlalchemy.orm import relationship, deferred
+from app.models.base import Base
+
+# Configuração de texto usada no índice e nas consultas de busca textual
+SEARCH_TS_CONFIG = literal_column("'portuguese'::regconfig")
+
+
+class _DescriptionTsvector(ColumnElement):
+    """Expressão da coluna gerada description_tsv (to_tsvector no Postgres)"""
+    inherit_cache = True
+
+
+@compiles(_DescriptionTsvector, "postgresql")
+def _compile_tsvector_pg(element, compiler, **kw):
+    return "to_tsvector('portuguese'::regconfig, description)"
+
+
+@compiles(_DescriptionTsvector)
+def _compile_tsvector_default(element, compiler, **kw):
+    # SQLite (testes): sem busca textual; a coluna só replica a descrição
+    return "description"
+
+
+class Transaction(Base):
+    __tablename__ = "transactions"
+
+    # No SQLite só INTEGER PRIMARY KEY é autoincremento (backend de testes)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    description = Column(String(255), nullable=False)
+    amount = Column(BigInteger, nullable=False)  # Em centavos (negativo = débito)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    category = Column(String(50), nullable=True)  # Preenchida pelas regras do usuário
+    # tsvector da descrição, gerado e armazenado pelo banco: a relevância da busca
+    # (ts_rank_cd) lê a coluna em vez de reprocessar o texto de cada linha.
+    # Deferred: não é carregada com a transação
+    description_tsv = deferred(Column(
+        TSVECTOR().with_variant(Text, "sqlite"),
+        Computed(_DescriptionTsvector(), persisted=True),
+    ))
+
+    # Referencia uma Account (user_id desnormalizado para filtrar sem JOIN)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    account = relationship("Account")
+
+
+def description_tsvector():
+    """tsvector da descrição (coluna armazenada, com o índice GIN de busca textual)"""
+    return Transaction.description_tsv
+
+
+Index("ix_transactions_account_occurred", Transaction.account_id, Transaction.occurred_at)
+Index("ix_transactions_user_id", Transaction.user_id, Transaction.id)
+# Busca fuzzy (similarity / ILIKE) por trigramas
+Index(
+    "ix_transactions_description_trgm",
+    Transaction.description,
+    postgresql_using="gin",
+    postgresql_ops={"description": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+# Busca textual (description_tsv @@ tsquery)
+Index(
+    "ix_transactions_description_tsv",
+    Transaction.description_tsv,
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+# O índice de trigramas depende da extensão pg_trgm
+event.listen(
+    Transaction.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Boolean, false
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from app.models.base import Base
@@ -10,6 +10,7 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)  # Senha criptografada
+    is_admin = Column(Boolean, default=False, server_default=false(), nullable=False)
 
     # Relacionamentos
     accounts = relationship("Account", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
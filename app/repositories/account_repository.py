@@ -1,11 +1,61 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func, case, cast, BigInteger, Row
 from sqlalchemy.exc import SQLAlchemyError  
 from app.models.account_model import Account
+from app.models.transaction_model import Transaction
 from app.schemas.account_schema import AccountResponse, AccountCreate, AccountUpdate, AccountType
-from typing import Optional, List
+from app.repositories.user_repository import forget_users_with_accounts
+from app.utils.singleflight import SingleFlight, detached_copy
+from typing import Optional, List, AsyncIterator, Sequence, Tuple, Union
+from datetime import datetime
 import logging 
 
+# Colunas exportadas (sem hidratar objetos ORM)
+EXPORT_COLUMNS = (
+    Account.id,
+    Account.user_id,
+    Account.name,
+    Account.is_credit,
+    Account.balance,
+    Account.credit_limit,
+    Account.due_day,
+    Account.created_at,
+)
+
+# Listagens idênticas e simultâneas do mesmo usuário compartilham uma única consulta
+# (chave: user_id e campos pedidos)
+_accounts_by_user = SingleFlight()
+
+
+def forget_accounts(user_id: int) -> None:
+    """Após uma escrita, listagens (e buscas de usuário com contas) já em andamento não são reaproveitadas"""
+    _accounts_by_user.forget_where(lambda key: key[0] == user_id)
+    forget_users_with_accounts()
+
+
+def _columns(fields: Sequence[str]) -> list:
+    return [getattr(Account, field) for field in fields]
+
+
+def _select_fields(fields: Optional[Tuple[str, ...]]):
+    # Com campos, só essas colunas são lidas e as linhas não viram objetos ORM
+    return select(Account) if fields is None else select(*_columns(fields))
+
+
+def _rows(result, fields: Optional[Tuple[str, ...]]) -> list:
+    return result.scalars().all() if fields is None else result.all()
+
+
+def _share_rows(rows: list) -> list:
+    # Objetos Account pertencem à sessão de quem consultou: as chamadas
+    # concorrentes recebem cópias (Row é imutável e pode ser compartilhada)
+    return [detached_copy(row) if isinstance(row, Account) else row for row in rows]
+
+
+def _sum_cents(expression):
+    # SUM(bigint) retorna NUMERIC no Postgres; o cast mantém o resultado inteiro
+    return cast(func.coalesce(func.sum(expression), 0), BigInteger)
+
 class AccountRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -15,8 +65,11 @@ class AccountRepository:
         try:
             db_account = Account(**account)
             self.db.add(db_account)
-            await self.db.commit()
+            await self.db.flush()
             await self.db.refresh(db_account)
+            # Commit por último: a sessão não segura uma conexão do pool até o fim da requisição
+            await self.db.commit()
+            forget_accounts(db_account.user_id)
             return db_account
         except SQLAlchemyError as e:  
             await self.db.rollback()
@@ -48,14 +101,24 @@ class AccountRepository:
             logging.error(f"Erro ao buscar conta por nome: {e}")
             raise
 
-    async def get_all_by_user(self, user_id: int) -> List[Account]:
-        """Retorna todas as contas referentes a um User"""
-        try:
+    async def get_all_by_user(
+        self, user_id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Union[Account, Row]]:
+        """
+        Retorna todas as contas referentes a um User.
+        Com `fields`, lê só essas colunas e retorna linhas (Row) em vez de objetos Account.
+        Chamadas simultâneas para o mesmo usuário compartilham a mesma consulta
+        (as concorrentes recebem cópias desanexadas das contas, fora da sessão).
+        """
+        async def query() -> list:
             result = await self.db.execute(
-                select(Account)
+                _select_fields(fields)
                 .where(Account.user_id == user_id)
             )
-            accounts = result.scalars().all()
+            return _rows(result, fields)
+
+        try:
+            accounts = list(await _accounts_by_user.do((user_id, fields), query, _share_rows))
             if not accounts:
                 logging.warning(f"Nenhuma conta encontrada para o usuário {user_id}")
             return accounts
@@ -63,6 +126,22 @@ class AccountRepository:
             logging.error(f"Erro ao buscar contas do usuário {user_id}: {str(e)}")
             raise
         
+    async def get_fields_by_id_and_user(
+        self, account_id: int, user_id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Union[Account, Row]]:
+        """Retorna uma conta do user (só as colunas de `fields`, se informado)"""
+        try:
+            result = await self.db.execute(
+                _select_fields(fields)
+                .where(Account.id == account_id)
+                .where(Account.user_id == user_id)
+            )
+            accounts = _rows(result, fields)
+            return accounts[0] if accounts else None
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar conta {account_id} do usuário {user_id}: {e}")
+            raise
+
     async def get_by_id_and_user(self, account_id, user_id)->List[Account]:
         """Retorna uma conta com ID e user fornecidos"""
         try:
@@ -89,6 +168,7 @@ class AccountRepository:
                 setattr(db_account, key, value)
                 
             await self.db.commit()
+            forget_accounts(db_account.user_id)
             await self.db.refresh(db_account)
             return db_account
         except SQLAlchemyError as e:
@@ -99,12 +179,79 @@ class AccountRepository:
     async def delete(self, account_id: int) -> bool:
         """Deleta a Conta de um User"""
         try:
-            await self.db.execute(
-                delete(Account).where(Account.id == account_id)
+            result = await self.db.execute(
+                delete(Account).where(Account.id == account_id).returning(Account.user_id)
             )
+            user_ids = result.scalars().all()
             await self.db.commit()
+            for user_id in user_ids:
+                forget_accounts(user_id)
             return True
         except SQLAlchemyError as e:
             await self.db.rollback()
             logging.error(f"Erro ao deletar conta {account_id}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_summary(self, user_id: int) -> dict:
+        """
+        Calcula os totais financeiros de um User em uma única consulta agregada.
+        O limite utilizado vem do histórico das contas de crédito (compras
+        negativas, pagamentos positivos): o saldo devedor de cada cartão, nunca
+        negativo. Os totais são retornados em centavos.
+        """
+        try:
+            owed = -func.sum(Transaction.amount)
+            per_card = (
+                select(case((owed > 0, owed), else_=0).label("owed"))
+                .join(Account, Account.id == Transaction.account_id)
+                .where(Account.user_id == user_id)
+                .where(Account.is_credit.is_(True))
+                .group_by(Transaction.account_id)
+                .subquery()
+            )
+            result = await self.db.execute(
+                select(
+                    func.count(Account.id).label("account_count"),
+                    _sum_cents(case((Account.is_credit.is_(False), Account.balance), else_=0))
+                    .label("total_balance"),
+                    _sum_cents(case((Account.is_credit.is_(True), Account.credit_limit), else_=0))
+                    .label("total_credit_limit"),
+                    select(_sum_cents(per_card.c.owed)).scalar_subquery()
+                    .label("used_credit_limit"),
+                )
+                .where(Account.user_id == user_id)
+            )
+            return dict(result.one()._mapping)
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao calcular resumo do usuário {user_id}: {e}")
+            raise
+
+    async def stream_export_rows(
+        self,
+        user_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_size: int = 1000,
+        fields: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[Sequence]:
+        """
+        Percorre as contas com um cursor do lado do servidor, em blocos de `chunk_size`.
+        Sem user_id, percorre as contas de todos os usuários (exportação administrativa).
+        Com `fields`, só essas colunas são lidas (padrão: EXPORT_COLUMNS).
+        """
+        columns = EXPORT_COLUMNS if fields is None else _columns(fields)
+        stmt = select(*columns).order_by(Account.id)
+        if user_id is not None:
+            stmt = stmt.where(Account.user_id == user_id)
+        if start is not None:
+            stmt = stmt.where(Account.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(Account.created_at < end)
+
+        try:
+            result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+            async for row in result:
+                yield row
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao exportar contas: {e}")
+            raise
@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.audit_model import AccountAuditLog
+from typing import List
+import logging
+
+class AuditRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def bulk_create(self, events: List[dict]) -> int:
+        """Grava um lote de eventos de auditoria em um único INSERT (executemany)"""
+        if not events:
+            return 0
+        try:
+            await self.db.execute(insert(AccountAuditLog), events)
+            await self.db.commit()
+            return len(events)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao gravar {len(events)} eventos de auditoria: {e}")
+            raise
@@ -0,0 +1,75 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.category_rule_model import CategoryRule
+from typing import Optional, List, Tuple
+import logging
+
+class CategoryRuleRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, rule: dict) -> Optional[CategoryRule]:
+        """Cria uma regra de categorização"""
+        try:
+            db_rule = CategoryRule(**rule)
+            self.db.add(db_rule)
+            await self.db.commit()
+            await self.db.refresh(db_rule)
+            return db_rule
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao criar regra no banco: {e}")
+            raise
+
+    async def get_all_by_user(self, user_id: int) -> List[CategoryRule]:
+        """Retorna todas as regras de um User, por prioridade"""
+        try:
+            result = await self.db.execute(
+                select(CategoryRule)
+                .where(CategoryRule.user_id == user_id)
+                .order_by(CategoryRule.priority, CategoryRule.id)
+            )
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar regras do usuário {user_id}: {e}")
+            raise
+
+    async def get_by_id_and_user(self, rule_id: int, user_id: int) -> Optional[CategoryRule]:
+        """Retorna uma regra com ID e user fornecidos"""
+        try:
+            result = await self.db.execute(
+                select(CategoryRule)
+                .where(CategoryRule.id == rule_id)
+                .where(CategoryRule.user_id == user_id)
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar regra {rule_id}: {e}")
+            raise
+
+    async def delete(self, rule_id: int) -> bool:
+        """Deleta uma regra"""
+        try:
+            await self.db.execute(delete(CategoryRule).where(CategoryRule.id == rule_id))
+            await self.db.commit()
+            return True
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao deletar regra {rule_id}: {e}")
+            raise
+
+    async def get_fingerprint(self, user_id: int) -> Tuple:
+        """
+        Retorna (quantidade, última alteração) das regras do usuário.
+        Muda sempre que uma regra é criada, alterada ou removida.
+        """
+        try:
+            result = await self.db.execute(
+                select(func.count(CategoryRule.id), func.max(CategoryRule.updated_at), func.max(CategoryRule.id))
+                .where(CategoryRule.user_id == user_id)
+            )
+            return tuple(result.one())
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao verificar regras do usuário {user_id}: {e}")
+            raise
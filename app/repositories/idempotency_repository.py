@@ -0,0 +1,103 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.models.idempotency_model import IdempotencyKey
+from datetime import datetime
+from typing import Optional
+import logging
+
+class IdempotencyRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Retorna a resposta armazenada para uma chave ainda válida"""
+        try:
+            result = await self.db.execute(
+                select(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope)
+                .where(IdempotencyKey.key == key)
+                .where(IdempotencyKey.expires_at > datetime.utcnow())
+            )
+            record = result.scalar_one_or_none()
+            # Devolve a conexão ao pool: a requisição ainda vai usar outra sessão
+            await self.db.commit()
+            return record
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar chave de idempotência {key}: {e}")
+            raise
+
+    async def claim(self, record: dict) -> bool:
+        """
+        Reserva a chave gravando o registro (ainda sem resposta).
+        Retorna False se a chave já existe e ainda é válida.
+        """
+        try:
+            # Uma chave expirada ainda ocuparia a constraint única
+            await self.db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.scope == record["scope"])
+                .where(IdempotencyKey.key == record["key"])
+                .where(IdempotencyKey.expires_at <= datetime.utcnow())
+            )
+            self.db.add(IdempotencyKey(**record))
+            await self.db.commit()
+            return True
+        except IntegrityError:
+            # Outra requisição já reservou a mesma chave
+            await self.db.rollback()
+            return False
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao reservar chave de idempotência {record.get('key')}: {e}")
+            raise
+
+    async def complete(self, scope: str, key: str, values: dict) -> None:
+        """Grava a resposta na chave reservada"""
+        try:
+            await self.db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope)
+                .where(IdempotencyKey.key == key)
+                .values(**values)
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao salvar chave de idempotência {key}: {e}")
+            raise
+
+    async def release(self, scope: str, key: str) -> None:
+        """Libera uma chave reservada cuja operação falhou (o cliente pode repetir)"""
+        try:
+            await self.db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope)
+                .where(IdempotencyKey.key == key)
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao liberar chave de idempotência {key}: {e}")
+            raise
+
+    async def delete_expired(self, limit: int) -> int:
+        """
+        Remove até `limit` chaves expiradas (usa o índice de expires_at) e retorna
+        a quantidade removida. Lotes limitados mantêm cada transação curta.
+        """
+        try:
+            expired = (
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(limit)
+            )
+            result = await self.db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired))
+            )
+            await self.db.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao remover chaves de idempotência expiradas: {e}")
+            raise
@@ -0,0 +1,196 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, insert, func, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.schedule_model import ScheduledTransfer
+from app.models.account_model import Account
+from app.models.transaction_model import Transaction
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, List, Set, Tuple
+import logging
+
+# UPDATE que aplica o total de um lote ao saldo de uma conta.
+# Contas de crédito não têm saldo (ver AccountService): nunca são alteradas aqui
+_apply_balance_stmt = (
+    update(Account.__table__)
+    .where(Account.__table__.c.id == bindparam("b_account_id"))
+    .where(Account.__table__.c.is_credit.is_(False))
+    .values(balance=Account.__table__.c.balance + bindparam("b_amount"))
+    .returning(Account.__table__.c.balance)
+)
+
+# Alteração de saldo feita por um lote: (user_id, account_id, saldo anterior, saldo novo)
+BalanceChange = Tuple[int, int, int, int]
+
+class ScheduleRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, schedule: dict) -> Optional[ScheduledTransfer]:
+        """Cria uma transferência agendada"""
+        try:
+            db_schedule = ScheduledTransfer(**schedule)
+            self.db.add(db_schedule)
+            await self.db.commit()
+            await self.db.refresh(db_schedule)
+            return db_schedule
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao criar agendamento no banco: {e}")
+            raise
+
+    async def get_all_by_user(self, user_id: int) -> List[ScheduledTransfer]:
+        """Retorna todos os agendamentos de um User"""
+        try:
+            result = await self.db.execute(
+                select(ScheduledTransfer)
+                .where(ScheduledTransfer.user_id == user_id)
+                .order_by(ScheduledTransfer.next_run_at)
+            )
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar agendamentos do usuário {user_id}: {e}")
+            raise
+
+    async def get_by_id_and_user(self, schedule_id: int, user_id: int) -> Optional[ScheduledTransfer]:
+        """Retorna um agendamento com ID e user fornecidos"""
+        try:
+            result = await self.db.execute(
+                select(ScheduledTransfer)
+                .where(ScheduledTransfer.id == schedule_id)
+                .where(ScheduledTransfer.user_id == user_id)
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar agendamento {schedule_id}: {e}")
+            raise
+
+    async def delete(self, schedule_id: int) -> bool:
+        """Deleta um agendamento"""
+        try:
+            await self.db.execute(
+                delete(ScheduledTransfer).where(ScheduledTransfer.id == schedule_id)
+            )
+            await self.db.commit()
+            return True
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao deletar agendamento {schedule_id}: {e}")
+            raise
+
+    async def get_next_run_at(self) -> Optional[datetime]:
+        """Retorna a data da próxima execução pendente (usa o índice parcial)"""
+        try:
+            result = await self.db.execute(
+                select(func.min(ScheduledTransfer.next_run_at))
+                .where(ScheduledTransfer.is_active.is_(True))
+            )
+            return result.scalar()
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar próximo agendamento: {e}")
+            raise
+
+    async def process_due_batch(
+        self, now: datetime, batch_size: int
+    ) -> Tuple[int, Set[int], List[BalanceChange]]:
+        """
+        Reivindica e executa um lote de agendamentos vencidos em uma única transação.
+        - SELECT ... FOR UPDATE SKIP LOCKED permite vários workers em paralelo
+        - Os valores são somados por conta e aplicados com um UPDATE por conta
+        - Cada conta é aplicada em um SAVEPOINT: uma falha desfaz só os agendamentos
+          dela, que são reexecutados um a um; os que falharem de novo são desativados
+          (sem isso, voltariam à frente de todos os lotes seguintes)
+        - Agendamentos em contas de crédito (sem saldo) são desativados
+        - Cada execução é registrada no histórico (transactions)
+        - Cada execução avança uma ocorrência; atrasos são recuperados nos próximos lotes
+        Retorna a quantidade de agendamentos executados, os usuários afetados e as
+        alterações de saldo por conta (para a trilha de auditoria, após o commit).
+        """
+        try:
+            result = await self.db.execute(
+                select(ScheduledTransfer, Account.is_credit)
+                .join(Account, Account.id == ScheduledTransfer.account_id)
+                .where(ScheduledTransfer.is_active.is_(True))
+                .where(ScheduledTransfer.next_run_at <= now)
+                .order_by(ScheduledTransfer.next_run_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True, of=ScheduledTransfer)
+            )
+            rows = result.all()
+            if not rows:
+                await self.db.rollback()
+                return 0, set(), []
+
+            by_account = defaultdict(list)
+            disabled = []
+            for job, is_credit in rows:
+                if is_credit:
+                    disabled.append(job)
+                else:
+                    by_account[job.account_id].append(job)
+
+            executed, changes = [], []
+            # Ordena por conta para que workers concorrentes travem as linhas na mesma ordem
+            for account_id, jobs in sorted(by_account.items()):
+                if await self._run_jobs(account_id, jobs, now, changes):
+                    executed.extend(jobs)
+                    continue
+                for job in jobs:
+                    if await self._run_jobs(account_id, [job], now, changes):
+                        executed.append(job)
+                    else:
+                        disabled.append(job)
+
+            for job in disabled:
+                logging.error(
+                    f"Agendamento {job.id} desativado: não foi possível executá-lo na conta {job.account_id}"
+                )
+                job.is_active = False
+
+            user_ids = {job.user_id for job in executed}
+            await self.db.commit()
+            return len(executed), user_ids, changes
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao executar lote de agendamentos: {e}")
+            raise
+
+    async def _run_jobs(
+        self, account_id: int, jobs: List[ScheduledTransfer], now: datetime, changes: List[BalanceChange]
+    ) -> bool:
+        """
+        Aplica os agendamentos de uma conta em um SAVEPOINT; False se falhar (nada é aplicado).
+        Em caso de sucesso, acrescenta a alteração de saldo da conta a `changes`.
+        """
+        amount = sum(job.amount for job in jobs)
+        try:
+            async with self.db.begin_nested():
+                connection = await self.db.connection()
+                balance = (await connection.execute(
+                    _apply_balance_stmt, {"b_account_id": account_id, "b_amount": amount}
+                )).scalar()
+                await connection.execute(insert(Transaction.__table__), [
+                    {
+                        "account_id": job.account_id,
+                        "user_id": job.user_id,
+                        "amount": job.amount,
+                        "description": job.description or "Transferência agendada",
+                        "occurred_at": now,
+                    }
+                    for job in jobs
+                ])
+                for job in jobs:
+                    job.last_run_at = now
+                    if job.interval_days:
+                        job.next_run_at = job.next_run_at + timedelta(days=job.interval_days)
+                    else:
+                        job.is_active = False
+            if balance is not None:
+                changes.append((jobs[0].user_id, account_id, balance - amount, balance))
+            return True
+        except SQLAlchemyError as e:
+            logging.warning(f"Falha ao executar agendamentos da conta {account_id}: {e}")
+            # O rollback do SAVEPOINT expira os agendamentos alterados nele
+            for job in jobs:
+                await self.db.refresh(job)
+            return False
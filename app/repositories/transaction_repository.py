@@ -0,0 +1,135 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func, or_, tuple_, literal
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+from app.models.transaction_model import Transaction, SEARCH_TS_CONFIG, description_tsvector
+from app.schemas.transaction_schema import SearchSort
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Sequence, Tuple
+import logging
+
+# Colunas da exportação do histórico (valores em centavos)
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.account_id,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.occurred_at,
+)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class TransactionRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def bulk_create(self, transactions: List[dict], commit: bool = True) -> int:
+        """Insere várias transações em um único INSERT (executemany)"""
+        if not transactions:
+            return 0
+        try:
+            await self.db.execute(insert(Transaction), transactions)
+            if commit:
+                await self.db.commit()
+            return len(transactions)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Erro ao inserir transações: {e}")
+            raise
+
+    async def search(
+        self,
+        user_id: int,
+        query: str,
+        limit: int = 20,
+        after: Optional[Tuple[float, int]] = None,
+        sort: SearchSort = SearchSort.RELEVANCE,
+    ) -> List[Tuple[Transaction, float]]:
+        """
+        Busca transações do usuário pela descrição.
+        - Filtro: ILIKE (índice de trigramas) ou busca textual (índice GIN em description_tsv)
+        - Relevância: similarity() + ts_rank_cd() sobre o tsvector armazenado
+        - Paginação keyset: `after` é o par (relevância, id) do último item da página anterior
+        - sort=relevance: ordena por relevância. A relevância depende da consulta e
+          nenhum índice a fornece: cada página ordena todas as transações do usuário
+          que casam com a busca
+        - sort=recent: ordena por id (mais recentes primeiro), na ordem do índice
+          (user_id, id); cada página lê só até completar `limit` resultados
+        Fora do Postgres (SQLite de testes), filtra só por ILIKE e a relevância é 0.
+        """
+        contains = Transaction.description.ilike(f"%{_escape_like(query)}%", escape="\\")
+        if self.db.get_bind().dialect.name == "postgresql":
+            ts_query = func.plainto_tsquery(SEARCH_TS_CONFIG, query)
+            rank = func.similarity(Transaction.description, query) + func.ts_rank_cd(
+                description_tsvector(), ts_query
+            )
+            match = or_(contains, description_tsvector().op("@@")(ts_query))
+        else:
+            rank, match = literal(0.0), contains
+
+        if sort == SearchSort.RECENT:
+            stmt = (
+                select(Transaction, rank.label("rank"))
+                .where(Transaction.user_id == user_id)
+                .where(match)
+                .order_by(Transaction.id.desc())
+                .limit(limit)
+            )
+            if after is not None:
+                stmt = stmt.where(Transaction.id < after[1])
+        else:
+            # OFFSET 0 impede o Postgres de incorporar a subconsulta: a relevância é
+            # calculada uma vez por linha, e não de novo no filtro do keyset
+            columns = [column for column in Transaction.__table__.c if column.computed is None]
+            ranked = (
+                select(*columns, rank.label("rank"))
+                .where(Transaction.user_id == user_id)
+                .where(match)
+                .offset(0)
+                .subquery("ranked")
+            )
+            ranked_transaction = aliased(Transaction, ranked)
+            stmt = (
+                select(ranked_transaction, ranked.c.rank)
+                .order_by(ranked.c.rank.desc(), ranked.c.id.desc())
+                .limit(limit)
+            )
+            if after is not None:
+                stmt = stmt.where(tuple_(ranked.c.rank, ranked.c.id) < tuple_(*after))
+
+        try:
+            result = await self.db.execute(stmt)
+            return [(row[0], row.rank) for row in result]
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao buscar transações do usuário {user_id}: {e}")
+            raise
+
+    async def stream_export_rows(
+        self,
+        user_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence]:
+        """
+        Percorre o histórico com um cursor do lado do servidor, em blocos de `chunk_size`,
+        na ordem do índice (user_id, id). Sem user_id, percorre todos os usuários.
+        """
+        stmt = select(*EXPORT_COLUMNS).order_by(Transaction.id)
+        if user_id is not None:
+            stmt = stmt.where(Transaction.user_id == user_id)
+        if start is not None:
+            stmt = stmt.where(Transaction.occurred_at >= start)
+        if end is not None:
+            stmt = stmt.where(Transaction.occurred_at < end)
+
+        try:
+            result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+            async for row in result:
+                yield row
+        except SQLAlchemyError as e:
+            logging.error(f"Erro ao exportar transações: {e}")
+            raise
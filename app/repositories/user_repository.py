@@ -1,13 +1,84 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError  
+from sqlalchemy.orm import selectinload, joinedload, subqueryload
 from app.models.user_model import User
 from app.schemas.user_schema import UserCreate
 from app.utils.auth import get_hash_password
+from database.sharding import ShardRouter
+from app.utils.singleflight import SingleFlight, detached_copy
+from contextlib import nullcontext
+from typing import Optional, Tuple
 import logging
+import os
+
+# Estratégias de carregamento de User.accounts:
+# - selectin: 2º SELECT ... WHERE user_id IN (...) (padrão; sem linhas duplicadas)
+# - joined: um único SELECT com LEFT OUTER JOIN
+# - subquery: 2º SELECT reaproveitando a consulta original como subquery
+ACCOUNT_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "subquery": subqueryload,
+}
+USER_ACCOUNTS_LOADER = os.getenv("USER_ACCOUNTS_LOADER", "selectin")
+
+# Buscas simultâneas pelo mesmo username (ex.: get_current_user em requisições
+# paralelas do mesmo cliente) compartilham uma única consulta
+_users_by_username = SingleFlight()
+
+def forget_users_with_accounts() -> None:
+    """
+    Após uma escrita em contas, buscas com User.accounts já em andamento não
+    são reaproveitadas. A chave é o username e a escrita só conhece o user_id:
+    desvincula todas (as buscas em andamento terminam normalmente).
+    """
+    _users_by_username.forget_where(lambda key: key[1])
+
+def _first(result) -> Optional[User]:
+    # unique() é exigido pelo joinedload de coleções (linhas repetidas por conta)
+    return result.unique().scalars().first()
+
+def _share_found(found: Tuple[Optional[User], Optional[str]]) -> Tuple[Optional[User], Optional[str]]:
+    # O User (e suas contas) pertence à sessão de quem consultou e recebe o shard
+    # de cada chamador: as chamadas concorrentes recebem uma cópia desanexada
+    user, shard = found
+    return detached_copy(user), shard
+
 class UserRepository:
-    def __init__(self, db: AsyncSession):
+    """
+    Com um ShardRouter de vários shards, cada usuário é lido/gravado no shard
+    resolvido pelo hash do username; buscas por email consultam todos os shards.
+    Sem sharding, usa a sessão recebida.
+    `account_loader` define como User.accounts é carregado quando pedido (ACCOUNT_LOADERS).
+    """
+    def __init__(
+        self,
+        db: Optional[AsyncSession],
+        router: Optional[ShardRouter] = None,
+        account_loader: str = USER_ACCOUNTS_LOADER,
+    ):
+        if account_loader not in ACCOUNT_LOADERS:
+            raise ValueError(f"Estratégia de carregamento inválida: {account_loader}")
         self.db = db
+        self.router = router
+        self.account_loader = account_loader
+
+    @property
+    def _sharded(self) -> bool:
+        return self.router is not None and self.router.is_sharded
+
+    def _session_for(self, shard: str):
+        """Sessão do shard (a própria sessão quando não há sharding)"""
+        if not self._sharded:
+            return nullcontext(self.db)
+        return self.router.session(shard)
+
+    def _tag(self, user: Optional[User], shard: Optional[str]) -> Optional[User]:
+        # Guarda o shard de origem para as dependências abrirem a sessão certa
+        if user is not None:
+            user.shard = shard if self._sharded else (self.router.default if self.router else None)
+        return user
 
     async def create_user(self, user: UserCreate):
         """Cria um novo usuário no banco de dados"""
@@ -21,48 +92,97 @@ class UserRepository:
                 hashed_password=hashed_password,
             )
             
-            self.db.add(db_user)
-            await self.db.commit() 
-            await self.db.refresh(db_user) 
-            return db_user
+            shard = self.router.shard_for(user.username) if self._sharded else None
+            async with self._session_for(shard) as db:
+                try:
+                    db.add(db_user)
+                    await db.flush()
+                    await db.refresh(db_user)
+                    await db.commit()
+                    # Buscas anteriores à criação (que retornariam None) não são reaproveitadas
+                    for with_accounts in (False, True):
+                        _users_by_username.forget((user.username, with_accounts))
+                except Exception:
+                    await db.rollback()
+                    raise
+            return self._tag(db_user, shard)
         except SQLAlchemyError as e:
             logging.error(f"Erro ao criar usuário: {e}")
             raise
         except Exception as e: 
-            await self.db.rollback()
             logging.error(f"Erro inesperado ao criar usuário: {e}")
             raise
 
-    async def get_user_by_username(self, username: str):
+    async def get_user_by_username(self, username: str, with_accounts: bool = False):
+        """
+        Busca um usuário pelo nome de usuário.
+        Com with_accounts, carrega User.accounts na mesma ida ao banco
+        (relacionamentos lazy não podem ser acessados em código assíncrono).
+        Com sharding, consulta o shard do hash e, se não encontrar, os demais
+        (usuário ainda não movido por um rebalanceamento em andamento).
+        Buscas simultâneas pelo mesmo username compartilham a mesma consulta
+        (as concorrentes recebem uma cópia desanexada do usuário).
+        """
+        query = select(User).where(User.username == username)
+        if with_accounts:
+            query = query.options(ACCOUNT_LOADERS[self.account_loader](User.accounts))
+
+        async def lookup() -> Tuple[Optional[User], Optional[str]]:
+            if not self._sharded:
+                result = await self.db.execute(query)
+                return _first(result), None
+
+            shard = self.router.shard_for(username)
+            async with self._session_for(shard) as db:
+                user = _first(await db.execute(query))
+            if user is not None:
+                return user, shard
+            return await self._search_shards(query, exclude=shard)
+
         try:
-            """Busca um usuário pelo nome de usuário"""
-            result = await self.db.execute(
-                select(User).where(User.username == username)
-            )
-            return result.scalars().first()
+            user, shard = await _users_by_username.do((username, with_accounts), lookup, _share_found)
+            return self._tag(user, shard)
         except SQLAlchemyError as e:
             logging.error(f"Erro ao buscar usuário pelo username: {e}")
             raise
 
     async def get_user_by_email(self, email: str) -> User | None:
-        """Busca um usuário pelo email de usuário"""
+        """Busca um usuário pelo email de usuário (em todos os shards)"""
         try:
-            result = await self.db.execute(
-                select(User).where(User.email == email)
-            )
-            return result.scalars().first()
+            query = select(User).where(User.email == email)
+            if not self._sharded:
+                result = await self.db.execute(query)
+                return self._tag(result.scalars().first(), None)
+            return self._tag(*await self._search_shards(query))
         except SQLAlchemyError as e:
             logging.error(f"Erro ao buscar user pelo email de usuário: {e}")
             raise
 
     async def verify_user_existence(self, username: str, email: str):
         try:
-            result = await self.db.execute(
+            query = (
                 select(User)
                 .where(User.username==username)
                 .where(User.email==email)
             )
-            return result.scalars().first()
+            shard = self.router.shard_for(username) if self._sharded else None
+            async with self._session_for(shard) as db:
+                result = await db.execute(query)
+                return self._tag(result.scalars().first(), shard)
         except SQLAlchemyError as e:
             logging.error(f"Erro ao buscar user pelo email de usuário e username: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _search_shards(
+        self, query, exclude: Optional[str] = None
+    ) -> Tuple[Optional[User], Optional[str]]:
+        """Executa a consulta em todos os shards concorrentemente; retorna o primeiro resultado e seu shard"""
+        async def run(shard, session):
+            if shard == exclude:
+                return None
+            return _first(await session.execute(query))
+
+        for shard, user in (await self.router.fan_out(run)).items():
+            if user is not None:
+                return user, shard
+        return None, None
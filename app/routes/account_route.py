@@ -1,43 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.services.account_service import AccountService, AccountUpdate, AccountCreate
-from app.schemas.account_schema import AccountResponse
-from dependencies.account import get_account_service
-from dependencies.auth import get_current_user
+from app.services.idempotency_service import IdempotencyService, hash_payload
+from app.services.export_service import ExportService, MEDIA_TYPES, ACCOUNT_EXPORT_FIELDS
+from app.services.event_bus import event_bus
+from app.services.transaction_service import TransactionService
+from app.schemas.transaction_schema import (
+    TransactionSearchPage, TransactionImport, TransactionImportResult, SearchSort
+)
+from app.schemas.account_schema import (
+    AccountResponse, AccountSummary, ExportFormat, ACCOUNT_FIELDS, parse_fields, sparse_account_model,
+    sparse_account_list
+)
+from dependencies.account import get_account_service, get_export_service
+from dependencies.transaction import get_transaction_service
+from dependencies.auth import get_current_user, get_current_admin
+from dependencies.idempotency import get_idempotency_service
 from app.models.user_model import User
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from app.middleware.profiling import ROUTE_CLASS
+from app.utils.profiling import profile_span
+import asyncio
+import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Intervalo dos comentários de keep-alive enviados nas conexões SSE
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+FIELDS_DESCRIPTION = "Campos da resposta separados por vírgula (ex.: id,name,balance); padrão: todos"
+
+
+def _parse_fields(value: Optional[str], allowed) -> Optional[tuple]:
+    try:
+        return parse_fields(value, allowed)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+# Respostas só com os campos pedidos (o response_model completo exigiria todos).
+# A serialização acontece aqui, dentro do endpoint: o span é medido explicitamente
+def _sparse_response(account, fields: tuple) -> Response:
+    with profile_span("serialization"):
+        model = sparse_account_model(fields)
+        body = model.model_validate(account._asdict()).model_dump_json()
+    return Response(body, media_type="application/json")
+
+
+def _sparse_list_response(rows: list, fields: tuple) -> Response:
+    # Linhas (Row) viram dicts: validar por atributos em Row é bem mais lento
+    with profile_span("serialization"):
+        adapter = sparse_account_list(fields)
+        body = adapter.dump_json(adapter.validate_python([row._asdict() for row in rows]))
+    return Response(body, media_type="application/json")
+
 router = APIRouter(
     prefix="/accounts",
     tags=["accounts"],
-    dependencies=[Depends(get_current_user)]  
+    dependencies=[Depends(get_current_user)],
+    route_class=ROUTE_CLASS
 )
 
 # --- CREATE ---
-@router.post("", status_code=status.HTTP_201_CREATED)
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=AccountResponse)
 async def create_account(
     account: AccountCreate,
     account_service: AccountService = Depends(get_account_service),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_service: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Rota para criar uma conta"""
+    """
+    Rota para criar uma conta.
+    Com o header Idempotency-Key, repetições da mesma requisição
+    retornam a resposta original sem criar a conta novamente; uma
+    repetição enquanto a original ainda executa recebe 409.
+    """
     try:
-        return await account_service.create_account(account, current_user.id)
-    except HTTPException as e:
-        raise e
-    
+        if not idempotency_key:
+            return await account_service.create_account(account, current_user.id)
+
+        scope = f"POST /accounts:user:{current_user.id}"
+        request_hash = hash_payload(account)
+        cached = await idempotency_service.claim(scope, idempotency_key, request_hash)
+        if cached:
+            status_code, body = cached
+            return JSONResponse(content=body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+        try:
+            created = await account_service.create_account(account, current_user.id)
+        except Exception:
+            await idempotency_service.release(scope, idempotency_key)
+            raise
+        content = await idempotency_service.save_response(
+            scope, idempotency_key, request_hash, status.HTTP_201_CREATED,
+            AccountResponse.model_validate(created)
+        )
+        return JSONResponse(content=content, status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         logger.error(f"Erro de validação: {str(e)}")
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
-        
-    except Exception as e:
-        logger.critical("Erro interno ao criar conta:", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro inesperado: {str(e)}"
-        )
 
 # --- UPDATE ---
 @router.patch("/{account_id}")
@@ -48,18 +113,15 @@ async def update_account(
     account_service: AccountService = Depends(get_account_service)
 ):
     """Rota para atualizar uma conta"""
-    try:
-        # Verifica se a conta pertence ao usuário
-        if not await account_service.is_owner(account_id, current_user.id):
-            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Conta não é sua")
-
-        result, message, data = await account_service.update_account(account_id, update_data)
-        if not result:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=message)
-        
-        return {"message": message, "data": data}
-    except Exception:
-        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # Verifica se a conta pertence ao usuário
+    if not await account_service.is_owner(account_id, current_user.id):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Conta não é sua")
+
+    result, message, data = await account_service.update_account(account_id, update_data)
+    if not result:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=message)
+
+    return {"message": message, "data": AccountResponse.model_validate(data)}
 
 # --- DELETE ---
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -69,49 +131,201 @@ async def delete_account(
     current_user: User = Depends(get_current_user)  
 ):
     """Rota para deletar uma conta"""
-    try:
-        # Verifica ownership antes de deletar
-        if not await account_service.is_owner(account_id, current_user.id):
-            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Conta não é sua")
-
-        success, message = await account_service.delete_account(account_id, current_user.id)
-        if not success:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Falha ao deletar")
-        
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-    
-    except HTTPException:
-        # Re-lançar exceções HTTP já tratadas
-        raise
-        
-    except Exception as e:
-        logger.critical("Erro crítico na exclusão:", exc_info=True)
-        raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro interno no processamento"
-            )
-    
+    # Verifica ownership antes de deletar
+    if not await account_service.is_owner(account_id, current_user.id):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Conta não é sua")
+
+    success, message = await account_service.delete_account(account_id, current_user.id)
+    if not success:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Falha ao deletar")
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 
-@router.get("")
+@router.get("", response_model=List[AccountResponse])
 async def list_accounts_user(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     account_service: AccountService = Depends(get_account_service),
     current_user: User = Depends(get_current_user)
 ):
-    """Rota para listar contas de um usuário"""
-    try:  
-        accounts = await account_service.list_accounts(current_user.id)
-        
-        if not accounts:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhuma conta encontrada para este usuário"
-            )
-        return accounts
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        logging.error(f"Erro inesperado ao listar contas: {str(e)}")
+    """Rota para listar contas de um usuário (com ?fields=, só as colunas pedidas são lidas)"""
+    selected = _parse_fields(fields, ACCOUNT_FIELDS)
+    accounts = await account_service.list_accounts(current_user.id, selected)
+
+    if not accounts:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro inesperado ao listar contas"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhuma conta encontrada para este usuário"
+        )
+    if selected:
+        return _sparse_list_response(accounts, selected)
+    return accounts
+
+
+# --- SUMMARY ---
+@router.get("/summary", response_model=AccountSummary)
+async def get_accounts_summary(
+    account_service: AccountService = Depends(get_account_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota com o resumo financeiro (saldo, limites e patrimônio líquido) do usuário"""
+    return await account_service.get_summary(current_user.id)
+
+# --- SEARCH ---
+@router.get("/search", response_model=TransactionSearchPage)
+async def search_transactions(
+    q: str = Query(..., min_length=2, max_length=100, description="Descrição ou estabelecimento"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor retornado na página anterior"),
+    sort: SearchSort = Query(
+        SearchSort.RELEVANCE,
+        description="relevance (padrão) ou recent (mais recentes primeiro; mais rápido em históricos grandes)",
+    ),
+    transaction_service: TransactionService = Depends(get_transaction_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para buscar no histórico das contas por descrição (por relevância ou mais recentes)"""
+    return await transaction_service.search(current_user.id, q, limit, cursor, sort)
+
+# --- IMPORT ---
+@router.post(
+    "/{account_id}/transactions/import",
+    status_code=status.HTTP_201_CREATED,
+    response_model=TransactionImportResult,
+)
+async def import_transactions(
+    account_id: int,
+    transactions: List[TransactionImport],
+    transaction_service: TransactionService = Depends(get_transaction_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para importar um extrato, categorizando as transações pelas regras do usuário"""
+    if len(transactions) > 10_000:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Máximo de 10000 transações por importação")
+    return await transaction_service.import_transactions(account_id, current_user.id, transactions)
+
+# --- EVENTS (SSE) ---
+async def _account_event_stream(request: Request, user_id: int):
+    subscription = event_bus.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        event_bus.unsubscribe(subscription)
+
+@router.get("/events")
+async def account_events(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rota SSE que envia as alterações das contas do usuário em tempo real
+    (account.created, account.updated, account.deleted, balances.changed).
+    Ao receber "resync", o cliente deve recarregar a lista de contas.
+    """
+    return StreamingResponse(
+        _account_event_stream(request, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- EXPORT ---
+def _export_response(
+    export_service: ExportService,
+    export_format: ExportFormat,
+    user: Optional[User],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    return _stream_export(
+        export_service.export_accounts(
+            export_format,
+            user_id=user.id if user else None,
+            shard=getattr(user, "shard", None),
+            start=start,
+            end=end,
+            fields=_parse_fields(fields, ACCOUNT_EXPORT_FIELDS),
+        ),
+        export_format,
+        "accounts",
+    )
+
+def _stream_export(chunks, export_format: ExportFormat, name: str) -> StreamingResponse:
+    filename = f"{name}.{export_format.value}"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/export")
+async def export_accounts(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    start: Optional[datetime] = Query(None, description="Contas criadas a partir de (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Contas criadas antes de (exclusive)"),
+    fields: Optional[str] = Query(None, description="Colunas exportadas separadas por vírgula; padrão: todas"),
+    export_service: ExportService = Depends(get_export_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para exportar (streaming CSV/NDJSON) as contas do usuário"""
+    return _export_response(export_service, export_format, current_user, start, end, fields)
+
+@router.get("/export/all")
+async def export_all_accounts(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    start: Optional[datetime] = Query(None, description="Contas criadas a partir de (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Contas criadas antes de (exclusive)"),
+    fields: Optional[str] = Query(None, description="Colunas exportadas separadas por vírgula; padrão: todas"),
+    export_service: ExportService = Depends(get_export_service),
+    admin: User = Depends(get_current_admin)
+):
+    """Rota administrativa para exportar as contas de todos os usuários"""
+    return _export_response(export_service, export_format, None, start, end, fields)
+
+@router.get("/export/transactions")
+async def export_transactions(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    start: Optional[datetime] = Query(None, description="Transações a partir de (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Transações antes de (exclusive)"),
+    export_service: ExportService = Depends(get_export_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para exportar (streaming CSV/NDJSON) o histórico de transações do usuário"""
+    return _stream_export(
+        export_service.export_transactions(
+            export_format,
+            user_id=current_user.id,
+            shard=getattr(current_user, "shard", None),
+            start=start,
+            end=end,
+        ),
+        export_format,
+        "transactions",
+    )
+
+# --- DETAIL ---
+# Declarada por último para não capturar /summary, /search, /events e /export
+@router.get("/{account_id}", response_model=AccountResponse)
+async def get_account(
+    account_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    account_service: AccountService = Depends(get_account_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para consultar uma conta do usuário (com ?fields=, só as colunas pedidas são lidas)"""
+    selected = _parse_fields(fields, ACCOUNT_FIELDS)
+    account = await account_service.get_account(account_id, current_user.id, selected)
+    if account is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Conta não encontrada")
+    if selected:
+        return _sparse_response(account, selected)
+    return account
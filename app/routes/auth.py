@@ -6,7 +6,8 @@ from ..schemas.token_schema import Token, LoginRequest
 from ..services.user_service import UserService
 from dependencies.user import get_user_service
 from ..utils.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-router = APIRouter(tags=["auth"])
+from ..middleware.profiling import ROUTE_CLASS
+router = APIRouter(tags=["auth"], route_class=ROUTE_CLASS)
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
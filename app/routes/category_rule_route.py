@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from app.services.category_rule_service import CategoryRuleService
+from app.schemas.category_rule_schema import CategoryRuleCreate, CategoryRuleResponse
+from dependencies.transaction import get_category_rule_service
+from dependencies.auth import get_current_user
+from app.models.user_model import User
+from typing import List
+from app.middleware.profiling import ROUTE_CLASS
+
+router = APIRouter(
+    prefix="/rules",
+    tags=["rules"],
+    dependencies=[Depends(get_current_user)],
+    route_class=ROUTE_CLASS
+)
+
+# --- CREATE ---
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=CategoryRuleResponse)
+async def create_rule(
+    rule: CategoryRuleCreate,
+    rule_service: CategoryRuleService = Depends(get_category_rule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para criar uma regra de categorização automática"""
+    return await rule_service.create_rule(rule, current_user.id)
+
+# --- LIST ---
+@router.get("", response_model=List[CategoryRuleResponse])
+async def list_rules(
+    rule_service: CategoryRuleService = Depends(get_category_rule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para listar as regras do usuário (por prioridade)"""
+    return await rule_service.list_rules(current_user.id)
+
+# --- DELETE ---
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: int,
+    rule_service: CategoryRuleService = Depends(get_category_rule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para remover uma regra"""
+    success, message = await rule_service.delete_rule(rule_id, current_user.id)
+    if not success:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=message)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
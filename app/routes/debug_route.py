@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from app.middleware.profiling import get_profile_report
+from dependencies.auth import get_current_admin
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(get_current_admin)]
+)
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Rota administrativa para baixar o relatório de profiling de uma requisição (X-Profile-Id)"""
+    report = get_profile_report(profile_id)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relatório de profiling não encontrado ou expirado",
+        )
+    return JSONResponse(
+        content=report,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.json"'},
+    )
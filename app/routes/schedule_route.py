@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from app.services.schedule_service import ScheduleService
+from app.schemas.schedule_schema import ScheduleCreate, ScheduleResponse
+from dependencies.schedule import get_schedule_service
+from dependencies.auth import get_current_user
+from app.models.user_model import User
+from typing import List
+from app.middleware.profiling import ROUTE_CLASS
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/schedules",
+    tags=["schedules"],
+    dependencies=[Depends(get_current_user)],
+    route_class=ROUTE_CLASS
+)
+
+# --- CREATE ---
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=ScheduleResponse)
+async def create_schedule(
+    schedule: ScheduleCreate,
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para agendar um débito/crédito (único ou recorrente) em uma conta"""
+    return await schedule_service.create_schedule(schedule, current_user.id)
+
+# --- LIST ---
+@router.get("", response_model=List[ScheduleResponse])
+async def list_schedules(
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para listar os agendamentos do usuário"""
+    return await schedule_service.list_schedules(current_user.id)
+
+# --- DELETE ---
+@router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule(
+    schedule_id: int,
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Rota para cancelar um agendamento"""
+    success, message = await schedule_service.delete_schedule(schedule_id, current_user.id)
+    if not success:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=message)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
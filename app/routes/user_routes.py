@@ -1,22 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.user_schema import UserCreate, UserResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import JSONResponse
+from app.schemas.user_schema import UserCreate, UserResponse, UserDashboard
+from app.models.user_model import User
 from app.services.user_service import UserService
+from app.services.account_service import AccountService
+from app.services.idempotency_service import IdempotencyService, hash_payload
 from dependencies.user import get_user_service
+from dependencies.account import get_dashboard_account_service
+from dependencies.idempotency import get_idempotency_service
+from dependencies.auth import get_current_user_with_accounts
+from typing import Optional
+from app.middleware.profiling import ROUTE_CLASS
 
-router = APIRouter()
+router = APIRouter(route_class=ROUTE_CLASS)
 
 @router.post("/users/", response_model=UserResponse)
 async def create_user(
     user: UserCreate,
-    user_service: UserService = Depends(get_user_service)  # Injeção do UserService
+    user_service: UserService = Depends(get_user_service),  # Injeção do UserService
+    idempotency_service: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Rota para criar um novo usuário."""
+    """
+    Rota para criar um novo usuário.
+    Com o header Idempotency-Key, repetições retornam a resposta original
+    sem repetir as verificações nem o hash da senha (409 enquanto a
+    requisição original ainda executa).
+    """
     try:
-        return await user_service.create_user(user) 
+        if not idempotency_key:
+            return await user_service.create_user(user)
+
+        scope = "POST /users/"
+        request_hash = hash_payload(user)
+        cached = await idempotency_service.claim(scope, idempotency_key, request_hash)
+        if cached:
+            status_code, body = cached
+            return JSONResponse(content=body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+        try:
+            db_user = await user_service.create_user(user)
+        except Exception:
+            await idempotency_service.release(scope, idempotency_key)
+            raise
+        content = await idempotency_service.save_response(
+            scope, idempotency_key, request_hash, 200, UserResponse.model_validate(db_user)
+        )
+        return JSONResponse(content=content)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
+# Declarada antes de /users/{username} para "me" não ser tratado como username
+@router.get("/users/me", response_model=UserDashboard)
+async def read_current_user(
+    include_summary: bool = Query(False, description="Inclui o resumo financeiro das contas"),
+    current_user: User = Depends(get_current_user_with_accounts),
+    user_service: UserService = Depends(get_user_service),
+    account_service: AccountService = Depends(get_dashboard_account_service)
+):
+    """
+    Rota com os dados de início do cliente: usuário autenticado e suas contas,
+    carregados na mesma busca da autenticação. O resumo (opcional) é o mesmo
+    de GET /accounts/summary, mantido em cache.
+    """
+    summary = await account_service.get_summary(current_user.id) if include_summary else None
+    return user_service.get_dashboard(current_user, summary)
+
+
 @router.get("/users/{username}", response_model=UserResponse)
 async def read_user(
     username: str,
@@ -1,12 +1,17 @@
-from pydantic import BaseModel, Field, field_validator, model_validator
-from decimal import Decimal
-from typing import Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model, field_validator, model_validator
+from typing import List, Literal, Optional, Sequence, Tuple, Type
+from functools import lru_cache
 from enum import Enum
+from app.schemas.money import Money, Cents
 
 class AccountType(str, Enum):
     DEBIT = "DEBIT"
     CREDIT = "CREDIT"
 
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
 class AccountCreate(BaseModel):
     """
     Schema para criação de contas bancárias.
@@ -18,13 +23,15 @@ class AccountCreate(BaseModel):
     Campos condicionais:
     - credit_limit: Obrigatório para contas de crédito
     - due_day: Obrigatório para contas de crédito (1-31)
+
+    Valores monetários são recebidos em reais e convertidos para centavos.
     """
     name: str = Field(..., min_length=2, max_length=50, example="Conta Corrente")
     is_credit: bool = Field(
         False,
         description="Define se é conta de crédito (default=False)"
     )
-    credit_limit: Optional[Decimal] = Field(
+    credit_limit: Optional[Money] = Field(
         None,
         description="Limite de crédito (obrigatório para contas de crédito)"
     )
@@ -34,7 +41,7 @@ class AccountCreate(BaseModel):
         le=31,
         description="Dia de vencimento (1-31, obrigatório para contas de crédito)"
     )
-    balance: Optional[Decimal] = Field(
+    balance: Optional[Money] = Field(
         None,
         description = "Saldo da Conta"
     )
@@ -58,11 +65,70 @@ class AccountResponse(BaseModel):
     id: int = Field(..., example=1)
     name: str = Field(..., example="Conta Corrente")
     is_credit: bool = Field(..., example=False)
-    balance: Decimal = Field(..., example=1000.50)
+    balance: Optional[Cents] = Field(None, example=1000.50)
     user_id: int = Field(..., example=1)
-    credit_limit: Optional[Decimal] = Field(None, example=5000.00)
+    credit_limit: Optional[Cents] = Field(None, example=5000.00)
     due_day: Optional[int] = Field(None, example=10)
 
+    class Config:
+        from_attributes = True  # Permite conversão de ORM para Pydantic
+
+# Campos que podem ser pedidos em ?fields= na listagem e no detalhe
+ACCOUNT_FIELDS: Tuple[str, ...] = tuple(AccountResponse.model_fields)
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Converte "id,name,balance" na tupla de campos pedidos, na ordem de `allowed`
+    (None = todos os campos). Campos desconhecidos geram ValueError.
+    """
+    if not value:
+        return None
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(
+            f"Campos inválidos: {', '.join(sorted(unknown))}. Disponíveis: {', '.join(allowed)}"
+        )
+    if not requested:
+        return None
+    return tuple(field for field in allowed if field in requested)
+
+
+@lru_cache(maxsize=128)
+def sparse_account_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """AccountResponse só com os campos pedidos (mesmos tipos e serialização)"""
+    return create_model(
+        "SparseAccountResponse",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (AccountResponse.model_fields[name].annotation, AccountResponse.model_fields[name])
+            for name in fields
+        },
+    )
+
+
+@lru_cache(maxsize=128)
+def sparse_account_list(fields: Tuple[str, ...]) -> TypeAdapter:
+    """Validação/serialização de listas de sparse_account_model em uma única passada"""
+    return TypeAdapter(List[sparse_account_model(fields)])
+
+class AccountSummary(BaseModel):
+    """
+    Resumo financeiro de um usuário:
+    - total_balance: soma dos saldos das contas de débito
+    - total_credit_limit: soma dos limites das contas de crédito
+    - used_credit_limit: saldo devedor dos cartões (compras - pagamentos no histórico)
+    - available_credit_limit: limite total - limite utilizado
+    - net_worth: saldo total - limite utilizado
+    """
+    account_count: int = Field(..., example=3)
+    total_balance: Cents = Field(..., example=1500.00)
+    total_credit_limit: Cents = Field(..., example=5000.00)
+    used_credit_limit: Cents = Field(..., example=1200.00)
+    available_credit_limit: Cents = Field(..., example=3800.00)
+    net_worth: Cents = Field(..., example=300.00)
+
 class AccountUpdate(BaseModel):
     """
     Schema para atualização de contas bancárias com validações condicionais
@@ -77,12 +143,12 @@ class AccountUpdate(BaseModel):
         None,
         description="Define se é conta de crédito (True/False)"
     )
-    balance: Optional[Decimal] = Field(
+    balance: Optional[Money] = Field(
         None,
         gt=0,
         description="Novo saldo (apenas para contas débito)"
     )
-    credit_limit: Optional[Decimal] = Field(
+    credit_limit: Optional[Money] = Field(
         None,
         ge=0,
         description="Novo limite (apenas para contas crédito)"
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime
+from typing import Literal, Optional
+from app.schemas.money import Money, Cents
+from app.utils.rule_engine import validate_pattern
+
+class CategoryRuleCreate(BaseModel):
+    """
+    Schema para criação de regras de categorização.
+
+    - match_type/pattern: texto procurado na descrição (substring ou regex)
+    - min_amount/max_amount: faixa de valor em reais (negativo = débito)
+    - account_id: restringe a regra a uma conta
+    Pelo menos um critério deve ser informado.
+    """
+    category: str = Field(..., min_length=1, max_length=50, example="Transporte")
+    priority: int = Field(100, ge=0, le=10_000, description="Menor valor = maior prioridade")
+    match_type: Literal["substring", "regex"] = "substring"
+    pattern: Optional[str] = Field(None, min_length=1, max_length=255, example="uber")
+    min_amount: Optional[Money] = None
+    max_amount: Optional[Money] = None
+    account_id: Optional[int] = None
+
+    @model_validator(mode='after')
+    def validate_rule(self):
+        if self.pattern is None and self.min_amount is None \
+                and self.max_amount is None and self.account_id is None:
+            raise ValueError("Informe ao menos um critério (texto, valor ou conta)")
+        if self.min_amount is not None and self.max_amount is not None \
+                and self.min_amount > self.max_amount:
+            raise ValueError("O valor mínimo não pode ser maior que o máximo")
+        validate_pattern(self.match_type, self.pattern)
+        return self
+
+class CategoryRuleResponse(BaseModel):
+    id: int
+    category: str
+    priority: int
+    match_type: str
+    pattern: Optional[str] = None
+    min_amount: Optional[Cents] = None
+    max_amount: Optional[Cents] = None
+    account_id: Optional[int] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True  # Permite conversão de ORM para Pydantic
@@ -0,0 +1,18 @@
+from pydantic import BeforeValidator, PlainSerializer, WithJsonSchema
+from typing import Annotated
+from app.utils.money import to_cents, cents_to_float
+
+# Valor recebido na API em reais (ex.: 10.50) e convertido para centavos
+Money = Annotated[
+    int,
+    BeforeValidator(to_cents),
+    PlainSerializer(cents_to_float, return_type=float, when_used="json"),
+    WithJsonSchema({"type": "number", "format": "decimal", "example": 10.50}),
+]
+
+# Valor já em centavos (ex.: vindo do banco) e exposto em reais no JSON
+Cents = Annotated[
+    int,
+    PlainSerializer(cents_to_float, return_type=float, when_used="json"),
+    WithJsonSchema({"type": "number", "format": "decimal", "example": 10.50}),
+]
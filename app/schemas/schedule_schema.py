@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Optional
+from app.schemas.money import Money, Cents
+
+class ScheduleCreate(BaseModel):
+    """
+    Schema para criação de transferências agendadas/recorrentes.
+
+    - amount: valor positivo credita a conta, negativo debita
+    - first_run_at: data/hora (UTC) da primeira execução
+    - interval_days: recorrência em dias (vazio = execução única)
+    """
+    account_id: int = Field(..., example=1)
+    amount: Money = Field(..., example=-150.00, description="Valor (negativo = débito)")
+    description: Optional[str] = Field(None, max_length=100, example="Aluguel")
+    first_run_at: datetime = Field(..., description="Data/hora da primeira execução (UTC)")
+    interval_days: Optional[int] = Field(None, ge=1, le=366, example=30)
+
+    @field_validator('amount')
+    def validate_amount(cls, v):
+        if v == 0:
+            raise ValueError("O valor agendado não pode ser zero")
+        return v
+
+class ScheduleResponse(BaseModel):
+    id: int
+    account_id: int
+    amount: Cents
+    description: Optional[str] = None
+    interval_days: Optional[int] = None
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True  # Permite conversão de ORM para Pydantic
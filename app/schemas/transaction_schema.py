@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from app.schemas.money import Money, Cents
+
+class SearchSort(str, Enum):
+    RELEVANCE = "relevance"  # por relevância (ordena todos os resultados a cada página)
+    RECENT = "recent"        # mais recentes primeiro (na ordem do índice)
+
+class TransactionResponse(BaseModel):
+    id: int
+    account_id: int
+    description: str
+    amount: Cents = Field(..., example=-42.90)
+    occurred_at: datetime
+    category: Optional[str] = None
+
+    class Config:
+        from_attributes = True  # Permite conversão de ORM para Pydantic
+
+class TransactionImport(BaseModel):
+    """Transação de um extrato importado (valor em reais, negativo = débito)"""
+    description: str = Field(..., min_length=1, max_length=255, example="UBER *TRIP")
+    amount: Money = Field(..., example=-23.90)
+    occurred_at: datetime
+
+class TransactionImportResult(BaseModel):
+    imported: int
+    categorized: int
+
+class TransactionSearchResult(TransactionResponse):
+    rank: float = Field(..., description="Relevância do resultado")
+
+class TransactionSearchPage(BaseModel):
+    """
+    Página de resultados da busca.
+    - next_cursor: enviar em `cursor` para buscar a próxima página (nulo na última)
+    """
+    items: List[TransactionSearchResult]
+    next_cursor: Optional[str] = None
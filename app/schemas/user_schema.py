@@ -1,4 +1,6 @@
 from pydantic import BaseModel, EmailStr, SecretStr
+from typing import List, Optional
+from app.schemas.account_schema import AccountResponse, AccountSummary
 
 # Schema de entrada (API → Service)
 class UserCreate(BaseModel):
@@ -13,4 +15,9 @@ class UserResponse(BaseModel):
     email: EmailStr
 
     class Config:
-        from_attributes = True  # Permite conversão de ORM para Pydantic
\ No newline at end of file
+        from_attributes = True  # Permite conversão de ORM para Pydantic
+
+# Resposta de GET /users/me: usuário, contas e (opcionalmente) o resumo financeiro
+class UserDashboard(UserResponse):
+    accounts: List[AccountResponse] = []
+    summary: Optional[AccountSummary] = None
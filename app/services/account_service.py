@@ -1,15 +1,56 @@
-from decimal import Decimal, InvalidOperation
 from fastapi import HTTPException, status
 from typing import Optional, Tuple, Dict, Any, List
-from app.schemas.account_schema import AccountCreate, AccountUpdate, AccountResponse
+from app.schemas.account_schema import AccountCreate, AccountUpdate, AccountResponse, AccountSummary
 from app.models.account_model import Account
 from app.repositories.account_repository import AccountRepository
-from decimal import Decimal, InvalidOperation
+from app.utils.cache import TTLCache
+from app.services.event_bus import event_bus
+from app.services.audit_log import audit_log
 from sqlalchemy.exc import IntegrityError
 
+import itertools
 import logging
+import os
 
 logger = logging.getLogger(__name__)
+
+# Cache por usuário do resumo financeiro. É invalidado nas escritas deste processo;
+# o TTL limita o tempo de defasagem para escritas feitas por outros workers.
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 60))
+_summary_cache = TTLCache(maxsize=50_000, ttl=SUMMARY_CACHE_TTL_SECONDS)
+# Geração do resumo por usuário, trocada a cada invalidação: uma leitura que
+# consultou o banco antes de uma escrita não grava o resultado (já defasado) no cache
+_summary_generations = TTLCache(maxsize=50_000, ttl=SUMMARY_CACHE_TTL_SECONDS)
+_next_generation = itertools.count(1)
+
+
+def invalidate_summary(user_id: int) -> None:
+    """Descarta o resumo em cache de um usuário"""
+    _summary_generations.set(user_id, next(_next_generation))
+    _summary_cache.delete(user_id)
+
+
+async def publish_account_event(user_id: int, event_type: str, **data) -> None:
+    """Publica uma alteração de conta para as conexões SSE do usuário"""
+    await event_bus.publish(user_id, {"type": event_type, **data})
+
+
+def _build_summary(totals: Dict[str, int]) -> AccountSummary:
+    return AccountSummary(
+        **totals,
+        available_credit_limit=totals["total_credit_limit"] - totals["used_credit_limit"],
+        net_worth=totals["total_balance"] - totals["used_credit_limit"],
+    )
+
+
+def _account_payload(account: Account) -> dict:
+    return AccountResponse.model_validate(account).model_dump(mode="json")
+
+
+def _audit_snapshot(account: Account) -> dict:
+    # Valores monetários em centavos, como no banco
+    return AccountResponse.model_validate(account).model_dump()
+
 class AccountService:
     def __init__(self, account_repository: AccountRepository):
         self.repository = account_repository
@@ -40,11 +81,6 @@ class AccountService:
                 
                 if account_data.due_day is None or not (1 <= account_data.due_day <= 31):
                     raise ValueError("Contas de crédito requerem data de vencimento e seu valor deve ser entre 1 e 31")
-                
-                try:
-                    Decimal(str(account_data.credit_limit))
-                except InvalidOperation:
-                    raise ValueError("Formato inválido para limite de crédito")
             
             #validação de campos para débito
             else:
@@ -55,7 +91,11 @@ class AccountService:
                     raise ValueError("Contas de débito precisam do campo balance")
 
            
-            return await self.repository.create(account_dict)
+            account = await self.repository.create(account_dict)
+            invalidate_summary(user_id)
+            await audit_log.record("account.created", user_id, account.id, after=_audit_snapshot(account))
+            await publish_account_event(user_id, "account.created", account=_account_payload(account))
+            return account
 
         except ValueError as ve:
             logger.warning(f"Validação falhou: {str(ve)}")
@@ -71,13 +111,6 @@ class AccountService:
                 detail="Já existe uma conta com este nome"
             )
 
-        except Exception as e:
-            logger.error(f"Erro inesperado: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro ao processar solicitação"
-            )
-
 
     async def update_account(
         self,
@@ -100,11 +133,6 @@ class AccountService:
                 
                 if update_data.due_day is None or not (1 <= update_data.due_day <= 31):
                     raise ValueError("Contas de crédito requerem data de vencimento e seu valor deve ser entre 1 e 31")
-                
-                try:
-                    Decimal(str(update_data.credit_limit))
-                except InvalidOperation:
-                    raise ValueError("Formato inválido para limite de crédito")
             
             #validação de campos para débito
             else:
@@ -113,13 +141,23 @@ class AccountService:
 
                 if update_data.balance is None:
                     raise ValueError("Contas de débito precisam do campo balance")
-                
+
+            # A sessão devolve a mesma instância: o estado anterior é copiado antes do update
+            before = _audit_snapshot(account)
             updated_account = await self.repository.update(account_id, update_data)
+            invalidate_summary(account.user_id)
+            await audit_log.record(
+                "account.updated", account.user_id, account_id,
+                before=before, after=_audit_snapshot(updated_account)
+            )
+            await publish_account_event(
+                account.user_id, "account.updated", account=_account_payload(updated_account)
+            )
             return True, "Conta atualizada com sucesso", updated_account
         except ValueError as e:
             return False, f"Erro de validação: {str(e)}", None
     
-        except Exception as e:
+        except IntegrityError as e:
             return False, f"Erro ao atualizar conta: {str(e)}", None
 
 
@@ -132,9 +170,13 @@ class AccountService:
             return False, "Conta não encontrada ou não pertence ao usuário"
 
         try:
+            before = _audit_snapshot(account)
             await self.repository.delete(account_id)
+            invalidate_summary(user_id)
+            await audit_log.record("account.deleted", user_id, account_id, before=before)
+            await publish_account_event(user_id, "account.deleted", account_id=account_id)
             return True, "Conta excluída com sucesso"
-        except Exception as e:
+        except IntegrityError as e:
             return False, f"Erro ao excluir conta: {str(e)}"
         
 
@@ -144,12 +186,31 @@ class AccountService:
         return account is not None
     
 
-    async def list_accounts(self, user_id: int) -> List[Account]:
+    async def get_account(
+        self, account_id: int, user_id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Account]:
+        """Retorna uma conta do usuário (só os campos pedidos, se informados)"""
+        return await self.repository.get_fields_by_id_and_user(account_id, user_id, fields)
+
+    async def list_accounts(self, user_id: int, fields: Optional[Tuple[str, ...]] = None) -> List[Account]:
         try:
-            accounts = await self.repository.get_all_by_user(user_id)
+            accounts = await self.repository.get_all_by_user(user_id, fields)
             if not accounts:
                 logging.warning(f"Nenhuma conta encontrada para o usuário {user_id}")
             return accounts
         except Exception as e:
             logging.error(f"Erro ao listar contas para o usuário {user_id}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_summary(self, user_id: int) -> AccountSummary:
+        """Retorna o resumo financeiro do usuário (calculado no banco e mantido em cache)"""
+        summary = _summary_cache.get(user_id)
+        if summary is not None:
+            return summary
+
+        generation = _summary_generations.get(user_id)
+        totals = await self.repository.get_summary(user_id)
+        summary = _build_summary(totals)
+        if _summary_generations.get(user_id) == generation:
+            _summary_cache.set(user_id, summary)
+        return summary
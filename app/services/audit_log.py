@@ -0,0 +1,216 @@
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+from app.repositories.audit_repository import AuditRepository
+from database.database import shard_router
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", 10_000))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", 1))
+# Tempo máximo que uma requisição espera por espaço na fila cheia
+AUDIT_PUT_TIMEOUT_SECONDS = float(os.getenv("AUDIT_PUT_TIMEOUT_SECONDS", 0.5))
+# Tentativas de gravar um mesmo lote antes de desistir dele (vai para o dead letter)
+AUDIT_MAX_ATTEMPTS = int(os.getenv("AUDIT_MAX_ATTEMPTS", 3))
+# Arquivo NDJSON com os eventos que não puderam ser gravados no banco (um por linha,
+# com as colunas de account_audit_log), para reprocessamento posterior
+AUDIT_DEAD_LETTER_PATH = os.getenv("AUDIT_DEAD_LETTER_PATH", "audit_dead_letter.ndjson")
+
+Sink = Callable[[List[dict]], Awaitable[None]]
+
+
+async def _insert_events(events: List[dict]) -> None:
+    # A trilha de auditoria fica no shard padrão, como as chaves de idempotência
+    async with shard_router.session() as session:
+        await AuditRepository(session).bulk_create(events)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _append(path: str, lines: str) -> None:
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(lines)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class AuditLogWriter:
+    """
+    Gravação em segundo plano (write-behind) da trilha de auditoria das contas.
+
+    - `record` apenas enfileira o evento; a requisição não espera o INSERT
+    - Uma task grava os eventos em lotes de até `batch_size`, a cada
+      `flush_interval` segundos ou assim que a fila atinge `batch_size`
+    - Com a fila cheia, `record` espera até `put_timeout` segundos por espaço;
+      se o gravador não acompanhar, o evento é gravado diretamente (nunca descartado)
+    - Um lote que falha `max_attempts` vezes seguidas vai para o arquivo de dead
+      letter (`dead_letter_path`), para não travar a fila atrás dele
+    - `stop` grava tudo o que estiver pendente (encerramento da aplicação)
+    """
+
+    def __init__(
+        self,
+        sink: Optional[Sink] = None,
+        maxsize: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        put_timeout: float = AUDIT_PUT_TIMEOUT_SECONDS,
+        max_attempts: int = AUDIT_MAX_ATTEMPTS,
+        dead_letter_path: str = AUDIT_DEAD_LETTER_PATH,
+    ):
+        self.sink = sink or _insert_events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        # Lote retirado da fila cuja gravação falhou (é tentado de novo no próximo ciclo)
+        self._pending: List[dict] = []
+        self._attempts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def record(
+        self,
+        action: str,
+        user_id: int,
+        account_id: int,
+        before: Optional[dict] = None,
+        after: Optional[dict] = None,
+    ) -> None:
+        """Registra uma alteração de conta na trilha de auditoria"""
+        event = {
+            "action": action,
+            "user_id": user_id,
+            "account_id": account_id,
+            "before": before,
+            "after": after,
+            "occurred_at": datetime.utcnow(),
+        }
+        if not self.running:
+            # Fora da aplicação (scripts, CLI): grava de forma síncrona
+            await self._write_direct([event])
+            return
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._flush_now.set()
+            try:
+                await asyncio.wait_for(self._queue.put(event), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Fila de auditoria cheia; gravando o evento diretamente")
+                await self._write_direct([event])
+                return
+
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_now.set()
+
+    def _drain(self) -> List[dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def flush(self) -> int:
+        """Grava todos os eventos enfileirados, em lotes de `batch_size`"""
+        written = 0
+        async with self._flush_lock:
+            while self._pending or not self._queue.empty():
+                if not self._pending:
+                    self._pending = self._drain()
+                    self._attempts = 0
+                try:
+                    await self.sink(self._pending)
+                except Exception:
+                    self._attempts += 1
+                    if self._attempts < self.max_attempts:
+                        raise
+                    logger.error(f"Lote de auditoria falhou {self._attempts} vezes; desistindo do lote")
+                    await self._write_direct(self._pending)
+                written += len(self._pending)
+                self._pending = []
+        return written
+
+    async def _write_direct(self, events: List[dict]) -> None:
+        try:
+            await self.sink(events)
+        except Exception:
+            logger.error(
+                f"Falha ao gravar {len(events)} eventos de auditoria; enviando para {self.dead_letter_path}",
+                exc_info=True,
+            )
+            await self._dead_letter(events)
+
+    async def _dead_letter(self, events: List[dict]) -> None:
+        lines = "".join(json.dumps(event, default=_json_default) + "\n" for event in events)
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _append, self.dead_letter_path, lines)
+        except Exception:
+            # Último recurso: o evento vai para o log em vez de ser perdido
+            logger.error("Falha ao gravar auditoria: %s", lines, exc_info=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao gravar lote de auditoria (nova tentativa no próximo ciclo): {e}")
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe o gravador e grava os eventos pendentes"""
+        if self._task is not None:
+            # Com o lock, um lote em gravação termina antes do cancelamento: cancelar
+            # no meio do INSERT deixaria em _pending um lote possivelmente já gravado
+            async with self._flush_lock:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+
+        events = self._pending + self._drain_all()
+        self._pending = []
+        if events:
+            logger.info(f"Gravando {len(events)} eventos de auditoria pendentes")
+            for start in range(0, len(events), self.batch_size):
+                await self._write_direct(events[start:start + self.batch_size])
+
+    def _drain_all(self) -> List[dict]:
+        events = []
+        while not self._queue.empty():
+            events.append(self._queue.get_nowait())
+        return events
+
+
+audit_log = AuditLogWriter()
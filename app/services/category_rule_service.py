@@ -0,0 +1,86 @@
+from fastapi import HTTPException, status
+from typing import List, Optional, Sequence, Tuple
+from app.schemas.category_rule_schema import CategoryRuleCreate
+from app.models.category_rule_model import CategoryRule
+from app.repositories.category_rule_repository import CategoryRuleRepository
+from app.repositories.account_repository import AccountRepository
+from app.utils.cache import TTLCache
+from app.utils.rule_engine import CompiledRuleSet
+from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Regras compiladas por usuário: (fingerprint, CompiledRuleSet)
+_compiled_rules = TTLCache(maxsize=10_000, ttl=60 * 60)
+
+# Threads que classificam os lotes de importação (até 10 mil linhas, com as regex
+# dos usuários) fora do event loop. Poucas: o trabalho é de CPU e disputa o GIL
+RULES_CLASSIFY_WORKERS = int(os.getenv("RULES_CLASSIFY_WORKERS", 2))
+_classify_executor = ThreadPoolExecutor(max_workers=RULES_CLASSIFY_WORKERS, thread_name_prefix="rules")
+
+class CategoryRuleService:
+    def __init__(self, rule_repository: CategoryRuleRepository, account_repository: AccountRepository):
+        self.repository = rule_repository
+        self.account_repository = account_repository
+
+    async def create_rule(self, rule_data: CategoryRuleCreate, user_id: int) -> CategoryRule:
+        """Cria uma regra, verificando se a conta (quando informada) pertence ao usuário"""
+        if rule_data.account_id is not None:
+            account = await self.account_repository.get_by_id(rule_data.account_id)
+            if not account or account.user_id != user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Conta não encontrada ou não pertence ao usuário"
+                )
+
+        rule_dict = rule_data.model_dump()
+        rule_dict["user_id"] = user_id
+        rule = await self.repository.create(rule_dict)
+        _compiled_rules.delete(user_id)
+        return rule
+
+    async def list_rules(self, user_id: int) -> List[CategoryRule]:
+        return await self.repository.get_all_by_user(user_id)
+
+    async def delete_rule(self, rule_id: int, user_id: int) -> Tuple[bool, str]:
+        """Deleta uma regra com verificações"""
+        rule = await self.repository.get_by_id_and_user(rule_id, user_id)
+        if not rule:
+            return False, "Regra não encontrada ou não pertence ao usuário"
+
+        try:
+            await self.repository.delete(rule_id)
+            _compiled_rules.delete(user_id)
+            return True, "Regra excluída com sucesso"
+        except IntegrityError as e:
+            return False, f"Erro ao excluir regra: {str(e)}"
+
+    async def get_compiled(self, user_id: int) -> CompiledRuleSet:
+        """
+        Retorna as regras compiladas do usuário.
+        Só recompila quando o fingerprint das regras muda (inclusive por outro worker).
+        """
+        fingerprint = await self.repository.get_fingerprint(user_id)
+        cached = _compiled_rules.get(user_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        compiled = CompiledRuleSet(await self.repository.get_all_by_user(user_id))
+        _compiled_rules.set(user_id, (fingerprint, compiled))
+        return compiled
+
+    async def categorize(self, user_id: int, rows: Sequence[dict]) -> List[Optional[str]]:
+        """
+        Classifica um lote de transações em uma única passada, em uma thread:
+        o event loop continua atendendo as outras requisições
+        """
+        compiled = await self.get_compiled(user_id)
+        if not compiled.rules:
+            return [None] * len(rows)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_classify_executor, compiled.classify_batch, rows)
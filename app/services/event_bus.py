@@ -0,0 +1,221 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100))
+EVENT_CHANNEL = "account_events"
+# Espera entre tentativas de reconectar o LISTEN (dobra a cada falha, até o máximo)
+EVENT_RECONNECT_MIN_SECONDS = float(os.getenv("EVENT_RECONNECT_MIN_SECONDS", 1))
+EVENT_RECONNECT_MAX_SECONDS = float(os.getenv("EVENT_RECONNECT_MAX_SECONDS", 30))
+
+# Evento enviado quando a fila de uma conexão enche: o cliente deve recarregar as contas
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Broker(ABC):
+    """
+    Transporte das mensagens entre workers.
+    `publish` envia para todos os workers; cada worker entrega as mensagens
+    recebidas ao callback registrado em `start`. Se a conexão com o transporte
+    cai e volta, mensagens podem ter sido perdidas: o broker chama `on_reconnect`.
+    """
+
+    @abstractmethod
+    async def start(
+        self, deliver: Callable[[dict], None], on_reconnect: Optional[Callable[[], None]] = None
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, message: dict) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+
+class InMemoryBroker(Broker):
+    """Broker de um único processo (desenvolvimento e testes)"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    async def start(
+        self, deliver: Callable[[dict], None], on_reconnect: Optional[Callable[[], None]] = None
+    ) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+class PostgresBroker(Broker):
+    """
+    Broker entre workers usando LISTEN/NOTIFY do próprio Postgres.
+    Se a conexão do LISTEN cai, reconecta em segundo plano (com espera crescente).
+    """
+
+    def __init__(self, dsn: str, channel: str = EVENT_CHANNEL):
+        # asyncpg não entende o prefixo de driver do SQLAlchemy
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self.channel = channel
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._deliver: Optional[Callable[[dict], None]] = None
+        self._on_reconnect: Optional[Callable[[], None]] = None
+        self._closed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        # Chamado pelo asyncpg: uma exceção aqui só apareceria no log do event loop
+        try:
+            message = json.loads(payload)
+            if not isinstance(message, dict) or "user_id" not in message \
+                    or not isinstance(message.get("event"), dict):
+                raise ValueError("formato inesperado")
+        except ValueError as e:
+            logger.warning(f"Notificação de evento inválida descartada ({e}): {payload[:200]!r}")
+            return
+        try:
+            self._deliver(message)
+        except Exception:
+            logger.exception("Erro ao entregar notificação de evento")
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        self._closed.clear()
+        connection.add_termination_listener(lambda _: self._closed.set())
+        await connection.add_listener(self.channel, self._on_notify)
+        self._connection = connection
+
+    async def _reconnect_forever(self) -> None:
+        while True:
+            await self._closed.wait()
+            self._connection = None
+            logger.warning("Conexão de LISTEN dos eventos perdida; reconectando")
+            delay = EVENT_RECONNECT_MIN_SECONDS
+            while self._connection is None:
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                except Exception as e:
+                    logger.warning(f"Falha ao reconectar o LISTEN dos eventos: {e}")
+                    delay = min(delay * 2, EVENT_RECONNECT_MAX_SECONDS)
+            logger.info("LISTEN dos eventos reconectado")
+            if self._on_reconnect is not None:
+                self._on_reconnect()
+
+    async def start(
+        self, deliver: Callable[[dict], None], on_reconnect: Optional[Callable[[], None]] = None
+    ) -> None:
+        self._deliver = deliver
+        self._on_reconnect = on_reconnect
+        await self._connect()
+        self._task = asyncio.create_task(self._reconnect_forever())
+
+    async def publish(self, message: dict) -> None:
+        if self._connection is None:
+            return
+        # NOTIFY aceita payloads de até 8000 bytes; eventos maiores viram "resync"
+        payload = json.dumps(message, default=str)
+        if len(payload.encode()) >= 8000:
+            payload = json.dumps({"user_id": message["user_id"], "event": RESYNC_EVENT})
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class Subscription:
+    """Conexão de um cliente: fila limitada de eventos"""
+
+    def __init__(self, user_id: int, maxsize: int = EVENT_QUEUE_SIZE):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, event: dict) -> None:
+        """
+        Enfileira um evento sem bloquear quem publica.
+        Se o cliente não acompanha o ritmo, descarta os eventos pendentes
+        e envia um único "resync" no lugar.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+
+class EventBus:
+    """Pub/sub assíncrono de eventos de conta por usuário"""
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver, self._resync_all)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    def _deliver(self, message: dict) -> None:
+        for subscription in tuple(self._subscriptions.get(message["user_id"], ())):
+            subscription.push(message["event"])
+
+    def _resync_all(self) -> None:
+        # Eventos podem ter sido perdidos: todos os clientes recarregam as contas
+        for subscriptions in tuple(self._subscriptions.values()):
+            for subscription in tuple(subscriptions):
+                subscription.push(RESYNC_EVENT)
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        """Publica um evento para todas as conexões do usuário (em qualquer worker)"""
+        if not self._subscriptions and isinstance(self.broker, InMemoryBroker):
+            return
+        try:
+            await self.broker.publish({"user_id": user_id, "event": event})
+        except Exception as e:
+            # Notificações são best-effort: a escrita já foi concluída
+            logger.error(f"Erro ao publicar evento para o usuário {user_id}: {e}")
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+
+def _create_broker() -> Broker:
+    if os.getenv("EVENT_BROKER", "memory").lower() == "postgres":
+        from database.database import DATABASE_URL
+        return PostgresBroker(DATABASE_URL)
+    return InMemoryBroker()
+
+
+event_bus = EventBus(_create_broker())
@@ -0,0 +1,145 @@
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.account_schema import ExportFormat
+from app.repositories.account_repository import AccountRepository, EXPORT_COLUMNS
+from app.repositories.transaction_repository import (
+    TransactionRepository,
+    EXPORT_COLUMNS as TRANSACTION_EXPORT_COLUMNS,
+)
+from app.utils.export import to_csv, to_ndjson
+from app.utils.money import cents_to_float
+from database.sharding import ShardRouter
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+TRANSACTION_EXPORT_FIELDS = [column.key for column in TRANSACTION_EXPORT_COLUMNS]
+# Linhas lidas dos shards e ainda não enviadas (exportação administrativa)
+EXPORT_QUEUE_ROWS = int(os.getenv("EXPORT_QUEUE_ROWS", 2_000))
+_DONE = object()
+# Colunas armazenadas em centavos e exportadas em reais
+_MONEY_FIELDS = ("balance", "credit_limit", "amount")
+
+_SERIALIZERS = {
+    ExportFormat.CSV: to_csv,
+    ExportFormat.NDJSON: to_ndjson,
+}
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+# Lê as linhas de um shard a partir da sessão dele
+RowReader = Callable[[AsyncSession], AsyncIterator[Sequence]]
+
+
+async def _money_to_reais(rows: AsyncIterator, fields: Sequence[str]) -> AsyncIterator[list]:
+    # Mesmo número da API JSON (Cents): 15025 -> 150.25
+    money_indexes = [index for index, field in enumerate(fields) if field in _MONEY_FIELDS]
+    async for row in rows:
+        row = list(row)
+        for index in money_indexes:
+            if row[index] is not None:
+                row[index] = cents_to_float(row[index])
+        yield row
+
+class ExportService:
+    """
+    Gera exportações em streaming.
+    Abre a própria sessão, pois o corpo é enviado depois que as
+    dependências da requisição já foram finalizadas.
+    """
+    def __init__(self, router: ShardRouter):
+        self.router = router
+
+    async def _stream_shard(self, shard, read_rows: RowReader, fields) -> AsyncIterator[list]:
+        async with self.router.session(shard) as session:
+            async for row in _money_to_reais(read_rows(session), fields):
+                yield row
+
+    async def _stream_all_shards(self, read_rows: RowReader, fields) -> AsyncIterator[list]:
+        """
+        Exportação administrativa: lê todos os shards concorrentemente (fan_out).
+        A fila limitada mantém a memória constante: um shard mais rápido que o
+        cliente espera. As linhas dos shards chegam intercaladas.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_ROWS)
+
+        async def pump(shard, session):
+            async for row in _money_to_reais(read_rows(session), fields):
+                await queue.put(row)
+
+        async def produce():
+            try:
+                await self.router.fan_out(pump)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(_DONE)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Cliente desconectou ou erro: encerra a leitura dos shards
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _export(
+        self, export_format: ExportFormat, user_id, shard, read_rows: RowReader, fields, what: str
+    ) -> AsyncIterator[str]:
+        serializer = _SERIALIZERS[export_format]
+        try:
+            if user_id is None:
+                rows = self._stream_all_shards(read_rows, fields)
+            else:
+                rows = self._stream_shard(shard, read_rows, fields)
+            async for chunk in serializer(rows, fields):
+                yield chunk
+        except Exception as e:
+            logger.error(f"Erro durante exportação de {what}: {str(e)}", exc_info=True)
+            raise
+
+    def export_accounts(
+        self,
+        export_format: ExportFormat,
+        user_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        shard: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Exporta as contas de um usuário do shard informado (ou de todos, se user_id for None).
+        Com `fields`, só essas colunas são lidas e exportadas (padrão: ACCOUNT_EXPORT_FIELDS).
+        """
+        fields = list(fields or ACCOUNT_EXPORT_FIELDS)
+
+        def read_rows(session):
+            return AccountRepository(session).stream_export_rows(user_id, start, end, fields=fields)
+
+        return self._export(export_format, user_id, shard, read_rows, fields, "contas")
+
+    def export_transactions(
+        self,
+        export_format: ExportFormat,
+        user_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        shard: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Exporta o histórico de transações de um usuário (ou de todos, se user_id for None)"""
+        fields = TRANSACTION_EXPORT_FIELDS
+
+        def read_rows(session):
+            return TransactionRepository(session).stream_export_rows(user_id, start, end)
+
+        return self._export(export_format, user_id, shard, read_rows, fields, "transações")
@@ -0,0 +1,117 @@
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from typing import Any, Optional, Tuple
+from datetime import datetime, timedelta
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.utils.cache import TTLCache
+from app.utils.auth import SECRET_KEY
+import hashlib
+import hmac
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 60 * 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10_000))
+# Validade da reserva de uma chave cuja operação não terminou (ex.: processo encerrado).
+# Curta: é o tempo em que as repetições do cliente recebem 409 após uma queda. Deve
+# passar da duração de uma requisição (o statement timeout do banco é de 10 s)
+IDEMPOTENCY_PENDING_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_PENDING_TTL_SECONDS", 15))
+# Limpeza periódica das chaves expiradas (feita pelo scheduler de transferências)
+IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS", 300))
+IDEMPOTENCY_CLEANUP_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_CLEANUP_BATCH_SIZE", 5_000))
+
+# status_code da chave reservada, ainda sem resposta
+PENDING_STATUS = 0
+
+# Cache LRU do processo na frente da tabela idempotency_keys
+_response_cache = TTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+
+def hash_payload(payload: Any) -> str:
+    """
+    Gera o HMAC-SHA256 do corpo da requisição.
+    Usa a chave secreta para não armazenar um hash simples de senhas.
+    """
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hmac.new((SECRET_KEY or "").encode(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def _check_hash(stored_hash: str, request_hash: str) -> None:
+    if stored_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key já utilizada com outro corpo de requisição",
+        )
+
+
+class IdempotencyService:
+    def __init__(self, idempotency_repository: IdempotencyRepository):
+        self.repository = idempotency_repository
+
+    async def claim(
+        self, scope: str, key: str, request_hash: str
+    ) -> Optional[Tuple[int, Any]]:
+        """
+        Reserva a chave antes de executar a operação.
+        - Retorna (status_code, corpo) da resposta original, se já existir
+        - 409 se outra requisição com a mesma chave ainda está em andamento
+        - 422 se a chave foi usada com um corpo diferente
+        Retorna None quando a chave foi reservada: execute a operação e chame
+        save_response (ou release, se ela falhar).
+        """
+        cached = _response_cache.get((scope, key))
+        if cached is None:
+            claimed = await self.repository.claim({
+                "scope": scope,
+                "key": key,
+                "request_hash": request_hash,
+                "status_code": PENDING_STATUS,
+                "response_body": "",
+                "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_PENDING_TTL_SECONDS),
+            })
+            if claimed:
+                return None
+            record = await self.repository.get(scope, key)
+            if record is None or record.status_code == PENDING_STATUS:
+                # Reservada por outra requisição ainda em andamento (ou liberada há pouco)
+                if record is not None:
+                    _check_hash(record.request_hash, request_hash)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Requisição com esta Idempotency-Key em andamento, tente novamente",
+                )
+            cached = (record.request_hash, record.status_code, json.loads(record.response_body))
+            ttl = (record.expires_at - datetime.utcnow()).total_seconds()
+            _response_cache.set((scope, key), cached, ttl=max(ttl, 0))
+
+        stored_hash, status_code, body = cached
+        _check_hash(stored_hash, request_hash)
+        return status_code, body
+
+    async def save_response(
+        self, scope: str, key: str, request_hash: str, status_code: int, body: Any
+    ) -> Any:
+        """Grava a resposta original na chave reservada (e no cache) e a retorna serializada"""
+        content = jsonable_encoder(body)
+        _response_cache.set((scope, key), (request_hash, status_code, content))
+        try:
+            await self.repository.complete(scope, key, {
+                "status_code": status_code,
+                "response_body": json.dumps(content),
+                "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+            })
+        except Exception as e:
+            # A operação já foi concluída: falhar aqui não deve afetar o cliente
+            logger.error(f"Erro ao persistir chave de idempotência {key}: {e}")
+        return content
+
+    async def release(self, scope: str, key: str) -> None:
+        """Libera a chave reservada quando a operação falha, para o cliente poder repetir"""
+        try:
+            await self.repository.release(scope, key)
+        except Exception as e:
+            # A reserva expira sozinha em IDEMPOTENCY_PENDING_TTL_SECONDS
+            logger.error(f"Erro ao liberar chave de idempotência {key}: {e}")
@@ -0,0 +1,65 @@
+from fastapi import HTTPException, status
+from typing import Tuple, List
+from datetime import timezone
+from app.schemas.schedule_schema import ScheduleCreate
+from app.models.schedule_model import ScheduledTransfer
+from app.repositories.schedule_repository import ScheduleRepository
+from app.repositories.account_repository import AccountRepository
+from app.services.scheduler_service import transfer_scheduler
+from sqlalchemy.exc import IntegrityError
+
+import logging
+
+logger = logging.getLogger(__name__)
+class ScheduleService:
+    def __init__(self, schedule_repository: ScheduleRepository, account_repository: AccountRepository):
+        self.repository = schedule_repository
+        self.account_repository = account_repository
+
+    async def create_schedule(self, schedule_data: ScheduleCreate, user_id: int) -> ScheduledTransfer:
+        """
+        Cria um agendamento
+        - Verifica se a conta pertence ao usuário
+        - Apenas contas de débito possuem saldo para movimentar
+        """
+        try:
+            account = await self.account_repository.get_by_id(schedule_data.account_id)
+            if not account or account.user_id != user_id:
+                raise ValueError("Conta não encontrada ou não pertence ao usuário")
+
+            if account.is_credit:
+                raise ValueError("Contas de crédito não possuem saldo para agendamentos")
+
+            schedule_dict = schedule_data.model_dump(exclude={"first_run_at"})
+            # Armazena em UTC sem timezone, como o restante das colunas DateTime
+            first_run_at = schedule_data.first_run_at
+            if first_run_at.tzinfo is not None:
+                first_run_at = first_run_at.astimezone(timezone.utc).replace(tzinfo=None)
+            schedule_dict["next_run_at"] = first_run_at
+            schedule_dict["user_id"] = user_id
+
+            schedule = await self.repository.create(schedule_dict)
+            transfer_scheduler.wake()
+            return schedule
+
+        except ValueError as ve:
+            logger.warning(f"Validação falhou: {str(ve)}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(ve)
+            )
+
+    async def list_schedules(self, user_id: int) -> List[ScheduledTransfer]:
+        return await self.repository.get_all_by_user(user_id)
+
+    async def delete_schedule(self, schedule_id: int, user_id: int) -> Tuple[bool, str]:
+        """Deleta um agendamento com verificações"""
+        schedule = await self.repository.get_by_id_and_user(schedule_id, user_id)
+        if not schedule:
+            return False, "Agendamento não encontrado ou não pertence ao usuário"
+
+        try:
+            await self.repository.delete(schedule_id)
+            return True, "Agendamento excluído com sucesso"
+        except IntegrityError as e:
+            return False, f"Erro ao excluir agendamento: {str(e)}"
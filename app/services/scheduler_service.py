@@ -0,0 +1,157 @@
+from datetime import datetime
+from typing import Optional
+from app.repositories.schedule_repository import ScheduleRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.account_repository import forget_accounts
+from app.services.account_service import invalidate_summary, publish_account_event
+from app.services.audit_log import audit_log
+from app.services.idempotency_service import (
+    IDEMPOTENCY_CLEANUP_BATCH_SIZE,
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+)
+from database.database import shard_router
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", 500))
+SCHEDULER_MAX_IDLE_SECONDS = float(os.getenv("SCHEDULER_MAX_IDLE_SECONDS", 60))
+
+
+class TransferScheduler:
+    """
+    Scheduler asyncio que executa as transferências agendadas.
+
+    - Processa lotes de até `batch_size` agendamentos vencidos por transação
+    - Enquanto houver lotes cheios, continua sem esperar
+    - Sem pendências, dorme até o próximo vencimento (no máximo `max_idle_seconds`)
+      ou até ser acordado por um novo agendamento criado neste processo
+    - A cada `cleanup_interval_seconds`, remove as chaves de idempotência expiradas
+    Vários workers podem rodar o scheduler ao mesmo tempo (SKIP LOCKED).
+    Com sharding, cada shard é processado com a sua própria sessão.
+    """
+
+    def __init__(
+        self,
+        session_factories=None,
+        batch_size: int = SCHEDULER_BATCH_SIZE,
+        max_idle_seconds: float = SCHEDULER_MAX_IDLE_SECONDS,
+        cleanup_interval_seconds: float = IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+    ):
+        self._session_factories = session_factories
+        self.batch_size = batch_size
+        self.max_idle_seconds = max_idle_seconds
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self._next_cleanup = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def session_factories(self):
+        # Resolvido a cada uso: testes podem religar as sessões do router (database/testing.py)
+        return self._session_factories or list(shard_router.sessionmakers.values())
+
+    async def run_once(self) -> int:
+        """Executa um lote de agendamentos vencidos em cada shard"""
+        processed, user_ids, changes = 0, set(), []
+        for session_factory in self.session_factories:
+            async with session_factory() as session:
+                shard_processed, shard_user_ids, shard_changes = await ScheduleRepository(
+                    session
+                ).process_due_batch(datetime.utcnow(), self.batch_size)
+            processed += shard_processed
+            user_ids |= shard_user_ids
+            changes.extend(shard_changes)
+        # Registrado após o commit, como nas alterações feitas pela API (AccountService)
+        for user_id, account_id, before, after in changes:
+            await audit_log.record(
+                "account.scheduled_transfer", user_id, account_id,
+                before={"balance": before}, after={"balance": after},
+            )
+        for user_id in user_ids:
+            invalidate_summary(user_id)
+            forget_accounts(user_id)
+            await publish_account_event(user_id, "balances.changed")
+        return processed
+
+    async def cleanup_idempotency_keys(self) -> int:
+        """Remove as chaves de idempotência expiradas, em lotes (ficam no shard padrão)"""
+        removed = 0
+        while True:
+            async with shard_router.session() as session:
+                batch = await IdempotencyRepository(session).delete_expired(IDEMPOTENCY_CLEANUP_BATCH_SIZE)
+            removed += batch
+            if batch < IDEMPOTENCY_CLEANUP_BATCH_SIZE:
+                return removed
+
+    async def _cleanup_if_due(self) -> None:
+        if time.monotonic() < self._next_cleanup:
+            return
+        self._next_cleanup = time.monotonic() + self.cleanup_interval_seconds
+        try:
+            removed = await self.cleanup_idempotency_keys()
+            if removed:
+                logger.info(f"{removed} chaves de idempotência expiradas removidas")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Não interrompe as transferências; nova tentativa no próximo intervalo
+            logger.error(f"Erro ao remover chaves de idempotência expiradas: {e}")
+
+    async def _seconds_until_next(self) -> float:
+        pending = []
+        for session_factory in self.session_factories:
+            async with session_factory() as session:
+                pending.append(await ScheduleRepository(session).get_next_run_at())
+        pending = [next_run_at for next_run_at in pending if next_run_at is not None]
+        if not pending:
+            return self.max_idle_seconds
+        next_run_at = min(pending)
+        delay = (next_run_at - datetime.utcnow()).total_seconds()
+        return min(max(delay, 0.0), self.max_idle_seconds)
+
+    async def _run(self) -> None:
+        while True:
+            await self._cleanup_if_due()
+            try:
+                processed = await self.run_once()
+                if processed:
+                    logger.info(f"{processed} agendamentos executados")
+                if processed >= self.batch_size:
+                    continue
+                delay = await self._seconds_until_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no scheduler de transferências: {e}", exc_info=True)
+                delay = self.max_idle_seconds
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def wake(self) -> None:
+        """Acorda o scheduler (ex.: após criar um agendamento)"""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+transfer_scheduler = TransferScheduler()
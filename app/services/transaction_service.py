@@ -0,0 +1,99 @@
+from fastapi import HTTPException, status
+from typing import List, Optional, Tuple
+from app.schemas.transaction_schema import (
+    TransactionResponse, TransactionSearchPage, TransactionSearchResult,
+    TransactionImport, TransactionImportResult, SearchSort,
+)
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.account_repository import AccountRepository
+from app.services.category_rule_service import CategoryRuleService
+from app.services.account_service import invalidate_summary
+import base64
+import binascii
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(rank: float, transaction_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, transaction_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(transaction_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Cursor de paginação inválido")
+
+class TransactionService:
+    def __init__(
+        self,
+        transaction_repository: TransactionRepository,
+        account_repository: AccountRepository,
+        rule_service: CategoryRuleService,
+    ):
+        self.repository = transaction_repository
+        self.account_repository = account_repository
+        self.rule_service = rule_service
+
+    async def import_transactions(
+        self, account_id: int, user_id: int, items: List[TransactionImport]
+    ) -> TransactionImportResult:
+        """
+        Importa transações de extrato para o histórico de uma conta
+        - Categoriza o lote inteiro com as regras compiladas do usuário
+        - Insere tudo em um único INSERT (não altera o saldo da conta; em
+          cartões, altera o limite utilizado do resumo)
+        """
+        account = await self.account_repository.get_by_id(account_id)
+        if not account or account.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conta não encontrada ou não pertence ao usuário"
+            )
+
+        rows = [
+            {**item.model_dump(), "account_id": account_id, "user_id": user_id}
+            for item in items
+        ]
+        categories = await self.rule_service.categorize(user_id, rows)
+        for row, category in zip(rows, categories):
+            row["category"] = category
+
+        imported = await self.repository.bulk_create(rows)
+        if account.is_credit:
+            # O limite utilizado do resumo vem do histórico dos cartões
+            invalidate_summary(user_id)
+        return TransactionImportResult(
+            imported=imported,
+            categorized=sum(1 for category in categories if category is not None),
+        )
+
+    async def search(
+        self,
+        user_id: int,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: SearchSort = SearchSort.RELEVANCE,
+    ) -> TransactionSearchPage:
+        """Busca transações do usuário por descrição/estabelecimento"""
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as ve:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+        rows = await self.repository.search(user_id, query, limit, after, sort)
+        items = [
+            TransactionSearchResult(
+                **TransactionResponse.model_validate(transaction).model_dump(), rank=rank
+            )
+            for transaction, rank in rows
+        ]
+        next_cursor = None
+        if len(rows) == limit:
+            last, last_rank = rows[-1]
+            next_cursor = encode_cursor(last_rank, last.id)
+        return TransactionSearchPage(items=items, next_cursor=next_cursor)
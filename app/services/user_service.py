@@ -1,5 +1,6 @@
 from app.repositories.user_repository import UserRepository
-from app.schemas.user_schema import UserCreate, UserResponse
+from app.schemas.user_schema import UserCreate, UserResponse, UserDashboard
+from app.schemas.account_schema import AccountSummary
 from typing import Optional, Tuple, Dict, Any, List
 from app.models.user_model import User
 from app.utils.auth import verify_password, get_hash_password
@@ -40,13 +41,15 @@ class UserService:
             # Lida com exceções HTTP específicas
             logging.error(f"Erro HTTP: {e.detail}")
             raise e  # Relança a exceção para ser tratada pela camada superior
-        except Exception as e:
-            # Captura outros erros inesperados
-            logging.error(f"Erro inesperado ao criar usuário: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro inesperado ao criar usuário",
-            )
+
+    def get_dashboard(self, user: User, summary: Optional[AccountSummary] = None) -> UserDashboard:
+        """
+        Monta o painel do usuário a partir de User.accounts já carregado
+        (ver get_current_user_with_accounts); não faz novas consultas.
+        """
+        dashboard = UserDashboard.model_validate(user)
+        dashboard.summary = summary
+        return dashboard
 
     async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         try:
@@ -68,10 +71,3 @@ class UserService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e),
             )
-        except Exception as e:
-            # Captura outros erros inesperados
-            logging.error(f"Erro inesperado ao autenticar usuário: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro inesperado ao autenticar usuário",
-            )
@@ -1,11 +1,12 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
+from app.utils.profiling import profile_span
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -23,11 +24,17 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_hash_password(password: str) -> str:
     """Criptografa a senha usando bcrypt."""
-    return pwd_context.hash(password)
+    with profile_span("bcrypt"):
+        return pwd_context.hash(password)
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Criptografa várias senhas com o mesmo pwd_context (executado em processos pelo import em lote)."""
+    return [pwd_context.hash(password) for password in passwords]
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha em texto plano corresponde à senha criptografada."""
-    return pwd_context.verify(plain_password, hashed_password)
+    with profile_span("bcrypt"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 # Função para criar token JWT
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
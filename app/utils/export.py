@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from typing import AsyncIterator, Sequence
+import csv
+import io
+import json
+
+# Quantidade de linhas acumuladas antes de enviar um bloco ao cliente
+EXPORT_CHUNK_ROWS = 500
+
+
+def _json_default(value):
+    # Valores monetários já chegam como float (cents_to_float), como na API JSON
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value)}")
+
+
+async def to_csv(
+    rows: AsyncIterator[Sequence], fields: Sequence[str], chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> AsyncIterator[str]:
+    """Converte as linhas em blocos de texto CSV (com cabeçalho)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    pending = 0
+    async for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def to_ndjson(
+    rows: AsyncIterator[Sequence], fields: Sequence[str], chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> AsyncIterator[str]:
+    """Converte as linhas em blocos NDJSON (um objeto JSON por linha)"""
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(dict(zip(fields, row)), default=_json_default))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,84 @@
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+# Valores monetários são armazenados e calculados em centavos (int / BIGINT).
+# A conversão para reais acontece apenas na fronteira da API.
+
+CENTS_PER_UNIT = 100
+_CENT = Decimal("0.01")
+
+# Maior valor aceito em centavos (R$ 10 trilhões). Bem abaixo do limite do
+# BIGINT (2**63 - 1): somas de muitas contas e saldo + lançamento não estouram
+MAX_CENTS = 10 ** 15
+_MAX_UNITS = MAX_CENTS / CENTS_PER_UNIT
+_OUT_OF_RANGE = f"Valor monetário fora do limite (máximo {MAX_CENTS // CENTS_PER_UNIT} em módulo)"
+
+
+def _checked(cents: int) -> int:
+    if not -MAX_CENTS <= cents <= MAX_CENTS:
+        raise ValueError(_OUT_OF_RANGE)
+    return cents
+
+
+def to_cents(value: Union[Decimal, str, int, float]) -> int:
+    """
+    Converte um valor em reais para centavos, sem perda de precisão.
+    Rejeita valores com mais de 2 casas decimais ou acima de MAX_CENTS.
+
+    Os formatos usuais não passam por Decimal:
+    - float (número JSON): exato se os centavos, divididos por 100, voltam ao
+      mesmo float (ou seja, a menor representação tem até 2 casas)
+    - str com exatamente 2 casas ("10.50", "-42.90")
+    """
+    kind = type(value)
+    if kind is float:
+        if -_MAX_UNITS <= value <= _MAX_UNITS:  # falso para nan/inf
+            cents = round(value * CENTS_PER_UNIT)
+            if cents / CENTS_PER_UNIT == value:
+                return cents
+    elif kind is str:
+        if value[-3:-2] == "." and value[-2:].isdigit():
+            try:
+                cents = int(value[:-3] + value[-2:])
+            except ValueError:
+                pass
+            else:
+                return _checked(cents)
+    elif kind is int:
+        return _checked(value * CENTS_PER_UNIT)
+    return _exact_cents(value)
+
+
+def _exact_cents(value: Union[Decimal, str, int, float]) -> int:
+    """Demais formatos (expoente, 1 casa decimal, Decimal etc.): conversão exata por Decimal"""
+    if isinstance(value, bool):
+        raise ValueError("Valor monetário inválido")
+    if isinstance(value, int):
+        return _checked(value * CENTS_PER_UNIT)
+    try:
+        # str(float) usa a menor representação decimal (ex.: 10.5 -> "10.5")
+        amount = value if isinstance(value, Decimal) else Decimal(str(value))
+        if not amount.is_finite():
+            raise ValueError("Formato inválido para valor monetário")
+        if abs(amount) * CENTS_PER_UNIT > MAX_CENTS:
+            # Antes do quantize: valores enormes excedem a precisão do Decimal
+            raise ValueError(_OUT_OF_RANGE)
+        if amount != amount.quantize(_CENT):
+            raise ValueError("Valores monetários aceitam no máximo 2 casas decimais")
+    except InvalidOperation:
+        raise ValueError("Formato inválido para valor monetário")
+    return _checked(int(amount * CENTS_PER_UNIT))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Converte centavos para reais (Decimal com 2 casas)"""
+    return Decimal(cents).scaleb(-2)
+
+
+def cents_to_float(cents: int) -> float:
+    """
+    Converte centavos para float na resposta JSON.
+    A divisão é corretamente arredondada, então o número serializado
+    é exatamente o valor decimal (ex.: 1050 -> 10.5).
+    """
+    return cents / CENTS_PER_UNIT
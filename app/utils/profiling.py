@@ -0,0 +1,259 @@
+"""
+Profiling sob demanda de uma única requisição.
+
+Nada aqui custa nada fora de uma requisição perfilada além da leitura de um
+ContextVar: os listeners de SQL só ficam registrados enquanto houver
+profiling em andamento e a thread de amostragem só existe durante a requisição.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+import asyncio
+import inspect
+import sys
+import threading
+import time
+import uuid
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# Tamanho máximo do SQL guardado no relatório (sem parâmetros, que podem conter dados pessoais)
+MAX_STATEMENT_LENGTH = 500
+
+
+def current_profile() -> Optional["RequestProfile"]:
+    return _current_profile.get()
+
+
+class StackSampler:
+    """
+    Profiler estatístico: uma thread lê a pilha da thread do event loop a cada
+    `interval` segundos e conta as amostras em que a task da requisição está executando.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.loop = task.get_loop()
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if asyncio.current_task(self.loop) is not self.task:
+                continue  # o loop está executando outra requisição (ou ocioso)
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def top_functions(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Funções com mais amostras no topo da pilha (tempo próprio)"""
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": function, "samples": count, "ms": round(count * self.interval * 1000, 2)}
+            for function, count in own.most_common(limit)
+        ]
+
+
+class RequestProfile:
+    """Relatório de uma requisição: linha do tempo de SQL, trechos medidos e amostras de pilha"""
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.sql: List[Dict[str, Any]] = []
+        self.spans: List[Dict[str, Any]] = []
+        self.sampler: Optional[StackSampler] = None
+        self.endpoint_returned_at: Optional[float] = None
+
+    def elapsed_ms(self, since: Optional[float] = None) -> float:
+        return round(((since or time.perf_counter()) - self._t0) * 1000, 3)
+
+    def add_span(self, name: str, started: float, ended: float) -> None:
+        self.spans.append({
+            "name": name,
+            "start_ms": self.elapsed_ms(started),
+            "duration_ms": round((ended - started) * 1000, 3),
+        })
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.status_code = status_code
+        self.duration_ms = self.elapsed_ms()
+
+    def report(self) -> Dict[str, Any]:
+        totals: Dict[str, float] = {"sql": sum(item["duration_ms"] for item in self.sql)}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0) + span["duration_ms"]
+        report = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "duration_ms": self.duration_ms,
+            "totals_ms": {name: round(value, 3) for name, value in totals.items()},
+            "sql": self.sql,
+            "spans": self.spans,
+        }
+        if self.sampler is not None:
+            report["profile"] = {
+                "interval_ms": self.sampler.interval * 1000,
+                "samples": self.sampler.samples,
+                "top_functions": self.sampler.top_functions(),
+                # Formato "collapsed" (flamegraph.pl / speedscope)
+                "collapsed": [f"{stack} {count}" for stack, count in self.sampler.stacks.most_common()],
+            }
+        return report
+
+
+@contextmanager
+def profile_span(name: str):
+    """Mede um trecho (ex.: bcrypt) se a requisição atual estiver sendo perfilada"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, started, time.perf_counter())
+
+
+# --- Linha do tempo de SQL (listeners registrados só durante o profiling) ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    started = starts.pop()
+    profile.sql.append({
+        "start_ms": profile.elapsed_ms(started),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "statement": statement[:MAX_STATEMENT_LENGTH],
+        "executemany": executemany,
+        "rowcount": getattr(cursor, "rowcount", None),
+    })
+
+
+class SQLTimeline:
+    """Liga os listeners de SQL nos engines enquanto houver ao menos um profiling ativo"""
+
+    def __init__(self, engines_factory: Callable[[], list]):
+        self.engines_factory = engines_factory
+        self._active = 0
+        self._engines: list = []
+
+    def acquire(self) -> None:
+        if self._active == 0:
+            self._engines = [engine.sync_engine for engine in self.engines_factory()]
+            for engine in self._engines:
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        self._active += 1
+
+    def release(self) -> None:
+        self._active -= 1
+        if self._active == 0:
+            for engine in self._engines:
+                event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+                event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+            self._engines = []
+
+
+@contextmanager
+def activate(profile: RequestProfile, timeline: SQLTimeline, interval: Optional[float] = None):
+    """Ativa o profile no contexto da task atual (SQL, trechos e, com `interval`, amostragem)"""
+    token = _current_profile.set(profile)
+    timeline.acquire()
+    if interval:
+        profile.sampler = StackSampler(asyncio.current_task(), interval)
+        profile.sampler.start()
+    try:
+        yield profile
+    finally:
+        if profile.sampler is not None:
+            profile.sampler.stop()
+        timeline.release()
+        _current_profile.reset(token)
+
+
+# --- Serialização da resposta: do retorno do endpoint até o JSON pronto ---
+
+def _mark_endpoint_return(call: Callable) -> Callable:
+    if inspect.iscoroutinefunction(call):
+        @wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile = _current_profile.get()
+                if profile is not None:
+                    profile.endpoint_returned_at = time.perf_counter()
+        return endpoint
+
+    @wraps(call)
+    def sync_endpoint(*args, **kwargs):
+        # Executado no threadpool: o ContextVar é copiado para a thread
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile = _current_profile.get()
+            if profile is not None:
+                profile.endpoint_returned_at = time.perf_counter()
+    return sync_endpoint
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute que marca o fim do endpoint (início da serialização da resposta)"""
+
+    def get_route_handler(self):
+        self.dependant.call = _mark_endpoint_return(self.dependant.call)
+        return super().get_route_handler()
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """JSONResponse que registra a serialização (response_model + JSON) no profile"""
+
+    def render(self, content: Any) -> bytes:
+        body = super().render(content)
+        profile = _current_profile.get()
+        if profile is not None and profile.endpoint_returned_at is not None:
+            profile.add_span("serialization", profile.endpoint_returned_at, time.perf_counter())
+            profile.endpoint_returned_at = None
+        return body
@@ -0,0 +1,226 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from re import _parser as sre_parse
+from re import _constants as sre_constants
+import re
+
+# Tipos de regra de texto
+SUBSTRING = "substring"
+REGEX = "regex"
+
+# Construções que dependem da numeração/nomes dos grupos e quebrariam a regex combinada
+_FORBIDDEN_REGEX = re.compile(r"\(\?P[<=]|\\[1-9]|\(\?<[A-Za-z_]")
+
+# Quantificadores sem limite (*, +, {n,}) aceitos por regex. Cada um pode
+# multiplicar o backtracking pelo tamanho da descrição (até 255 caracteres)
+MAX_UNBOUNDED_REPEATS = 3
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT)
+
+
+def _unbounded_repeats(parsed) -> int:
+    """
+    Conta os quantificadores sem limite da regex já analisada.
+    Rejeita quantificadores sem limite aninhados em outro quantificador, como
+    (a+)+ ou (.*x)*: o backtracking deles é exponencial (ReDoS).
+    """
+    count = 0
+    for op, av in parsed:
+        if op in _REPEATS:
+            low, high, item = av
+            inner = _unbounded_repeats(item)
+            unbounded = high == sre_constants.MAXREPEAT
+            if inner and high > 1 or unbounded and _has_repeat(item):
+                raise ValueError("Regex não pode ter quantificadores aninhados como (a+)+")
+            count += inner + unbounded
+        elif op is sre_constants.SUBPATTERN:
+            count += _unbounded_repeats(av[3])
+        elif op is sre_constants.BRANCH:
+            count += sum(_unbounded_repeats(branch) for branch in av[1])
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            count += _unbounded_repeats(av[1])
+        elif op is sre_constants.ATOMIC_GROUP:
+            count += _unbounded_repeats(av)
+    return count
+
+
+def _has_repeat(parsed) -> bool:
+    for op, av in parsed:
+        if op in _REPEATS and av[1] > 1:
+            return True
+        if op is sre_constants.SUBPATTERN and _has_repeat(av[3]):
+            return True
+        if op is sre_constants.BRANCH and any(_has_repeat(branch) for branch in av[1]):
+            return True
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT) and _has_repeat(av[1]):
+            return True
+        if op is sre_constants.ATOMIC_GROUP and _has_repeat(av):
+            return True
+    return False
+
+
+def validate_pattern(match_type: str, pattern: Optional[str]) -> None:
+    """Valida o padrão de uma regra antes de salvá-la"""
+    if match_type == REGEX and pattern:
+        if _FORBIDDEN_REGEX.search(pattern):
+            raise ValueError("Regex não pode conter grupos nomeados ou referências a grupos")
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Regex inválida: {e}")
+        # O módulo re não tem limite de tempo: as regex são limitadas na gravação
+        if _unbounded_repeats(sre_parse.parse(pattern)) > MAX_UNBOUNDED_REPEATS:
+            raise ValueError(
+                f"Regex pode ter no máximo {MAX_UNBOUNDED_REPEATS} quantificadores sem limite (*, +, {{n,}})"
+            )
+        # Compilada como na regex combinada: flags globais como (?i) só valem no
+        # início da expressão inteira e quebrariam a combinação
+        try:
+            re.compile(_combine(["x", pattern]))
+        except re.error:
+            raise ValueError("Regex não pode conter flags globais como (?i); use a forma local (?i:...)")
+
+
+def _combine(patterns: Iterable[str]) -> str:
+    return "|".join(f"(?:{pattern})" for pattern in patterns)
+
+
+class _Automaton:
+    """
+    Autômato de Aho-Corasick: encontra todas as substrings cadastradas
+    em uma única passada pela descrição.
+    """
+
+    def __init__(self, patterns: Dict[str, List[int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.output: List[tuple] = [()]
+        fail = [0]
+
+        for pattern, rule_indexes in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.output.append(())
+                    fail.append(0)
+                state = next_state
+            self.output[state] += tuple(rule_indexes)
+
+        # Links de falha em largura; cada estado herda as saídas do seu link
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = fail[fallback]
+                link = self.goto[fallback].get(char, 0)
+                fail[next_state] = link if link != next_state else 0
+                self.output[next_state] += self.output[fail[next_state]]
+        self.fail = fail
+
+    def find(self, text: str) -> set:
+        """Retorna os índices das regras cujas substrings aparecem no texto"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while True:
+                next_state = goto[state].get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CompiledRuleSet:
+    """
+    Conjunto de regras de um usuário compilado para classificação em lote.
+
+    - Substrings: um único autômato Aho-Corasick (sem diferenciar maiúsculas)
+    - Regex: uma regex combinada serve de pré-filtro; as regras individuais
+      só são avaliadas se ela casar e se puderem vencer a melhor candidata
+    - Regras sem texto (apenas valor/conta) são sempre candidatas
+    A categoria é a da regra de maior prioridade que passa nos filtros de valor e conta.
+    """
+
+    def __init__(self, rules: Iterable):
+        self.rules: List = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+
+        substrings: Dict[str, List[int]] = {}
+        self._regex_rules: List[tuple] = []
+        self._textless: List[int] = []
+        for index, rule in enumerate(self.rules):
+            if not rule.pattern:
+                self._textless.append(index)
+            elif rule.match_type == SUBSTRING:
+                substrings.setdefault(rule.pattern.lower(), []).append(index)
+            else:
+                self._regex_rules.append((index, re.compile(rule.pattern, re.IGNORECASE)))
+
+        self._automaton = _Automaton(substrings) if substrings else None
+        self._regex_any = None
+        if self._regex_rules:
+            try:
+                self._regex_any = re.compile(
+                    _combine(self.rules[index].pattern for index, _ in self._regex_rules), re.IGNORECASE
+                )
+            except re.error:
+                # Regra salva antes da validação atual (ex.: flag global): sem
+                # pré-filtro, cada regex é avaliada individualmente
+                self._regex_any = None
+        # Filtros por regra: (min_amount, max_amount, account_id, category)
+        self._filters = [
+            (rule.min_amount, rule.max_amount, rule.account_id, rule.category)
+            for rule in self.rules
+        ]
+
+    def _accepts(self, index: int, amount: int, account_id: Optional[int]) -> bool:
+        min_amount, max_amount, rule_account_id, _ = self._filters[index]
+        if min_amount is not None and amount < min_amount:
+            return False
+        if max_amount is not None and amount > max_amount:
+            return False
+        if rule_account_id is not None and rule_account_id != account_id:
+            return False
+        return True
+
+    def classify(self, description: str, amount: int, account_id: Optional[int] = None) -> Optional[str]:
+        """Retorna a categoria da regra de maior prioridade que casa com a transação"""
+        candidates = self._automaton.find(description.lower()) if self._automaton else set()
+        candidates.update(self._textless)
+
+        best = len(self.rules)
+        for index in sorted(candidates):
+            if self._accepts(index, amount, account_id):
+                best = index
+                break
+
+        # Regras regex só são avaliadas se alguma casar e puder vencer a melhor candidata
+        if self._regex_rules and self._regex_rules[0][0] < best \
+                and (self._regex_any is None or self._regex_any.search(description)):
+            for index, pattern in self._regex_rules:
+                if index >= best:
+                    break
+                if pattern.search(description) and self._accepts(index, amount, account_id):
+                    best = index
+                    break
+
+        return self._filters[best][3] if best < len(self.rules) else None
+
+    def classify_batch(self, rows: Sequence[dict]) -> List[Optional[str]]:
+        """Classifica um lote de transações (dicts com description, amount e account_id)"""
+        if not self.rules:
+            return [None] * len(rows)
+        classify = self.classify
+        return [
+            classify(row["description"], row["amount"], row.get("account_id"))
+            for row in rows
+        ]
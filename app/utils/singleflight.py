@@ -0,0 +1,108 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+import asyncio
+import os
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas assíncronas idênticas em andamento (single-flight).
+
+    - A primeira chamada de uma chave executa a consulta; as chamadas
+      concorrentes com a mesma chave aguardam e recebem o mesmo resultado
+    - Nada fica em cache: ao terminar, a chave é removida e a próxima
+      chamada consulta o banco de novo
+    - `forget` desvincula a chamada em andamento (ex.: após uma escrita),
+      para que as chamadas seguintes não recebam um resultado anterior a ela
+    - Se a chamada líder for cancelada (cliente desconectou), quem estava
+      aguardando tenta de novo em vez de receber o cancelamento
+    - Com `share`, as chamadas concorrentes recebem `share(resultado)` em vez
+      do próprio resultado (ex.: cópias de objetos ORM, que pertencem à
+      sessão da chamada líder e não podem ser compartilhados entre requisições)
+    """
+
+    def __init__(self, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[T]], share: Optional[Callable[[T], T]] = None
+    ) -> T:
+        if not self.enabled:
+            return await func()
+
+        while (future := self._calls.get(key)) is not None:
+            try:
+                # shield: cancelar quem aguarda não cancela a chamada compartilhada
+                result = await asyncio.shield(future)
+                return share(result) if share is not None else result
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # evita o aviso de exceção não lida sem concorrentes
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Desvincula a chamada em andamento da chave (ela termina normalmente)"""
+        self._calls.pop(key, None)
+
+    def forget_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Desvincula as chamadas em andamento cujas chaves satisfazem `predicate`"""
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+def detached_copy(instance: Any, _copies: Optional[Dict[int, Any]] = None) -> Any:
+    """
+    Cópia de um objeto ORM fora de qualquer sessão (detached), com as colunas e
+    os relacionamentos já carregados; nenhuma consulta é feita. Quem a recebe
+    pode alterá-la ou anexá-la à própria sessão sem afetar o original.
+    """
+    if instance is None:
+        return None
+    copies = {} if _copies is None else _copies
+    if id(instance) in copies:
+        return copies[id(instance)]
+
+    state = inspect(instance)
+    copy = state.manager.new_instance()
+    copies[id(instance)] = copy
+    for attribute in state.mapper.column_attrs:
+        if attribute.key in state.dict:
+            set_committed_value(copy, attribute.key, state.dict[attribute.key])
+    for relationship in state.mapper.relationships:
+        if relationship.key not in state.dict:
+            continue  # não carregado: continua lazy (expirado) na cópia
+        value = state.dict[relationship.key]
+        if relationship.uselist:
+            value = [detached_copy(item, copies) for item in value]
+        else:
+            value = detached_copy(value, copies)
+        set_committed_value(copy, relationship.key, value)
+    make_transient_to_detached(copy)
+    return copy
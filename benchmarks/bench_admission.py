@@ -0,0 +1,162 @@
+"""
+Teste de carga: controle de admissão com o banco lento.
+
+O banco lento é simulado com um SQLite temporário em arquivo em que cada
+comando SQL leva --db-latency-ms a mais, e um pool de DATABASE_POOL_SIZE
+conexões. Uma carga em malha aberta (--rate requisições/s durante --duration s,
+GET /accounts de vários usuários) é enviada acima da capacidade, com e sem o
+AdmissionControlMiddleware, e o resultado compara:
+  - respostas 200 / 503 / 500 e latência p50/p99 de cada grupo
+  - 503 com Retry-After: sem o middleware, as requisições que esperam mais que
+    DATABASE_POOL_TIMEOUT por uma conexão também recebem 503 (e não 500)
+  - pico de requisições em andamento (memória retida pelo processo)
+
+Uso:
+    python -m benchmarks.bench_admission
+    python -m benchmarks.bench_admission --rate 400 --db-latency-ms 50
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("DATABASE_ECHO", "false")
+os.environ.setdefault("DATABASE_POOL_SIZE", "5")
+os.environ.setdefault("DATABASE_POOL_TIMEOUT", "1")
+os.environ.setdefault("CHAVE_SECRETA", "benchmark")
+# Cada requisição deve custar o mesmo ao banco (sem reaproveitar consultas simultâneas)
+os.environ.setdefault("SINGLEFLIGHT_ENABLED", "false")
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, insert
+
+from app.middleware.admission import AdmissionControlMiddleware, DEFAULT_LIMITS, register_overload_handlers
+from app.models import User, Account
+from app.routes import account_route
+from app.utils.auth import create_access_token
+from database.database import shard_router, DATABASE_POOL_SIZE
+from database.testing import create_schema
+
+USERS = 200
+
+
+async def _seed() -> None:
+    await create_schema(shard_router)
+    async with shard_router.session() as session:
+        await session.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(1, USERS + 1)
+        ])
+        await session.execute(insert(Account), [
+            {"name": f"conta-{i}", "user_id": i, "is_credit": False, "balance": 100}
+            for i in range(1, USERS + 1)
+        ])
+        await session.commit()
+
+
+async def _slow_database(latency: float) -> None:
+    def on_connect(dbapi_connection, connection_record):
+        # O trace callback roda na thread da conexão aiosqlite (não no event loop):
+        # cada comando ocupa a conexão por `latency` a mais, como um servidor lento
+        dbapi_connection.await_(
+            dbapi_connection._connection.set_trace_callback(lambda statement: time.sleep(latency))
+        )
+
+    for engine in shard_router.engines.values():
+        await engine.dispose()  # conexões abertas durante a carga inicial
+        event.listen(engine.sync_engine, "connect", on_connect)
+
+
+def _build_app(admission: bool, queue_timeout: float) -> FastAPI:
+    app = FastAPI()
+    app.include_router(account_route.router)
+    register_overload_handlers(app)
+    if admission:
+        limits = dict(DEFAULT_LIMITS)
+        # Cada requisição usa o banco em duas etapas (autenticação e consulta): o dobro
+        # do pool mantém as conexões ocupadas sem formar fila de espera por conexão
+        limits["read"] = (DATABASE_POOL_SIZE * 2, DATABASE_POOL_SIZE * 2, queue_timeout)
+        app.add_middleware(AdmissionControlMiddleware, limits=limits)
+    return app
+
+
+def _summary(samples) -> str:
+    if not samples:
+        return "-"
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50={statistics.median(samples) * 1000:7.1f} ms  p99={p99 * 1000:7.1f} ms"
+
+
+async def _load(app: FastAPI, label: str, rate: float, duration: float) -> None:
+    tokens = [
+        {"Authorization": f"Bearer {create_access_token(data={'sub': f'user{i}'})}"}
+        for i in range(1, USERS + 1)
+    ]
+    latencies = defaultdict(list)
+    retry_after = 0
+    in_flight = peak = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+
+        async def one(i):
+            nonlocal in_flight, peak, retry_after
+            in_flight += 1
+            peak = max(peak, in_flight)
+            started = time.perf_counter()
+            try:
+                response = await client.get("/accounts", headers=tokens[i % USERS])
+                status = response.status_code
+                retry_after += status == 503 and "retry-after" in response.headers
+            finally:
+                in_flight -= 1
+            latencies[status].append(time.perf_counter() - started)
+
+        tasks = []
+        total = int(rate * duration)
+        started = time.perf_counter()
+        for i in range(total):
+            # Malha aberta: as chegadas não esperam as respostas anteriores
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print(f"\n{label} ({total} requisições em {elapsed:.1f} s, pico de {peak} em andamento)")
+    for status in sorted(latencies):
+        print(f"  {status}: {len(latencies[status]):5d}   {_summary(latencies[status])}")
+    if 503 in latencies:
+        print(f"  503 com Retry-After: {retry_after}/{len(latencies[503])}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--db-latency-ms", type=float, default=20)
+    parser.add_argument("--queue-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    await _seed()
+    await _slow_database(args.db_latency_ms / 1000)
+    print(f"Banco lento: +{args.db_latency_ms:.0f} ms por comando, pool de {DATABASE_POOL_SIZE} conexões")
+
+    await _load(_build_app(False, args.queue_timeout), "Sem controle de admissão", args.rate, args.duration)
+    await _load(_build_app(True, args.queue_timeout), "Com controle de admissão", args.rate, args.duration)
+    await shard_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark: custo da trilha de auditoria na latência do PATCH /accounts.
+
+Modo local (padrão): simula o caminho do PATCH com um INSERT de latência
+fixa (--db-latency-ms) e compara p50/p99 de:
+  - sem auditoria
+  - auditoria síncrona (um INSERT por alteração, dentro da requisição)
+  - write-behind (AuditLogWriter: fila + INSERT em lote)
+
+Modo HTTP (--url): mede p50/p99 de PATCH /accounts/{id} em uma API rodando
+(ex.: docker compose), para comparar com a versão sem auditoria.
+
+Uso:
+    python -m benchmarks.bench_audit_log
+    python -m benchmarks.bench_audit_log --url http://localhost:8000 --token <jwt> --account-id 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.audit_log import AuditLogWriter
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples) * 1000, p99 * 1000
+
+
+def _report(label, samples):
+    p50, p99 = _percentiles(samples)
+    print(f"{label:<28} p50={p50:7.2f} ms   p99={p99:7.2f} ms")
+
+
+async def _run_concurrently(handler, requests, concurrency):
+    # Carga em loop fechado: `concurrency` clientes, cada um espera a resposta anterior
+    samples = []
+    counter = iter(range(requests))
+
+    async def client():
+        for i in counter:
+            started = time.perf_counter()
+            await handler(i)
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples
+
+
+async def bench_local(requests, concurrency, db_latency):
+    inserted = []
+
+    async def insert(events):
+        # Um round trip ao banco, independente do tamanho do lote
+        await asyncio.sleep(db_latency)
+        inserted.extend(events)
+
+    async def update_account():
+        # UPDATE + COMMIT da própria alteração
+        await asyncio.sleep(db_latency)
+
+    async def no_audit(i):
+        await update_account()
+
+    async def sync_audit(i):
+        await update_account()
+        await insert([{"account_id": i}])
+
+    writer = AuditLogWriter(sink=insert)
+
+    async def write_behind(i):
+        await update_account()
+        await writer.record("account.updated", 1, i, before={}, after={})
+
+    _report("sem auditoria", await _run_concurrently(no_audit, requests, concurrency))
+    _report("auditoria síncrona", await _run_concurrently(sync_audit, requests, concurrency))
+
+    inserted.clear()
+    writer.start()
+    _report("write-behind", await _run_concurrently(write_behind, requests, concurrency))
+    await writer.stop()
+    assert len(inserted) == requests, "eventos de auditoria perdidos"
+
+
+async def bench_http(url, token, account_id, requests, concurrency):
+    import aiohttp
+
+    headers = {"Authorization": f"Bearer {token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+
+        async def patch(i):
+            body = {"balance": 100 + i % 1000}
+            async with session.patch(f"{url}/accounts/{account_id}", json=body) as response:
+                await response.read()
+
+        _report("PATCH /accounts", await _run_concurrently(patch, requests, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--url")
+    parser.add_argument("--token")
+    parser.add_argument("--account-id", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_http(args.url, args.token, args.account_id, args.requests, args.concurrency))
+    else:
+        asyncio.run(bench_local(args.requests, args.concurrency, args.db_latency_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark: valores monetários em Decimal x inteiros em centavos.
+
+Compara o caminho antigo (Decimal) com o novo (int em centavos) nos pontos
+por onde os valores passam de fato:
+
+- validação: corpo JSON validado pelo Pydantic (números e strings); o
+  caminho antigo ainda reconvertia com Decimal(str(...)) no service
+- serialização: resposta JSON
+- agregação: AccountRepository.get_summary (SUM no banco, BIGINT) contra a
+  mesma consulta sobre uma cópia da tabela com as colunas NUMERIC antigas
+
+Referência (SQLite, 100 mil valores, 20 mil contas): números JSON ~2.5x mais
+rápidos, strings JSON no empate (o parse de Decimal é em C), serialização
+~1.2x e o SUM do resumo ~1.5x.
+
+Roda por padrão em SQLite em memória; para medir no Postgres, aponte
+DATABASE_URL para um banco descartável:
+
+    python -m benchmarks.bench_money
+    python -m benchmarks.bench_money --accounts 50000
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DATABASE_ECHO", "false")
+os.environ.setdefault("CHAVE_SECRETA", "benchmark")
+
+from decimal import Decimal
+from typing import List
+import argparse
+import asyncio
+import json
+import random
+import time
+import timeit
+import warnings
+
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Integer, MetaData, Numeric, Table, case, cast, func, insert, select
+)
+
+from app.models import User, Account, Transaction
+from app.repositories.account_repository import AccountRepository
+from app.schemas.money import Money
+from app.utils.money import cents_to_float
+from database.database import DATABASE_URL, shard_router
+from database.testing import create_schema
+
+N = 100_000
+REPEAT = 5
+
+random.seed(42)
+RAW_VALUES = [f"{random.randint(0, 9_999_999) / 100:.2f}" for _ in range(N)]
+JSON_NUMBERS = json.dumps([float(value) for value in RAW_VALUES])
+JSON_STRINGS = json.dumps(RAW_VALUES)
+DECIMALS = [Decimal(v) for v in RAW_VALUES]
+CENTS = [int(Decimal(v) * 100) for v in RAW_VALUES]
+
+_decimal_list = TypeAdapter(List[Decimal])
+_money_list = TypeAdapter(List[Money])
+
+# Tabela com os tipos antigos (Numeric) para a agregação no banco
+_legacy = MetaData()
+legacy_accounts = Table(
+    "bench_accounts_numeric", _legacy,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, index=True),
+    Column("is_credit", Boolean),
+    Column("balance", Numeric(15, 2)),
+    Column("credit_limit", Numeric(15, 2)),
+)
+
+
+def _validate_decimal(body: str):
+    # Caminho antigo: Pydantic cria o Decimal e o service reconverte com Decimal(str(...))
+    return [Decimal(str(value)) for value in _decimal_list.validate_json(body)]
+
+
+def _serialize_decimal():
+    json.dumps([float(value) for value in DECIMALS])
+
+
+def _serialize_cents():
+    json.dumps([cents_to_float(value) for value in CENTS])
+
+
+def _best(func) -> float:
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+async def _seed(accounts: int) -> None:
+    await create_schema(shard_router)
+    engine = shard_router.engines[shard_router.default]
+    async with engine.begin() as conn:
+        await conn.run_sync(_legacy.create_all)
+    rows = []
+    for index in range(accounts):
+        is_credit = index % 3 == 0
+        rows.append({
+            "id": index + 1,
+            "user_id": 1,
+            "is_credit": is_credit,
+            "balance": 0 if is_credit else random.randint(0, 1_000_000),
+            "credit_limit": random.randint(100_000, 2_000_000) if is_credit else None,
+        })
+    async with shard_router.session() as session:
+        await session.execute(insert(User), [
+            {"id": 1, "username": "ana", "email": "ana@example.com", "hashed_password": "x"}
+        ])
+        await session.execute(insert(Account), [{**row, "name": f"conta-{row['id']}"} for row in rows])
+        await session.execute(insert(Transaction), [
+            {"account_id": row["id"], "user_id": 1, "amount": -random.randint(0, 50_000), "description": "Compra"}
+            for row in rows if row["is_credit"]
+        ])
+        await session.execute(insert(legacy_accounts), [
+            {
+                **row,
+                "balance": Decimal(row["balance"]).scaleb(-2),
+                "credit_limit": Decimal(row["credit_limit"]).scaleb(-2) if row["credit_limit"] else None,
+            }
+            for row in rows
+        ])
+        await session.commit()
+
+
+async def _summary_numeric(session) -> dict:
+    # Mesma consulta de AccountRepository.get_summary, sobre as colunas Numeric
+    owed = -func.sum(Transaction.amount)
+    per_card = (
+        select(case((owed > 0, owed), else_=0).label("owed"))
+        .join(legacy_accounts, legacy_accounts.c.id == Transaction.account_id)
+        .where(legacy_accounts.c.user_id == 1)
+        .where(legacy_accounts.c.is_credit.is_(True))
+        .group_by(Transaction.account_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(
+            func.count(legacy_accounts.c.id).label("account_count"),
+            cast(func.coalesce(func.sum(
+                case((legacy_accounts.c.is_credit.is_(False), legacy_accounts.c.balance), else_=0)
+            ), 0), Numeric(15, 2)).label("total_balance"),
+            cast(func.coalesce(func.sum(
+                case((legacy_accounts.c.is_credit.is_(True), legacy_accounts.c.credit_limit), else_=0)
+            ), 0), Numeric(15, 2)).label("total_credit_limit"),
+            select(cast(func.coalesce(func.sum(per_card.c.owed), 0), BigInteger)).scalar_subquery()
+            .label("used_credit_limit"),
+        )
+        .where(legacy_accounts.c.user_id == 1)
+    )
+    return dict(result.one()._mapping)
+
+
+async def _time_query(query, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        async with shard_router.session() as session:
+            started = time.perf_counter()
+            await query(session)
+            timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+async def _aggregation(accounts: int, iterations: int):
+    try:
+        await _seed(accounts)
+        with warnings.catch_warnings():
+            # SQLite não tem DECIMAL nativo: o SQLAlchemy avisa a cada conversão
+            warnings.simplefilter("ignore")
+            old_t = await _time_query(_summary_numeric, iterations)
+        new_t = await _time_query(lambda session: AccountRepository(session).get_summary(1), iterations)
+        return old_t, new_t
+    finally:
+        await shard_router.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    results = [
+        ("validação (números JSON)",
+         _best(lambda: _validate_decimal(JSON_NUMBERS)), _best(lambda: _money_list.validate_json(JSON_NUMBERS))),
+        ("validação (strings JSON)",
+         _best(lambda: _validate_decimal(JSON_STRINGS)), _best(lambda: _money_list.validate_json(JSON_STRINGS))),
+        ("serialização", _best(_serialize_decimal), _best(_serialize_cents)),
+    ]
+    old_t, new_t = asyncio.run(_aggregation(args.accounts, args.iterations))
+    results.append((f"agregação SQL ({args.accounts} contas)", old_t, new_t))
+
+    print(f"Banco: {DATABASE_URL.split('://')[0]}; {N} valores por operação em memória")
+    print(f"{'operação':<32}{'Decimal (ms)':>14}{'centavos (ms)':>15}{'ganho':>8}")
+    for name, old_t, new_t in results:
+        print(f"{name:<32}{old_t * 1000:>14.2f}{new_t * 1000:>15.2f}{old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: categorização de transações com regras compiladas x loop ingênuo.
+
+O loop ingênuo avalia cada regra (em ordem de prioridade) contra cada linha,
+como faria uma implementação direta em Python.
+
+Uso:
+    python -m benchmarks.bench_rule_engine
+"""
+from types import SimpleNamespace
+import random
+import re
+import time
+
+from app.utils.rule_engine import CompiledRuleSet, SUBSTRING, REGEX
+
+RULES = 200
+ROWS = 50_000
+
+random.seed(7)
+WORDS = [
+    "uber", "ifood", "padaria", "mercado", "farmacia", "posto", "netflix", "spotify",
+    "amazon", "livraria", "cinema", "academia", "restaurante", "hotel", "pedagio",
+    "estacionamento", "loja", "shopping", "aluguel", "condominio", "energia", "agua",
+]
+
+
+def build_rules():
+    rules = []
+    for index in range(RULES):
+        word = random.choice(WORDS) + str(random.randint(0, 50))
+        kind = random.random()
+        rule = SimpleNamespace(
+            id=index, priority=random.randint(0, 1000), category=f"cat{index % 25}",
+            match_type=SUBSTRING, pattern=word, min_amount=None, max_amount=None, account_id=None,
+        )
+        if kind < 0.2:
+            rule.match_type = REGEX
+            rule.pattern = rf"{random.choice(WORDS)}\s*\d{{2}}"
+        elif kind < 0.3:
+            rule.min_amount = -random.randint(10_000, 100_000)
+            rule.max_amount = 0
+        rules.append(rule)
+    return rules
+
+
+def build_rows():
+    return [
+        {
+            "description": f"{random.choice(WORDS).upper()}{random.randint(0, 80)} *{random.randint(1000, 9999)} SAO PAULO",
+            "amount": -random.randint(100, 200_000),
+            "account_id": random.randint(1, 5),
+        }
+        for _ in range(ROWS)
+    ]
+
+
+def naive(rules, rows):
+    ordered = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+    compiled = {rule.id: re.compile(rule.pattern, re.IGNORECASE) for rule in ordered if rule.match_type == REGEX}
+    result = []
+    for row in rows:
+        description = row["description"].lower()
+        category = None
+        for rule in ordered:
+            if rule.match_type == SUBSTRING and rule.pattern.lower() not in description:
+                continue
+            if rule.match_type == REGEX and not compiled[rule.id].search(row["description"]):
+                continue
+            if rule.min_amount is not None and row["amount"] < rule.min_amount:
+                continue
+            if rule.max_amount is not None and row["amount"] > rule.max_amount:
+                continue
+            category = rule.category
+            break
+        result.append(category)
+    return result
+
+
+def main():
+    rules, rows = build_rules(), build_rows()
+
+    start = time.perf_counter()
+    expected = naive(rules, rows)
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = CompiledRuleSet(rules)
+    got = engine.classify_batch(rows)
+    compiled_time = time.perf_counter() - start
+
+    assert got == expected, "resultados divergentes"
+    print(f"{RULES} regras, {ROWS} linhas")
+    print(f"loop ingênuo:      {ROWS / naive_time:>12,.0f} linhas/s")
+    print(f"regras compiladas: {ROWS / compiled_time:>12,.0f} linhas/s ({naive_time / compiled_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
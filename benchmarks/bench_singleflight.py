@@ -0,0 +1,94 @@
+"""
+Benchmark: rajada de requisições simultâneas de um mesmo usuário (single-flight).
+
+Dispara BURST requisições GET /accounts em paralelo com o mesmo token e conta
+os SQLs executados e o tempo da rajada, com e sem coalescência das consultas
+(get_user_by_username em get_current_user e get_all_by_user).
+
+Roda em um SQLite temporário em arquivo (conexões independentes, como no
+Postgres); use DATABASE_URL para apontar para um banco descartável.
+
+Uso:
+    python -m benchmarks.bench_singleflight
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("DATABASE_ECHO", "false")
+os.environ.setdefault("CHAVE_SECRETA", "benchmark")
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, insert
+
+from app.models import User, Account
+from app.repositories import account_repository, user_repository
+from app.routes import account_route
+from app.utils.auth import create_access_token
+from database.database import shard_router
+from database.testing import create_schema
+
+BURST = 50
+ROUNDS = 20
+ACCOUNTS = 20
+
+
+async def _seed() -> None:
+    await create_schema(shard_router)
+    async with shard_router.session() as session:
+        await session.execute(insert(User), [
+            {"id": 1, "username": "ana", "email": "ana@example.com", "hashed_password": "x"}
+        ])
+        await session.execute(insert(Account), [
+            {"name": f"conta-{i}", "user_id": 1, "is_credit": False, "balance": i * 100}
+            for i in range(ACCOUNTS)
+        ])
+        await session.commit()
+
+
+def _set_enabled(enabled: bool) -> None:
+    user_repository._users_by_username.enabled = enabled
+    account_repository._accounts_by_user.enabled = enabled
+
+
+async def _bench(client: httpx.AsyncClient, headers: dict, statements: list, enabled: bool) -> None:
+    _set_enabled(enabled)
+    statements.clear()
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        responses = await asyncio.gather(*(client.get("/accounts", headers=headers) for _ in range(BURST)))
+        assert all(response.status_code == 200 for response in responses)
+    elapsed = time.perf_counter() - started
+    label = "single-flight" if enabled else "sem coalescência"
+    print(
+        f"{label:<18} {len(statements) / ROUNDS:7.1f} SQLs/rajada   "
+        f"{elapsed / ROUNDS * 1000:8.1f} ms/rajada ({BURST} requisições)"
+    )
+
+
+async def main() -> None:
+    await _seed()
+
+    statements = []
+    for engine in shard_router.engines.values():
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+
+    app = FastAPI()
+    app.include_router(account_route.router)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'ana'})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _bench(client, headers, statements, enabled=False)
+        await _bench(client, headers, statements, enabled=True)
+    await shard_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
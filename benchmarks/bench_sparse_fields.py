@@ -0,0 +1,113 @@
+"""
+Benchmark: listas grandes de contas com e sem ?fields= (sparse fieldsets).
+
+Um usuário com --accounts contas; mede GET /accounts, GET /accounts/export e
+a consulta do repositório com todos os campos e só com id,name,balance:
+tempo por requisição e tamanho da resposta.
+
+Roda por padrão em SQLite em memória; para medir no Postgres, aponte
+DATABASE_URL para um banco descartável:
+
+    python -m benchmarks.bench_sparse_fields
+    python -m benchmarks.bench_sparse_fields --accounts 50000 --iterations 10
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DATABASE_ECHO", "false")
+os.environ.setdefault("CHAVE_SECRETA", "benchmark")
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+from app.models import User, Account
+from app.repositories.account_repository import AccountRepository
+from app.routes import account_route
+from app.utils.auth import create_access_token
+from database.database import DATABASE_URL, shard_router
+from database.testing import create_schema
+
+LIST_FIELDS = ("id", "name", "balance")
+
+
+async def _seed(accounts: int) -> None:
+    random.seed(42)
+    await create_schema(shard_router)
+    async with shard_router.session() as session:
+        await session.execute(insert(User), [
+            {"id": 1, "username": "ana", "email": "ana@example.com", "hashed_password": "x"}
+        ])
+        rows = []
+        for index in range(accounts):
+            is_credit = index % 3 == 0
+            rows.append({
+                "name": f"conta-{index}",
+                "user_id": 1,
+                "is_credit": is_credit,
+                "balance": random.randint(0, 1_000_000),
+                "credit_limit": random.randint(100_000, 2_000_000) if is_credit else None,
+                "due_day": 10 if is_credit else None,
+            })
+        await session.execute(insert(Account), rows)
+        await session.commit()
+
+
+async def _timed_http(client, label: str, url: str, headers: dict, iterations: int) -> None:
+    size = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200, response.text
+        size = len(response.content)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {elapsed / iterations * 1000:8.1f} ms/req   {size / 1024:8.1f} KiB")
+
+
+async def _timed_repository(label: str, fields, iterations: int) -> None:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        # Sessão nova a cada iteração: objetos ORM não são reaproveitados do identity map
+        async with shard_router.session() as session:
+            await AccountRepository(session).get_all_by_user(1, fields)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {elapsed / iterations * 1000:8.1f} ms/op")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(f"Banco: {DATABASE_URL.split('@')[-1]}  ({args.accounts} contas)")
+    await _seed(args.accounts)
+
+    fields = ",".join(LIST_FIELDS)
+    await _timed_repository("repositório: todos os campos", None, args.iterations)
+    await _timed_repository(f"repositório: {fields}", LIST_FIELDS, args.iterations)
+
+    app = FastAPI()
+    app.include_router(account_route.router)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'ana'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await _timed_http(client, "GET /accounts", "/accounts", headers, args.iterations)
+        await _timed_http(client, f"GET /accounts?fields={fields}", f"/accounts?fields={fields}", headers, args.iterations)
+        await _timed_http(client, "GET /accounts/export", "/accounts/export", headers, args.iterations)
+        await _timed_http(
+            client, f"GET /accounts/export?fields={fields}",
+            f"/accounts/export?fields={fields}", headers, args.iterations
+        )
+    await shard_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,7 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import NullPool
+from database.sharding import ShardRouter, parse_shards
 import os
 from dotenv import load_dotenv
 
@@ -11,29 +12,66 @@ load_dotenv()
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
-DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@db:5432/{POSTGRES_DB}"
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
-# Cria o engine assíncrono
-engine = create_async_engine(DATABASE_URL, echo=True, poolclass=NullPool)
+# DATABASE_URL tem prioridade (ex.: sqlite+aiosqlite:// para testes e benchmarks locais);
+# sem ela, a URL é montada a partir das variáveis POSTGRES_* (docker-compose)
+DATABASE_URL = os.getenv("DATABASE_URL") or (
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+)
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "true").lower() == "true"
+
+# Pool de conexões limitado: esperar mais que DATABASE_POOL_TIMEOUT segundos por uma
+# conexão gera sqlalchemy.exc.TimeoutError (respondido com 503, ver app/middleware/admission.py).
+# DATABASE_POOL_SIZE=0 abre uma conexão por sessão (NullPool), ex.: atrás de um PgBouncer
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", 2))
+# Tempo máximo de cada comando SQL no Postgres (0 desativa)
+DATABASE_STATEMENT_TIMEOUT_MS = int(os.getenv("DATABASE_STATEMENT_TIMEOUT_MS", 10_000))
+
+if DATABASE_POOL_SIZE > 0:
+    POOL_OPTIONS = {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+else:
+    POOL_OPTIONS = {"poolclass": NullPool}
+
+# Shards: DATABASE_SHARDS="s0=postgresql+asyncpg://...;s1=..." (padrão: um único banco)
+DATABASE_SHARDS = parse_shards(os.getenv("DATABASE_SHARDS", "")) or {"default": DATABASE_URL}
+shard_router = ShardRouter(
+    DATABASE_SHARDS,
+    echo=DATABASE_ECHO,
+    statement_timeout_ms=DATABASE_STATEMENT_TIMEOUT_MS,
+    **POOL_OPTIONS,
+)
+
+# Cria o engine assíncrono (shard padrão: tabelas globais e instalação com um único banco)
+engine = shard_router.engines[shard_router.default]
 
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 # Configura a sessão assíncrona
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+AsyncSessionLocal = shard_router.sessionmakers[shard_router.default]
 
 # Base para os modelos
 Base = declarative_base()
 
 # Função para obter a sessão do banco de dados
+# (pelo router, para que testes possam religar as sessões, ver database/testing.py)
 async def get_db():
-    async with AsyncSessionLocal() as db:
+    async with shard_router.session() as db:
         yield db
 
 # Função para criar as tabelas
 async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+    # Metadata dos modelos da aplicação (a Base acima não tem tabelas registradas)
+    from app.models import Base as ModelsBase
+
+    for shard_engine in shard_router.engines.values():
+        async with shard_engine.begin() as conn:
+            await conn.run_sync(ModelsBase.metadata.create_all)
\ No newline at end of file
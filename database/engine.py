@@ -0,0 +1,80 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+import atexit
+import os
+import re
+import shutil
+import tempfile
+
+# Comandos que abrem a transação no SQLite (SAVEPOINT fora de uma transação também abriria)
+_WRITE_STATEMENT = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|SAVEPOINT)\b", re.IGNORECASE)
+
+
+def is_memory_url(url: str) -> bool:
+    """URL de um SQLite em memória (sqlite+aiosqlite:// ou .../:memory:)"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _private_database_url(url: str) -> str:
+    """Arquivo SQLite temporário que substitui o banco em memória (removido ao sair)"""
+    directory = tempfile.mkdtemp(prefix="finance-sqlite-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, "db.sqlite")
+    return make_url(url).set(database=path).render_as_string(hide_password=False)
+
+
+def create_engine(url: str, statement_timeout_ms: int = 0, **options) -> AsyncEngine:
+    """
+    Cria o engine assíncrono da URL, com os ajustes de cada backend.
+
+    Postgres (asyncpg): `statement_timeout_ms` é aplicado em cada conexão
+    (statement_timeout); comandos mais lentos são cancelados pelo servidor.
+
+    SQLite (aiosqlite), usado em testes e benchmarks locais:
+    - "Em memória" vira um arquivo temporário privado do engine (WAL), apagado
+      ao fim do processo: cada sessão tem a sua conexão e transação, como no
+      Postgres (uma conexão única compartilhada quebraria requisições com duas
+      sessões abertas e o scheduler rodando em paralelo). Cada engine tem o
+      seu banco, então execuções em paralelo não colidem
+    - Liga as foreign keys (ON DELETE CASCADE) e controla o BEGIN (ver
+      _begin_on_first_write), o que habilita SAVEPOINT e DDL transacional
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        if statement_timeout_ms:
+            server_settings = options.setdefault("connect_args", {}).setdefault("server_settings", {})
+            server_settings["statement_timeout"] = str(statement_timeout_ms)
+        return create_async_engine(url, **options)
+    if backend != "sqlite":
+        return create_async_engine(url, **options)
+
+    memory = is_memory_url(url)
+    if memory:
+        url = _private_database_url(url)
+    engine = create_async_engine(url, **options)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if memory:
+            # Leituras não bloqueiam a escrita; escritas concorrentes esperam (busy_timeout)
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _begin_on_first_write(connection, cursor, statement, parameters, context, executemany):
+        # A transação começa na primeira escrita, já com a trava de escrita (IMMEDIATE):
+        # escritas concorrentes esperam o busy_timeout em vez de falhar com
+        # "database is locked" ao promover uma leitura (SQLITE_BUSY_SNAPSHOT).
+        # Leituras antes da primeira escrita veem o último commit, como o
+        # READ COMMITTED do Postgres
+        sqlite_connection = connection.connection.dbapi_connection._connection  # aiosqlite.Connection
+        if _WRITE_STATEMENT.match(statement) and not sqlite_connection.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+    return engine
@@ -0,0 +1,16 @@
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+# SQLSTATE do Postgres para comando cancelado por statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """
+    Espera por conexão esgotada ou comando cancelado por statement_timeout.
+
+    Esses erros não devem ser capturados pelas rotas e serviços: chegam aos
+    handlers de app/middleware/admission.py, que respondem 503 + Retry-After.
+    """
+    if isinstance(exc, PoolTimeoutError):
+        return True
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
@@ -0,0 +1,325 @@
+"""
+Importação em lote de usuários a partir de um CSV (migração do sistema legado).
+
+Uso:
+    python -m database.import_users usuarios.csv
+    python -m database.import_users usuarios.csv --batch-size 5000 --workers 8
+    python -m database.import_users usuarios.csv --restart   # ignora o progresso salvo
+
+O CSV precisa das colunas username, email e password (senha em texto plano).
+O arquivo é lido em streaming, em lotes de --batch-size linhas:
+
+1. Cada linha é validada com UserCreate (email inválido, campo vazio etc.)
+2. Usernames e emails repetidos no arquivo ou já existentes no banco (em todos
+   os shards, com uma consulta IN por lote) são descartados antes do hash
+3. As senhas são criptografadas em um pool de processos (--workers, padrão:
+   todos os núcleos) com o mesmo pwd_context de app/utils/auth.py
+4. As linhas são gravadas no shard de cada username com COPY (Postgres) ou
+   INSERT em lote (outros bancos), em uma transação por shard
+
+As linhas descartadas vão para <csv>.rejects.csv (sem a senha). O número de
+linhas já processadas é salvo em <csv>.progress após cada lote: se a
+importação for interrompida, basta executá-la novamente para continuar do
+último lote confirmado. Antes de gravar um lote, o progresso registra a última
+linha dele (written_until): na retomada, as linhas até ela que já estão no
+banco foram gravadas antes da interrupção e contam como importadas
+("já importado"), não como duplicadas.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from app.models import User
+from app.schemas.user_schema import UserCreate
+from app.utils.auth import hash_passwords
+from database.database import shard_router
+from database.sharding import ShardRouter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 5_000
+
+COPY_COLUMNS = ["username", "email", "hashed_password"]
+REJECT_COLUMNS = ["line", "username", "email", "reason"]
+
+
+def _read_batches(path: str, skip: int, batch_size: int) -> Iterator[List[Tuple[int, dict]]]:
+    """Lê o CSV em streaming, pulando as `skip` primeiras linhas de dados já processadas"""
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        missing = {"username", "email", "password"}.difference(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Colunas ausentes no CSV: {', '.join(sorted(missing))}")
+        # Linha 1 é o cabeçalho: a primeira linha de dados é a 2
+        rows = enumerate(reader, start=2)
+        for _ in itertools.islice(rows, skip):
+            pass
+        while batch := list(itertools.islice(rows, batch_size)):
+            yield batch
+
+
+def _load_progress(path: str) -> Dict[str, int]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "written_until": 0}
+
+
+def _save_progress(path: str, progress: Dict[str, int]) -> None:
+    # Grava em um arquivo temporário e substitui: o progresso nunca fica pela metade
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(progress, file)
+    os.replace(tmp_path, path)
+
+
+async def find_existing(router: ShardRouter, usernames: List[str], emails: List[str]) -> Tuple[Set[str], Set[str]]:
+    """Usernames e emails do lote que já existem em algum shard"""
+    users = User.__table__
+
+    async def run(shard, session):
+        found_usernames = (await session.execute(
+            select(users.c.username).where(users.c.username.in_(usernames))
+        )).scalars().all()
+        found_emails = (await session.execute(
+            select(users.c.email).where(users.c.email.in_(emails))
+        )).scalars().all()
+        return found_usernames, found_emails
+
+    results = await router.fan_out(run)
+    existing_usernames = {username for found, _ in results.values() for username in found}
+    existing_emails = {email for _, found in results.values() for email in found}
+    return existing_usernames, existing_emails
+
+
+async def copy_users(router: ShardRouter, shard: str, rows: List[dict]) -> None:
+    """Grava os usuários no shard com COPY (Postgres) ou INSERT em lote, em uma transação"""
+    async with router.engines[shard].begin() as conn:
+        if conn.dialect.name == "postgresql":
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                User.__tablename__,
+                records=[tuple(row[column] for column in COPY_COLUMNS) for row in rows],
+                columns=COPY_COLUMNS,
+            )
+        else:
+            await conn.execute(insert(User.__table__), rows)
+
+
+class UserImporter:
+    """
+    Importa os lotes do CSV: validação, descarte de duplicados, hash em
+    processos separados e gravação por shard.
+    """
+
+    def __init__(
+        self, router: ShardRouter, pool: ProcessPoolExecutor, workers: int, rejects, resume_until: int = 0
+    ):
+        self.router = router
+        self.pool = pool
+        self.workers = workers
+        self.rejects = rejects
+        # Linhas até esta podem ter sido gravadas pela execução interrompida
+        self.resume_until = resume_until
+        # Vistos nesta execução (duplicados dentro do próprio arquivo)
+        self.seen_usernames: Set[str] = set()
+        self.seen_emails: Set[str] = set()
+
+    def _reject(self, line: int, row: dict, reason: str) -> None:
+        self.rejects.writerow([line, row.get("username"), row.get("email"), reason])
+
+    def _validate(self, batch: List[Tuple[int, dict]], progress: Dict[str, int]) -> List[Tuple[int, UserCreate]]:
+        valid = []
+        for line, row in batch:
+            try:
+                user = UserCreate.model_validate(row)
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                self._reject(line, row, f"inválido ({errors})")
+                progress["invalid"] += 1
+                continue
+            if not user.username or not user.password:
+                self._reject(line, row, "inválido (username e password são obrigatórios)")
+                progress["invalid"] += 1
+                continue
+            valid.append((line, user))
+        return valid
+
+    async def _drop_duplicates(
+        self, users: List[Tuple[int, UserCreate]], progress: Dict[str, int]
+    ) -> List[Tuple[int, UserCreate]]:
+        existing_usernames, existing_emails = await find_existing(
+            self.router, [user.username for _, user in users], [user.email for _, user in users]
+        )
+        unique = []
+        for line, user in users:
+            if user.username in self.seen_usernames:
+                reason = "username repetido no arquivo"
+            elif user.email in self.seen_emails:
+                reason = "email repetido no arquivo"
+            elif line <= self.resume_until and user.username in existing_usernames \
+                    and user.email in existing_emails:
+                # Gravada pela execução interrompida antes de o progresso ser salvo
+                logger.debug(f"Linha {line}: já importado")
+                self.seen_usernames.add(user.username)
+                self.seen_emails.add(user.email)
+                progress["imported"] += 1
+                continue
+            elif user.username in existing_usernames:
+                reason = "username já existe no banco"
+            elif user.email in existing_emails:
+                reason = "email já existe no banco"
+            else:
+                self.seen_usernames.add(user.username)
+                self.seen_emails.add(user.email)
+                unique.append((line, user))
+                continue
+            self._reject(line, user.model_dump(), reason)
+            progress["duplicates"] += 1
+        return unique
+
+    async def _hash(self, passwords: List[str]) -> List[str]:
+        # Alguns blocos por processo equilibram a carga sem excesso de IPC
+        size = max(1, -(-len(passwords) // (self.workers * 4)))
+        chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        loop = asyncio.get_running_loop()
+        hashed = await asyncio.gather(*(loop.run_in_executor(self.pool, hash_passwords, chunk) for chunk in chunks))
+        return [password for chunk in hashed for password in chunk]
+
+    async def _write_shard(self, shard: str, rows: List[Tuple[int, dict]], progress: Dict[str, int]) -> int:
+        try:
+            await copy_users(self.router, shard, [row for _, row in rows])
+            return len(rows)
+        except IntegrityError:
+            # Cadastro concorrente entre a verificação e a gravação: verifica as
+            # linhas de novo e grava só as que continuam disponíveis
+            logger.warning(f"[{shard}] Conflito de unicidade ao gravar o lote; verificando novamente")
+            existing_usernames, existing_emails = await find_existing(
+                self.router, [row["username"] for _, row in rows], [row["email"] for _, row in rows]
+            )
+            remaining = []
+            for line, row in rows:
+                if row["username"] in existing_usernames or row["email"] in existing_emails:
+                    self._reject(line, row, "já existe no banco")
+                    progress["duplicates"] += 1
+                else:
+                    remaining.append((line, row))
+            if not remaining:
+                return 0
+            try:
+                await copy_users(self.router, shard, [row for _, row in remaining])
+                return len(remaining)
+            except IntegrityError:
+                # Novos cadastros concorrentes: grava linha a linha para isolar os conflitos
+                logger.warning(f"[{shard}] Novo conflito de unicidade; gravando o lote linha a linha")
+                return await self._write_rows(shard, remaining, progress)
+
+    async def _write_rows(self, shard: str, rows: List[Tuple[int, dict]], progress: Dict[str, int]) -> int:
+        """Grava uma linha por transação; as que violam a unicidade são descartadas"""
+        written = 0
+        for line, row in rows:
+            try:
+                await copy_users(self.router, shard, [row])
+                written += 1
+            except IntegrityError:
+                self._reject(line, row, "já existe no banco")
+                progress["duplicates"] += 1
+        return written
+
+    async def import_batch(self, batch: List[Tuple[int, dict]], progress: Dict[str, int]) -> None:
+        users = self._validate(batch, progress)
+        users = await self._drop_duplicates(users, progress) if users else []
+        if users:
+            hashed = await self._hash([user.password for _, user in users])
+            by_shard: Dict[str, List[Tuple[int, dict]]] = {}
+            for (line, user), hashed_password in zip(users, hashed):
+                by_shard.setdefault(self.router.shard_for(user.username), []).append((line, {
+                    "username": user.username,
+                    "email": user.email,
+                    "hashed_password": hashed_password,
+                }))
+            written = await asyncio.gather(
+                *(self._write_shard(shard, rows, progress) for shard, rows in by_shard.items())
+            )
+            progress["imported"] += sum(written)
+        progress["rows"] += len(batch)
+
+
+async def import_users(
+    router: ShardRouter,
+    path: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, int]:
+    """Importa os usuários do CSV e retorna os totais (linhas, importados, duplicados, inválidos)"""
+    workers = workers or os.cpu_count() or 1
+    progress_path = f"{path}.progress"
+    rejects_path = f"{path}.rejects.csv"
+    if restart:
+        for stale in (progress_path, rejects_path):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    progress = _load_progress(progress_path)
+    progress.setdefault("written_until", 0)
+    resume_until = progress["written_until"]
+    if progress["rows"]:
+        logger.info(f"Retomando após {progress['rows']} linhas já processadas")
+
+    started = time.perf_counter()
+    imported_before = progress["imported"]
+    new_rejects = not os.path.exists(rejects_path)
+    with open(rejects_path, "a", newline="", encoding="utf-8") as rejects_file, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        rejects = csv.writer(rejects_file)
+        if new_rejects:
+            rejects.writerow(REJECT_COLUMNS)
+        importer = UserImporter(router, pool, workers, rejects, resume_until)
+
+        for batch in _read_batches(path, progress["rows"], batch_size):
+            # Registrado antes da gravação: uma interrupção no meio do lote é reconhecida na retomada
+            progress["written_until"] = max(progress["written_until"], batch[-1][0])
+            _save_progress(progress_path, progress)
+            await importer.import_batch(batch, progress)
+            rejects_file.flush()
+            _save_progress(progress_path, progress)
+            rate = (progress["imported"] - imported_before) / (time.perf_counter() - started)
+            logger.info(
+                f"{progress['rows']} linhas: {progress['imported']} importados, "
+                f"{progress['duplicates']} duplicados, {progress['invalid']} inválidos ({rate:.0f} usuários/s)"
+            )
+    return progress
+
+
+async def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_path")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, help="processos de hash (padrão: número de núcleos)")
+    parser.add_argument("--restart", action="store_true", help="ignora o progresso salvo e recomeça do início")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        progress = await import_users(shard_router, args.csv_path, args.batch_size, args.workers, args.restart)
+        print(
+            f"{progress['imported']} importados, {progress['duplicates']} duplicados, "
+            f"{progress['invalid']} inválidos ({progress['rows']} linhas)"
+        )
+    finally:
+        await shard_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
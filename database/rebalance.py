@@ -0,0 +1,203 @@
+"""
+Ferramenta de sharding: sequências intercaladas e movimentação de usuários entre shards.
+
+Uso:
+    python -m database.rebalance init-sequences       # uma vez, após configurar DATABASE_SHARDS
+    python -m database.rebalance plan                 # lista usuários fora do shard do hash
+    python -m database.rebalance move --username joao [--to s1]
+    python -m database.rebalance rebalance [--limit 1000]
+
+A movimentação é online: as linhas do usuário e de suas contas ficam
+travadas (FOR UPDATE) no shard de origem enquanto são copiadas, e só são
+removidas depois que a cópia foi confirmada no destino. Se a ferramenta for
+interrompida, basta executá-la novamente.
+"""
+from sqlalchemy import select, insert, delete, func, text
+from app.models import User, Account, ScheduledTransfer, Transaction, CategoryRule, IdempotencyKey
+from database.database import shard_router
+from database.sharding import ShardRouter
+from typing import Optional
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+COPY_BATCH_SIZE = 5_000
+
+# Tabelas com dados de um usuário, na ordem de inserção (respeita as FKs)
+USER_TABLES = [
+    (User.__table__, "id"),
+    (Account.__table__, "user_id"),
+    (ScheduledTransfer.__table__, "user_id"),
+    (Transaction.__table__, "user_id"),
+    (CategoryRule.__table__, "user_id"),
+]
+
+SEQUENCE_TABLES = [table for table, _ in USER_TABLES] + [IdempotencyKey.__table__]
+
+
+async def init_sequences(router: ShardRouter) -> None:
+    """
+    Intercala as sequências de ID entre os shards (shard i gera i+1, i+1+N, ...),
+    tornando os IDs globalmente únicos e preservados ao mover usuários.
+    """
+    count = len(router.names)
+    for index, shard in enumerate(router.names):
+        async with router.engines[shard].begin() as conn:
+            for table in SEQUENCE_TABLES:
+                sequence = (await conn.execute(
+                    text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.name}
+                )).scalar()
+                if sequence is None:
+                    continue
+                max_id = (await conn.execute(select(func.coalesce(func.max(table.c.id), 0)))).scalar()
+                start = max_id + 1
+                start += (index + 1 - start) % count
+                await conn.execute(text(f"ALTER SEQUENCE {sequence} INCREMENT BY {count} RESTART WITH {start}"))
+                logger.info(f"[{shard}] {sequence}: início {start}, incremento {count}")
+
+
+async def check_sequences(router: ShardRouter) -> None:
+    """
+    Falha se houver vários shards e as sequências de ID não estiverem intercaladas.
+    Caches, single-flight, eventos, idempotência e auditoria são indexados pelo
+    user_id: dois usuários com o mesmo id em shards diferentes compartilhariam dados.
+    """
+    if not router.is_sharded:
+        return
+    count = len(router.names)
+    for index, shard in enumerate(router.names):
+        async with router.engines[shard].connect() as conn:
+            if conn.dialect.name != "postgresql":
+                raise RuntimeError(
+                    f"Shard {shard}: IDs globalmente únicos exigem Postgres (sequências intercaladas); "
+                    f"{conn.dialect.name} não pode ser usado com vários shards"
+                )
+            for table in SEQUENCE_TABLES:
+                sequence = (await conn.execute(
+                    text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.name}
+                )).scalar()
+                if sequence is None:
+                    continue
+                increment = (await conn.execute(
+                    text("SELECT seqincrement FROM pg_sequence WHERE seqrelid = CAST(:sequence AS regclass)"),
+                    {"sequence": sequence},
+                )).scalar()
+                last_value, is_called = (await conn.execute(
+                    text(f"SELECT last_value, is_called FROM {sequence}")
+                )).one()
+                next_value = last_value + increment if is_called else last_value
+                if increment != count or next_value % count != (index + 1) % count:
+                    raise RuntimeError(
+                        f"Shard {shard}: a sequência {sequence} não está intercalada entre os {count} shards; "
+                        "execute `python -m database.rebalance init-sequences`"
+                    )
+
+
+async def _copy_rows(src, dst, table, column: str, user_id: int) -> int:
+    """Copia as linhas do usuário em lotes (keyset por id), preservando os IDs"""
+    copied, last_id = 0, 0
+    # Colunas geradas (ex.: transactions.description_tsv) são recalculadas no destino
+    columns = [table_column for table_column in table.c if table_column.computed is None]
+    while True:
+        rows = (await src.execute(
+            select(*columns)
+            .where(table.c[column] == user_id)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(COPY_BATCH_SIZE)
+        )).mappings().all()
+        if not rows:
+            return copied
+        await dst.execute(insert(table), [dict(row) for row in rows])
+        copied += len(rows)
+        last_id = rows[-1]["id"]
+
+
+async def move_user(router: ShardRouter, username: str, target: Optional[str] = None) -> bool:
+    """Move um usuário (e todos os seus dados) para o shard de destino"""
+    users = User.__table__
+    target = target or router.shard_for(username)
+
+    source = None
+    for shard in router.names:
+        async with router.engines[shard].connect() as conn:
+            if (await conn.execute(select(users.c.id).where(users.c.username == username))).first():
+                if shard != target:
+                    source = shard
+                    break
+    if source is None:
+        logger.info(f"{username}: nada a mover")
+        return False
+
+    async with router.engines[source].connect() as src:
+        async with src.begin():
+            user_id = (await src.execute(
+                select(users.c.id).where(users.c.username == username).with_for_update()
+            )).scalar()
+            # Trava as contas para que escritas concorrentes aguardem a movimentação
+            accounts = Account.__table__
+            await src.execute(select(accounts.c.id).where(accounts.c.user_id == user_id).with_for_update())
+
+            async with router.engines[target].begin() as dst:
+                already_copied = (await dst.execute(select(users.c.id).where(users.c.id == user_id))).first()
+                if not already_copied:
+                    for table, column in USER_TABLES:
+                        copied = await _copy_rows(src, dst, table, column, user_id)
+                        logger.info(f"{username}: {copied} linhas de {table.name} copiadas")
+
+            for table, column in reversed(USER_TABLES):
+                await src.execute(delete(table).where(table.c[column] == user_id))
+
+    logger.info(f"{username}: movido de {source} para {target}")
+    return True
+
+
+async def misplaced_users(router: ShardRouter):
+    """Retorna (username, shard atual, shard do hash) dos usuários fora do lugar"""
+    users = User.__table__
+
+    async def run(shard, session):
+        result = await session.execute(select(users.c.username))
+        return [
+            (username, shard, router.shard_for(username))
+            for username in result.scalars()
+            if router.shard_for(username) != shard
+        ]
+
+    results = await router.fan_out(run)
+    return [item for shard in router.names for item in results[shard]]
+
+
+async def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init-sequences")
+    commands.add_parser("plan")
+    move = commands.add_parser("move")
+    move.add_argument("--username", required=True)
+    move.add_argument("--to", dest="target")
+    rebalance = commands.add_parser("rebalance")
+    rebalance.add_argument("--limit", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.command == "init-sequences":
+            await init_sequences(shard_router)
+        elif args.command == "plan":
+            for username, current, expected in await misplaced_users(shard_router):
+                print(f"{username}: {current} -> {expected}")
+        elif args.command == "move":
+            await move_user(shard_router, args.username, args.target)
+        elif args.command == "rebalance":
+            pending = await misplaced_users(shard_router)
+            for username, _, expected in pending[:args.limit]:
+                await move_user(shard_router, username, expected)
+    finally:
+        await shard_router.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
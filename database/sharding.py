@@ -0,0 +1,98 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from database.engine import create_engine
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+
+def parse_shards(value: str) -> Dict[str, str]:
+    """Converte "s0=postgresql+asyncpg://...;s1=..." em {nome: url}"""
+    shards = {}
+    for item in filter(None, (part.strip() for part in value.split(";"))):
+        name, _, url = item.partition("=")
+        if not url:
+            raise ValueError(f"Shard inválido em DATABASE_SHARDS: {item!r}")
+        shards[name.strip()] = url.strip()
+    return shards
+
+
+class HashRing:
+    """Hash consistente com nós virtuais: adicionar um shard move só ~1/N das chaves"""
+
+    def __init__(self, nodes: List[str], vnodes: int = 160):
+        self._ring = sorted(
+            (_hash(f"{node}#{index}"), node) for node in nodes for index in range(vnodes)
+        )
+        self._hashes = [item[0] for item in self._ring]
+
+    def get(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class ShardRouter:
+    """
+    Mapa de shards: resolve o banco de cada usuário pelo hash consistente do username.
+
+    Os IDs são globalmente únicos (sequências intercaladas por shard, ver
+    `python -m database.rebalance init-sequences`), então caches e eventos
+    indexados por user_id continuam válidos com vários shards. A aplicação
+    não inicia se as sequências não estiverem intercaladas (check_sequences).
+    """
+
+    def __init__(self, shards: Dict[str, str], **engine_options):
+        if not shards:
+            raise ValueError("Nenhum shard configurado")
+        self.names: List[str] = list(shards)
+        self.urls = dict(shards)
+        self.engines = {name: create_engine(url, **engine_options) for name, url in shards.items()}
+        self.sessionmakers = {
+            name: sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            for name, engine in self.engines.items()
+        }
+        self.ring = HashRing(self.names)
+
+    @property
+    def is_sharded(self) -> bool:
+        return len(self.names) > 1
+
+    @property
+    def default(self) -> str:
+        """Shard das tabelas globais (ex.: idempotency_keys)"""
+        return self.names[0]
+
+    def shard_for(self, username: str) -> str:
+        return self.ring.get(username) if self.is_sharded else self.default
+
+    def session(self, shard: Optional[str] = None) -> AsyncSession:
+        """Abre uma sessão no shard informado (ou no padrão)"""
+        return self.sessionmakers[shard or self.default]()
+
+    async def fan_out(self, func: Callable[[str, AsyncSession], Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Executa `func(shard, sessão)` em todos os shards concorrentemente.
+        Se um shard falha (ou a chamada é cancelada), os demais são cancelados.
+        """
+        async def run(shard: str):
+            async with self.session(shard) as session:
+                return await func(shard, session)
+
+        tasks = [asyncio.ensure_future(run(shard)) for shard in self.names]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return dict(zip(self.names, results))
+
+    async def dispose(self) -> None:
+        for engine in self.engines.values():
+            await engine.dispose()
@@ -0,0 +1,88 @@
+"""
+Utilitários de banco para testes e benchmarks locais.
+
+Com DATABASE_URL=sqlite+aiosqlite:// cada engine tem o seu banco privado,
+então suítes podem rodar em paralelo (um banco por worker). As fixtures da
+suíte estão em tests/conftest.py:
+
+- rollback_transaction: testes de repositório/serviço com uma sessão por vez;
+  tudo é desfeito ao final
+- isolated_database: testes de rota; cada teste recebe bancos novos e vazios.
+  Uma requisição abre várias sessões ao mesmo tempo (autenticação,
+  idempotência, auditoria), e sessões intercaladas na mesma conexão liberam
+  os SAVEPOINTs umas das outras, então não podem compartilhar a transação
+  de rollback_transaction
+"""
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from database.engine import create_engine
+from database.sharding import ShardRouter
+from typing import AsyncIterator
+import os
+import shutil
+
+
+async def create_schema(router: ShardRouter) -> None:
+    """Cria as tabelas dos modelos em todos os shards"""
+    from app.models import Base
+
+    for engine in router.engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+
+@asynccontextmanager
+async def rollback_transaction(router: ShardRouter, create_tables: bool = True) -> AsyncIterator[sessionmaker]:
+    """
+    Liga todas as sessões do router a uma transação externa no shard padrão
+    e a desfaz ao sair. As sessões devem ser usadas uma de cada vez (ver o
+    docstring do módulo).
+    - Os commits dos repositórios viram SAVEPOINTs (join_transaction_mode)
+    - Com `create_tables`, o schema é criado dentro da própria transação
+      (DDL transacional no SQLite e no Postgres) e some junto com ela
+    """
+    from app.models import Base
+
+    engine = router.engines[router.default]
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        if create_tables:
+            await connection.run_sync(Base.metadata.create_all)
+
+        session_factory = sessionmaker(
+            bind=connection,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        original = router.sessionmakers
+        router.sessionmakers = {name: session_factory for name in original}
+        try:
+            yield session_factory
+        finally:
+            router.sessionmakers = original
+            await transaction.rollback()
+
+
+@asynccontextmanager
+async def isolated_database(router: ShardRouter, create_tables: bool = True) -> AsyncIterator[ShardRouter]:
+    """
+    Troca os bancos de todos os shards do router por SQLites privados e vazios,
+    removidos ao sair. Cada sessão tem a sua conexão, como em produção.
+    """
+    original = (router.engines, router.sessionmakers)
+    router.engines = {name: create_engine("sqlite+aiosqlite://") for name in router.names}
+    router.sessionmakers = {
+        name: sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        for name, engine in router.engines.items()
+    }
+    try:
+        if create_tables:
+            await create_schema(router)
+        yield router
+    finally:
+        for engine in router.engines.values():
+            await engine.dispose()
+            shutil.rmtree(os.path.dirname(engine.url.database), ignore_errors=True)
+        router.engines, router.sessionmakers = original
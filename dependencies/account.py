@@ -1,11 +1,25 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from database.database import get_db
+from database.database import shard_router
+from dependencies.auth import get_user_db, get_current_user_with_accounts
+from app.models.user_model import User
 from app.repositories.account_repository import AccountRepository
 from app.services.account_service import AccountService
+from app.services.export_service import ExportService
 
 
-def get_account_service(db: Session = Depends(get_db)):
+def get_account_service(db: Session = Depends(get_user_db)):
     """Retorna uma instância do UserService."""
     account_repository = AccountRepository(db)
-    return AccountService(account_repository)
\ No newline at end of file
+    return AccountService(account_repository)
+
+
+async def get_dashboard_account_service(current_user: User = Depends(get_current_user_with_accounts)):
+    """AccountService no shard do usuário, para rotas autenticadas com as contas carregadas"""
+    async with shard_router.session(getattr(current_user, "shard", None)) as db:
+        yield AccountService(AccountRepository(db))
+
+
+def get_export_service():
+    """Retorna uma instância do ExportService."""
+    return ExportService(shard_router)
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.user_repository import UserRepository
 from app.models.user_model import User
 from app.utils.auth import SECRET_KEY, ALGORITHM
-from database.database import async_session  # Importe a sessão diretamente
+from database.database import shard_router  # Importe a sessão diretamente
 from typing import Optional
 import logging
 
@@ -18,11 +18,11 @@ oauth2_scheme = OAuth2PasswordBearer(
     auto_error=True
 )
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def _authenticate(token: str, with_accounts: bool = False) -> User:
     """
     Versão simplificada e segura sem get_async_session.
     - Valida o token JWT
-    - Busca o usuário no banco
+    - Busca o usuário no banco (com as contas, se pedido)
     - Trata erros específicos
     """
     credentials_exception = HTTPException(
@@ -44,9 +44,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             raise credentials_exception
 
         # 2. Busca o usuário (com sessão direta)
-        async with async_session() as session:
-            repo = UserRepository(session)
-            user = await repo.get_user_by_username(username)
+        async with shard_router.session() as session:
+            repo = UserRepository(session, shard_router)
+            user = await repo.get_user_by_username(username, with_accounts=with_accounts)
             
             if not user:
                 raise credentials_exception
@@ -57,10 +57,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     except JWTError as e:
         logger.warning(f"Token inválido: {e}")
         raise credentials_exception
-    except Exception as e:
-        logger.error(f"Erro inesperado: {e}", exc_info=True)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Usuário autenticado pelo token JWT"""
+    return await _authenticate(token)
+
+
+async def get_current_user_with_accounts(token: str = Depends(oauth2_scheme)) -> User:
+    """Usuário autenticado com User.accounts já carregado (mesma busca da autenticação)"""
+    return await _authenticate(token, with_accounts=True)
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Garante que o usuário autenticado é administrador"""
+    if not current_user.is_admin:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro interno ao validar credenciais"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores",
         )
-    
\ No newline at end of file
+    return current_user
+
+
+async def get_user_db(current_user: User = Depends(get_current_user)):
+    """Sessão no shard do usuário autenticado"""
+    async with shard_router.session(getattr(current_user, "shard", None)) as db:
+        yield db
@@ -0,0 +1,11 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from database.database import get_db
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services.idempotency_service import IdempotencyService
+
+
+def get_idempotency_service(db: Session = Depends(get_db)):
+    """Retorna uma instância do IdempotencyService."""
+    idempotency_repository = IdempotencyRepository(db)
+    return IdempotencyService(idempotency_repository)
@@ -0,0 +1,11 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from dependencies.auth import get_user_db
+from app.repositories.schedule_repository import ScheduleRepository
+from app.repositories.account_repository import AccountRepository
+from app.services.schedule_service import ScheduleService
+
+
+def get_schedule_service(db: Session = Depends(get_user_db)):
+    """Retorna uma instância do ScheduleService."""
+    return ScheduleService(ScheduleRepository(db), AccountRepository(db))
@@ -0,0 +1,22 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from dependencies.auth import get_user_db
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.account_repository import AccountRepository
+from app.repositories.category_rule_repository import CategoryRuleRepository
+from app.services.transaction_service import TransactionService
+from app.services.category_rule_service import CategoryRuleService
+
+
+def get_category_rule_service(db: Session = Depends(get_user_db)):
+    """Retorna uma instância do CategoryRuleService."""
+    return CategoryRuleService(CategoryRuleRepository(db), AccountRepository(db))
+
+
+def get_transaction_service(
+    db: Session = Depends(get_user_db),
+    rule_service: CategoryRuleService = Depends(get_category_rule_service),
+):
+    """Retorna uma instância do TransactionService."""
+    transaction_repository = TransactionRepository(db)
+    return TransactionService(transaction_repository, AccountRepository(db), rule_service)
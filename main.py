@@ -1,10 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from app.routes import user_routes, auth, account_route
+from app.routes import user_routes, auth, account_route, schedule_route, category_rule_route, debug_route
+from app.services.scheduler_service import transfer_scheduler
+from app.services.event_bus import event_bus
+from app.services.audit_log import audit_log
+from app.middleware.admission import setup_admission_control
+from app.middleware.profiling import ProfilingMiddleware, PROFILING_ENABLED, RESPONSE_CLASS
+from database.database import DATABASE_URL, create_tables, shard_router
+from database.engine import is_memory_url
+from database.rebalance import check_sequences
+import os
+
+# Executa o scheduler de transferências neste processo (desative com SCHEDULER_ENABLED=false)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inicialização
+    if is_memory_url(DATABASE_URL):
+        # Banco em memória sempre começa vazio (execução local/benchmarks)
+        await create_tables()
+    # Com vários shards, os IDs precisam ser globalmente únicos (init-sequences)
+    await check_sequences(shard_router)
+    await event_bus.start()
+    audit_log.start()
+    if SCHEDULER_ENABLED:
+        transfer_scheduler.start()
+    yield
+    # Encerramento
+    await transfer_scheduler.stop()
+    await audit_log.stop()  # grava os eventos de auditoria pendentes
+    await event_bus.stop()
+    await shard_router.dispose()  # fecha as conexões do pool
 
 # Cria uma instância do FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=RESPONSE_CLASS)
+setup_admission_control(app)
+if PROFILING_ENABLED:
+    # Registrado por último: envolve também a espera no controle de admissão
+    app.add_middleware(ProfilingMiddleware)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
@@ -12,6 +48,9 @@ templates = Jinja2Templates(directory="app/templates")
 app.include_router(user_routes.router)
 app.include_router(auth.router)
 app.include_router(account_route.router)
+app.include_router(schedule_route.router)
+app.include_router(category_rule_route.router)
+app.include_router(debug_route.router)
 
 # Rota raiz
 @app.get("/")
@@ -0,0 +1,89 @@
+"""
+Fixtures da suíte (SQLite privado por processo, sem docker-compose):
+
+- db: sessão dentro de uma transação desfeita ao final (rollback_transaction)
+- client: cliente HTTP da aplicação sobre bancos novos a cada teste
+  (isolated_database), já que uma requisição abre várias sessões ao mesmo tempo
+
+    python -m pytest -q
+"""
+import os
+
+# Configuração antes de importar a aplicação (lida na importação dos módulos)
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DATABASE_ECHO", "false")
+os.environ.setdefault("CHAVE_SECRETA", "chave-de-teste")
+os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.models import User
+from app.services import account_service, category_rule_service, idempotency_service
+from app.utils.auth import create_access_token
+from database.database import shard_router
+from database.testing import isolated_database, rollback_transaction
+from main import app
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Conexões do pool (threads do aiosqlite) impediriam o processo de terminar
+    asyncio.run(shard_router.dispose())
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Os IDs recomeçam a cada teste (schema recriado): caches do processo não podem vazar
+    for cache in (
+        account_service._summary_cache,
+        account_service._summary_generations,
+        category_rule_service._compiled_rules,
+        idempotency_service._response_cache,
+    ):
+        cache.clear()
+    yield
+
+
+@pytest.fixture
+async def db():
+    """Sessão cujas alterações são desfeitas ao final do teste"""
+    async with rollback_transaction(shard_router) as session_factory:
+        async with session_factory() as session:
+            yield session
+
+
+@pytest.fixture
+async def database():
+    """Bancos novos e vazios para o teste (as sessões da aplicação usam eles)"""
+    async with isolated_database(shard_router) as router:
+        yield router
+
+
+@pytest.fixture
+async def client(database):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def user(database):
+    async with database.session() as session:
+        await session.execute(insert(User), [
+            {"id": 1, "username": "ana", "email": "ana@example.com", "hashed_password": "x"}
+        ])
+        await session.commit()
+    return {"id": 1, "username": "ana"}
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user['username']})}"}
@@ -0,0 +1,173 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.account_service import AccountService, invalidate_summary
+
+pytestmark = pytest.mark.anyio
+
+DEBIT = {"name": "Conta Corrente", "is_credit": False, "balance": 150.25}
+CREDIT = {"name": "Cartão", "is_credit": True, "credit_limit": 1000, "due_day": 10}
+
+
+async def _create(client, headers, payload, **extra_headers):
+    return await client.post("/accounts", json=payload, headers={**headers, **extra_headers})
+
+
+async def test_create_and_list_accounts(client, auth_headers):
+    response = await _create(client, auth_headers, DEBIT)
+    assert response.status_code == 201
+    assert response.json()["balance"] == 150.25
+
+    response = await client.get("/accounts", headers=auth_headers)
+    assert response.status_code == 200
+    assert [account["name"] for account in response.json()] == ["Conta Corrente"]
+
+
+async def test_idempotent_create_replays_original_response(client, auth_headers):
+    first = await _create(client, auth_headers, DEBIT, **{"Idempotency-Key": "abc"})
+    replay = await _create(client, auth_headers, DEBIT, **{"Idempotency-Key": "abc"})
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    accounts = (await client.get("/accounts", headers=auth_headers)).json()
+    assert len(accounts) == 1
+
+
+async def test_idempotency_key_reused_with_other_body(client, auth_headers):
+    await _create(client, auth_headers, DEBIT, **{"Idempotency-Key": "abc"})
+    response = await _create(client, auth_headers, {**DEBIT, "balance": 1}, **{"Idempotency-Key": "abc"})
+    assert response.status_code == 422
+
+
+async def test_summary(client, auth_headers):
+    await _create(client, auth_headers, DEBIT)
+    await _create(client, auth_headers, {**DEBIT, "name": "Poupança", "balance": 49.75})
+    await _create(client, auth_headers, CREDIT)
+
+    response = await client.get("/accounts/summary", headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["account_count"] == 3
+    assert summary["total_balance"] == 200.0
+    assert summary["total_credit_limit"] == 1000.0
+
+
+async def test_sparse_fields(client, auth_headers):
+    account_id = (await _create(client, auth_headers, DEBIT)).json()["id"]
+
+    response = await client.get("/accounts?fields=name,balance", headers=auth_headers)
+    assert response.json() == [{"name": "Conta Corrente", "balance": 150.25}]
+
+    response = await client.get(f"/accounts/{account_id}?fields=id", headers=auth_headers)
+    assert response.json() == {"id": account_id}
+
+    response = await client.get("/accounts/export?format=ndjson&fields=name,balance", headers=auth_headers)
+    # Valores monetários como número, igual à API JSON
+    assert response.text == '{"name": "Conta Corrente", "balance": 150.25}\n'
+
+
+async def test_sparse_fields_rejects_unknown_field(client, auth_headers):
+    response = await client.get("/accounts?fields=name,senha", headers=auth_headers)
+    assert response.status_code == 400
+
+
+async def test_import_transactions_categorizes_with_rules(client, auth_headers):
+    account_id = (await _create(client, auth_headers, DEBIT)).json()["id"]
+    response = await client.post(
+        "/rules", json={"category": "Transporte", "pattern": "uber"}, headers=auth_headers
+    )
+    assert response.status_code == 201
+
+    response = await client.post(
+        f"/accounts/{account_id}/transactions/import",
+        json=[
+            {"description": "UBER *TRIP", "amount": -23.90, "occurred_at": "2024-05-01T10:00:00"},
+            {"description": "PADARIA", "amount": -8.50, "occurred_at": "2024-05-01T11:00:00"},
+        ],
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert response.json() == {"imported": 2, "categorized": 1}
+
+
+async def test_export_transactions_streams_history(client, auth_headers):
+    account_id = (await _create(client, auth_headers, DEBIT)).json()["id"]
+    await client.post(
+        f"/accounts/{account_id}/transactions/import",
+        json=[
+            {"description": "UBER *TRIP", "amount": -23.90, "occurred_at": "2024-05-01T10:00:00"},
+            {"description": "PADARIA", "amount": -8.50, "occurred_at": "2024-05-02T11:00:00"},
+        ],
+        headers=auth_headers,
+    )
+
+    response = await client.get(
+        "/accounts/export/transactions?format=ndjson&start=2024-05-02T00:00:00", headers=auth_headers
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    row = json.loads(response.text)
+    assert (row["account_id"], row["description"], row["amount"]) == (account_id, "PADARIA", -8.5)
+
+    response = await client.get("/accounts/export/transactions?end=2024-05-02T00:00:00", headers=auth_headers)
+    assert response.text.splitlines()[0] == "id,account_id,description,amount,category,occurred_at"
+    assert response.text.splitlines()[1].split(",")[2:4] == ["UBER *TRIP", "-23.9"]
+
+
+async def test_summary_used_credit_comes_from_card_history(client, auth_headers):
+    await _create(client, auth_headers, DEBIT)
+    card_id = (await _create(client, auth_headers, CREDIT)).json()["id"]
+    await client.get("/accounts/summary", headers=auth_headers)  # resumo em cache
+
+    response = await client.post(
+        f"/accounts/{card_id}/transactions/import",
+        json=[
+            {"description": "Mercado", "amount": -300.00, "occurred_at": "2024-05-01T10:00:00"},
+            {"description": "Farmácia", "amount": -50.00, "occurred_at": "2024-05-02T10:00:00"},
+            {"description": "Pagamento da fatura", "amount": 100.00, "occurred_at": "2024-05-10T10:00:00"},
+        ],
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    summary = (await client.get("/accounts/summary", headers=auth_headers)).json()
+    assert summary["used_credit_limit"] == 250.0
+    assert summary["available_credit_limit"] == 750.0
+    assert summary["net_worth"] == -99.75
+
+    dashboard = (await client.get("/users/me?include_summary=true", headers=auth_headers)).json()
+    assert dashboard["summary"] == summary
+
+
+@pytest.mark.parametrize("balance", [1e30, "1e30", 10 ** 17, "9" * 40])
+async def test_out_of_range_amounts_are_rejected(client, auth_headers, balance):
+    response = await _create(client, auth_headers, {**DEBIT, "balance": balance})
+    assert response.status_code == 422
+    assert "fora do limite" in response.text
+
+
+async def test_summary_read_racing_a_write_is_not_cached():
+    started, release = asyncio.Event(), asyncio.Event()
+
+    class SlowRepository:
+        calls = 0
+
+        async def get_summary(self, user_id):
+            self.calls += 1
+            if self.calls == 1:
+                started.set()
+                await release.wait()
+            return {"account_count": self.calls, "total_balance": 0, "total_credit_limit": 0, "used_credit_limit": 0}
+
+    service = AccountService(SlowRepository())
+    reader = asyncio.create_task(service.get_summary(1))
+    await started.wait()
+    invalidate_summary(1)  # escrita concluída enquanto a leitura consultava o banco
+    release.set()
+
+    assert (await reader).account_count == 1
+    # O resultado defasado não ficou em cache: a próxima leitura consulta de novo
+    assert (await service.get_summary(1)).account_count == 2
+    assert (await service.get_summary(1)).account_count == 2
@@ -0,0 +1,73 @@
+import httpx
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+from app.models import Account
+from app.repositories.account_repository import AccountRepository
+from app.repositories.user_repository import UserRepository
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+async def test_pool_timeout_in_route_returns_503(client, auth_headers, monkeypatch):
+    async def get_all_by_user(self, user_id, fields=None):
+        raise PoolTimeoutError("QueuePool limit of size 10 overflow 10 reached")
+
+    monkeypatch.setattr(AccountRepository, "get_all_by_user", get_all_by_user)
+    response = await client.get("/accounts", headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+async def test_statement_timeout_in_authentication_returns_503(client, auth_headers, monkeypatch):
+    async def get_user_by_username(self, username, with_accounts=False):
+        raise DBAPIError("SELECT ...", {}, QueryCanceled("canceling statement due to statement timeout"))
+
+    monkeypatch.setattr(UserRepository, "get_user_by_username", get_user_by_username)
+    response = await client.get("/accounts/summary", headers=auth_headers)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+async def test_other_database_errors_stay_500(client, auth_headers, monkeypatch):
+    async def get_user_by_username(self, username, with_accounts=False):
+        raise DBAPIError("SELECT ...", {}, Exception("connection reset"))
+
+    monkeypatch.setattr(UserRepository, "get_user_by_username", get_user_by_username)
+    response = await client.get("/accounts/summary", headers=auth_headers)
+    assert response.status_code == 500
+
+
+async def test_pool_timeout_in_service_write_returns_503(client, database, user, auth_headers, monkeypatch):
+    async with database.session() as session:
+        await session.execute(insert(Account), [
+            {"id": 1, "name": "Corrente", "user_id": user["id"], "is_credit": False, "balance": 0}
+        ])
+        await session.commit()
+
+    async def delete(self, account_id):
+        raise PoolTimeoutError("QueuePool limit of size 10 overflow 10 reached")
+
+    # O serviço só trata erros de integridade: a sobrecarga chega ao handler único
+    monkeypatch.setattr(AccountRepository, "delete", delete)
+    response = await client.delete("/accounts/1", headers=auth_headers)
+    assert response.status_code == 503
+
+
+async def test_unexpected_errors_return_json_500(database, auth_headers, monkeypatch):
+    async def get_summary(self, user_id):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(AccountRepository, "get_summary", get_summary)
+    # O servidor ainda recebe a exceção (log); o cliente recebe a resposta do handler
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/accounts/summary", headers=auth_headers)
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Erro interno do servidor"}
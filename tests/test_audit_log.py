@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.audit_log import AuditLogWriter
+
+pytestmark = pytest.mark.anyio
+
+
+def _event(index: int) -> dict:
+    return {"action": "account.updated", "user_id": 1, "account_id": index}
+
+
+async def _record(writer: AuditLogWriter, indexes) -> None:
+    for index in indexes:
+        await writer.record("account.updated", 1, index)
+
+
+async def test_failing_batch_goes_to_dead_letter_and_queue_keeps_moving(tmp_path):
+    written = []
+
+    async def sink(events):
+        if any(event["account_id"] == 0 for event in events):
+            raise RuntimeError("violação de constraint")
+        written.extend(event["account_id"] for event in events)
+
+    dead_letter = tmp_path / "dead_letter.ndjson"
+    writer = AuditLogWriter(
+        sink=sink, batch_size=2, flush_interval=0.01, max_attempts=3, dead_letter_path=str(dead_letter)
+    )
+    writer.start()
+    await _record(writer, [0, 1])
+    await asyncio.sleep(0.1)
+    await _record(writer, [2, 3])
+    await asyncio.sleep(0.1)
+    await writer.stop()
+
+    assert written == [2, 3]
+    # O lote descartado fica no arquivo, com as colunas da tabela
+    events = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+    assert [event["account_id"] for event in events] == [0, 1]
+    assert events[0]["action"] == "account.updated" and events[0]["occurred_at"]
+
+
+async def test_stop_waits_for_batch_being_written():
+    written = []
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def sink(events):
+        # Gravado (commit feito), mas a sessão ainda está sendo encerrada
+        written.extend(event["account_id"] for event in events)
+        started.set()
+        await release.wait()
+
+    writer = AuditLogWriter(sink=sink, batch_size=2, flush_interval=0.01)
+    writer.start()
+    await _record(writer, [1, 2, 3])
+    await started.wait()
+
+    stopping = asyncio.create_task(writer.stop())
+    await asyncio.sleep(0.05)
+    release.set()
+    await stopping
+
+    # Cada evento gravado uma única vez, mesmo com o stop durante o INSERT
+    assert sorted(written) == [1, 2, 3]
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.event_bus import Broker, EventBus, InMemoryBroker, PostgresBroker, RESYNC_EVENT
+
+pytestmark = pytest.mark.anyio
+
+
+def test_broker_is_abstract():
+    with pytest.raises(TypeError):
+        Broker()
+
+
+@pytest.mark.parametrize("payload", ["não é json", "[1, 2]", '{"event": {"type": "x"}}', '{"user_id": 1}'])
+def test_postgres_broker_discards_malformed_notifications(payload):
+    delivered = []
+    broker = PostgresBroker("postgresql+asyncpg://localhost/teste")
+    broker._deliver = delivered.append
+
+    broker._on_notify(None, 1, broker.channel, payload)
+    assert delivered == []
+
+
+def test_postgres_broker_delivers_valid_notification():
+    bus = EventBus(PostgresBroker("postgresql+asyncpg://localhost/teste"))
+    bus.broker._deliver = bus._deliver
+    subscription = bus.subscribe(1)
+
+    bus.broker._on_notify(None, 1, bus.broker.channel, '{"user_id": 1, "event": {"type": "account.created"}}')
+    assert subscription.queue.get_nowait() == {"type": "account.created"}
+
+
+async def test_reconnect_sends_resync_to_every_subscription():
+    bus = EventBus(InMemoryBroker())
+    await bus.start()
+    first, second = bus.subscribe(1), bus.subscribe(2)
+
+    bus._resync_all()
+    assert first.queue.get_nowait() == second.queue.get_nowait() == RESYNC_EVENT
+
+
+async def test_postgres_broker_reconnects_after_losing_the_listen_connection(monkeypatch):
+    import asyncio
+    from app.services import event_bus
+
+    monkeypatch.setattr(event_bus, "EVENT_RECONNECT_MIN_SECONDS", 0.01)
+
+    class FlakyBroker(PostgresBroker):
+        attempts = 0
+
+        async def _connect(self):
+            # Primeira conexão ok, a reconexão falha uma vez antes de voltar
+            self.attempts += 1
+            if self.attempts == 2:
+                raise OSError("conexão recusada")
+            self._closed.clear()
+            self._connection = object()
+
+    reconnected = asyncio.Event()
+    broker = FlakyBroker("postgresql+asyncpg://localhost/teste")
+    await broker.start(lambda message: None, reconnected.set)
+
+    broker._closed.set()  # o servidor encerrou a conexão
+    await asyncio.wait_for(reconnected.wait(), timeout=1)
+    assert broker.attempts == 3 and broker._connection is not None
+
+    broker._connection = None
+    await broker.stop()
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import IdempotencyKey
+from app.services import scheduler_service
+from app.services.account_service import AccountService
+from app.services.idempotency_service import IDEMPOTENCY_PENDING_TTL_SECONDS, IDEMPOTENCY_TTL_SECONDS
+from app.services.scheduler_service import TransferScheduler
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.anyio
+
+DEBIT = {"name": "Conta Corrente", "is_credit": False, "balance": 150.25}
+NEW_USER = {"username": "bia", "email": "bia@example.com", "password": "senha-forte"}
+
+
+def _slow(monkeypatch, cls, name):
+    # A operação original demora: as repetições chegam enquanto ela executa
+    original = getattr(cls, name)
+
+    async def slow(self, *args, **kwargs):
+        await asyncio.sleep(0.05)
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(cls, name, slow)
+
+
+async def test_concurrent_account_retries_run_once(client, auth_headers, monkeypatch):
+    _slow(monkeypatch, AccountService, "create_account")
+    headers = {**auth_headers, "Idempotency-Key": "abc"}
+
+    responses = await asyncio.gather(*(client.post("/accounts", json=DEBIT, headers=headers) for _ in range(3)))
+    assert sorted(response.status_code for response in responses) == [201, 409, 409]
+
+    replay = await client.post("/accounts", json=DEBIT, headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert len((await client.get("/accounts", headers=auth_headers)).json()) == 1
+
+
+async def test_concurrent_user_retries_run_once(client, database, monkeypatch):
+    _slow(monkeypatch, UserService, "create_user")
+    headers = {"Idempotency-Key": "cadastro-1"}
+
+    responses = await asyncio.gather(*(client.post("/users/", json=NEW_USER, headers=headers) for _ in range(2)))
+    assert sorted(response.status_code for response in responses) == [200, 409]
+
+    replay = await client.post("/users/", json=NEW_USER, headers=headers)
+    assert replay.status_code == 200
+    assert replay.json()["username"] == "bia"
+
+
+async def test_failed_request_releases_key(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "abc"}
+    response = await client.post("/accounts", json={**DEBIT, "credit_limit": 100}, headers=headers)
+    assert response.status_code == 400
+
+    # A chave foi liberada: a requisição corrigida executa normalmente
+    response = await client.post("/accounts", json=DEBIT, headers=headers)
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+
+async def test_pending_claim_has_short_lease(client, database, auth_headers, monkeypatch):
+    leases = {}
+    original = AccountService.create_account
+
+    async def observe(self, *args, **kwargs):
+        # Lê a reserva enquanto a operação está em andamento
+        async with database.session() as session:
+            leases["pending"] = await session.scalar(select(IdempotencyKey.expires_at))
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(AccountService, "create_account", observe)
+    started = datetime.utcnow()
+    response = await client.post("/accounts", json=DEBIT, headers={**auth_headers, "Idempotency-Key": "abc"})
+    assert response.status_code == 201
+
+    async with database.session() as session:
+        completed = await session.scalar(select(IdempotencyKey.expires_at))
+    assert leases["pending"] - started <= timedelta(seconds=IDEMPOTENCY_PENDING_TTL_SECONDS + 1)
+    assert completed - started >= timedelta(seconds=IDEMPOTENCY_TTL_SECONDS - 1)
+
+
+async def test_scheduler_removes_expired_keys_in_batches(database, monkeypatch):
+    monkeypatch.setattr(scheduler_service, "IDEMPOTENCY_CLEANUP_BATCH_SIZE", 2)
+    now = datetime.utcnow()
+    async with database.session() as session:
+        await session.execute(insert(IdempotencyKey), [
+            {
+                "scope": "POST /accounts:user:1", "key": f"k{index}", "request_hash": "h",
+                "status_code": 0 if index % 2 else 201, "response_body": "",
+                "expires_at": now + timedelta(hours=-1 if index < 5 else 1),
+            }
+            for index in range(7)
+        ])
+        await session.commit()
+
+    assert await TransferScheduler().cleanup_idempotency_keys() == 5
+    async with database.session() as session:
+        remaining = (await session.execute(select(IdempotencyKey.key))).scalars().all()
+    assert sorted(remaining) == ["k5", "k6"]
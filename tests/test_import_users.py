@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.models import User
+from database import import_users as importer_module
+from database.import_users import UserImporter, import_users
+
+pytestmark = pytest.mark.anyio
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["username", "email", "password"])
+        writer.writerows(rows)
+
+
+async def _usernames(database):
+    async with database.session() as session:
+        return set((await session.execute(select(User.username))).scalars())
+
+
+async def test_resume_counts_rows_written_before_interruption(database, user, tmp_path):
+    path = tmp_path / "usuarios.csv"
+    _write_csv(path, [
+        ("ana", "ana@outro.com", "senha-forte"),  # linha 2: username já existia antes da importação
+        ("bob", "bob@example.com", "senha-forte"),  # linha 3: gravada antes da interrupção
+        ("carla", "carla@example.com", "senha-forte"),  # linha 4: ainda não gravada
+    ])
+    # Interrompida depois de gravar o lote e antes de salvar o progresso dele
+    async with database.session() as session:
+        await session.execute(insert(User), [
+            {"username": "bob", "email": "bob@example.com", "hashed_password": "x"}
+        ])
+        await session.commit()
+    with open(f"{path}.progress", "w", encoding="utf-8") as file:
+        json.dump({"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "written_until": 4}, file)
+
+    progress = await import_users(database, str(path), batch_size=10, workers=1)
+
+    assert (progress["rows"], progress["imported"], progress["duplicates"]) == (3, 2, 1)
+    assert await _usernames(database) == {"ana", "bob", "carla"}
+    with open(f"{path}.rejects.csv", encoding="utf-8") as file:
+        assert [row["reason"] for row in csv.DictReader(file)] == ["username já existe no banco"]
+
+
+async def test_repeated_conflict_falls_back_to_row_by_row(database, user, monkeypatch):
+    async def nothing_found(router, usernames, emails):
+        # O cadastro concorrente acontece depois da nova verificação
+        return set(), set()
+
+    monkeypatch.setattr(importer_module, "find_existing", nothing_found)
+    async with database.session() as session:
+        await session.execute(insert(User), [
+            {"username": "carla", "email": "carla@example.com", "hashed_password": "x"}
+        ])
+        await session.commit()
+
+    rejects = io.StringIO()
+    importer = UserImporter(database, None, 1, csv.writer(rejects))
+    progress = {"duplicates": 0}
+    rows = [
+        (2, {"username": "bob", "email": "bob@example.com", "hashed_password": "x"}),
+        (3, {"username": "carla", "email": "carla@example.com", "hashed_password": "x"}),
+    ]
+
+    assert await importer._write_shard(database.default, rows, progress) == 1
+    assert progress["duplicates"] == 1
+    assert rejects.getvalue().splitlines() == ["3,carla,carla@example.com,já existe no banco"]
+    async with database.session() as session:
+        assert await session.scalar(select(func.count()).select_from(User)) == 3
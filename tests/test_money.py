@@ -0,0 +1,42 @@
+from decimal import Decimal
+import random
+
+import pytest
+
+from app.utils.money import MAX_CENTS, to_cents
+
+
+@pytest.mark.parametrize("value, cents", [
+    (150.25, 15025), ("150.25", 15025), ("-42.90", -4290), ("-42.9", -4290), (10, 1000),
+    ("10", 1000), (".50", 50), ("1e2", 10000), (Decimal("0.07"), 7), (-0.0, 0),
+])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize("value", [
+    "10.505", 0.1 + 0.2, "abc", "", ".", float("nan"), float("inf"), True, "1e30", 1e30, 10 ** 17,
+])
+def test_to_cents_rejects_as_value_error(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_limit_is_inclusive():
+    assert to_cents(MAX_CENTS // 100) == MAX_CENTS
+    with pytest.raises(ValueError):
+        to_cents(f"{MAX_CENTS // 100}.01")
+
+
+def test_fast_paths_match_decimal_conversion():
+    rng = random.Random(42)
+    for _ in range(20_000):
+        value = rng.choice([rng.randint(-10 ** 12, 10 ** 12) / 100, round(rng.uniform(-1e4, 1e4), 3)])
+        amount = Decimal(str(value))
+        expected = int(amount * 100) if amount == amount.quantize(Decimal("0.01")) else None
+        for candidate in (value, f"{value:.2f}"):
+            try:
+                got = to_cents(candidate)
+            except ValueError:
+                got = None
+            assert got == (expected if candidate is value else int(Decimal(candidate) * 100))
@@ -0,0 +1,21 @@
+from collections import namedtuple
+
+import pytest
+
+from app.routes.account_route import _sparse_list_response, _sparse_response
+from app.utils.profiling import RequestProfile, SQLTimeline, activate
+
+pytestmark = pytest.mark.anyio
+
+Row = namedtuple("Row", "id name")
+
+
+async def test_sparse_responses_record_serialization_span():
+    profile = RequestProfile("GET", "/accounts", "header")
+    with activate(profile, SQLTimeline(lambda: [])):
+        single = _sparse_response(Row(1, "Corrente"), ("id", "name"))
+        many = _sparse_list_response([Row(1, "Corrente"), Row(2, "Poupança")], ("id",))
+
+    assert single.body == b'{"id":1,"name":"Corrente"}'
+    assert many.body == b'[{"id":1},{"id":2}]'
+    assert [span["name"] for span in profile.spans] == ["serialization", "serialization"]
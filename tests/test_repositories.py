@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, inspect
+
+from app.models import User, Account, Transaction
+from app.repositories.account_repository import AccountRepository
+from app.repositories.transaction_repository import TransactionRepository
+from app.schemas.transaction_schema import SearchSort
+from app.repositories import user_repository
+from app.repositories.user_repository import UserRepository
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def accounts(db):
+    await db.execute(insert(User), [
+        {"id": 1, "username": "ana", "email": "ana@example.com", "hashed_password": "x"}
+    ])
+    await db.execute(insert(Account), [
+        {"name": "Corrente", "user_id": 1, "is_credit": False, "balance": 15_025},
+        {"name": "Poupança", "user_id": 1, "is_credit": False, "balance": 4_975},
+        {"name": "Cartão", "user_id": 1, "is_credit": True, "balance": 0, "credit_limit": 100_000, "due_day": 10},
+    ])
+    await db.commit()
+    return AccountRepository(db)
+
+
+async def test_summary_in_cents(accounts):
+    summary = await accounts.get_summary(1)
+    assert summary["account_count"] == 3
+    assert summary["total_balance"] == 20_000
+    assert summary["total_credit_limit"] == 100_000
+
+
+async def test_get_all_by_user_with_fields_reads_only_those_columns(accounts):
+    rows = await accounts.get_all_by_user(1, ("id", "balance"))
+    assert [tuple(row._fields) for row in rows] == [("id", "balance")] * 3
+
+
+async def test_each_test_starts_empty(db):
+    # As linhas da fixture do teste anterior foram desfeitas com a transação
+    assert await AccountRepository(db).get_all_by_user(1) == []
+
+
+async def test_concurrent_calls_do_not_share_orm_instances(database, user):
+    async with database.session() as session:
+        await session.execute(insert(Account), [
+            {"name": "Corrente", "user_id": user["id"], "is_credit": False, "balance": 15_025},
+            {"name": "Poupança", "user_id": user["id"], "is_credit": False, "balance": 4_975},
+        ])
+        await session.commit()
+
+    async with database.session() as first, database.session() as second:
+        leader, follower = await asyncio.gather(
+            AccountRepository(first).get_all_by_user(user["id"]),
+            AccountRepository(second).get_all_by_user(user["id"]),
+        )
+        assert [a.balance for a in leader] == [a.balance for a in follower] == [15_025, 4_975]
+        assert all(a in first for a in leader)
+        # A cópia não pertence à sessão da líder; pode ser anexada à própria
+        assert all(inspect(a).detached for a in follower)
+        second.add(follower[0])
+        follower[0].name = "Conta"
+        assert leader[0].name == "Corrente"
+
+        users = await asyncio.gather(*(
+            UserRepository(session, database).get_user_by_username("ana", with_accounts=True)
+            for session in (first, second)
+        ))
+    assert users[0] is not users[1]
+    assert [len(u.accounts) for u in users] == [2, 2]
+    assert users[1].accounts[0] is not users[0].accounts[0]
+    assert users[0].shard == users[1].shard == database.default
+
+
+async def test_account_write_detaches_in_flight_user_lookup(database, user):
+    release = asyncio.Event()
+
+    async def stale_lookup():
+        await release.wait()
+        return None, None  # resultado anterior à escrita
+
+    # Busca com as contas iniciada antes da escrita (e ainda em andamento)
+    in_flight = asyncio.create_task(user_repository._users_by_username.do(("ana", True), stale_lookup))
+    await asyncio.sleep(0)
+
+    async with database.session() as session:
+        await AccountRepository(session).create({"name": "Corrente", "user_id": user["id"], "balance": 0})
+        # Sem desvincular, esta busca esperaria a anterior (e receberia None)
+        found = await asyncio.wait_for(
+            UserRepository(session, database).get_user_by_username("ana", with_accounts=True), 1
+        )
+    assert [account.name for account in found.accounts] == ["Corrente"]
+
+    release.set()
+    await in_flight
+
+
+@pytest.mark.parametrize("sort", list(SearchSort))
+async def test_search_keyset_pages_cover_all_matches_once(accounts, sort):
+    account_id = (await accounts.get_all_by_user(1, ("id",)))[0].id
+    await accounts.db.execute(insert(Transaction), [
+        {"account_id": account_id, "user_id": 1, "amount": -index, "description": f"Posto Shell {index}"}
+        for index in range(25)
+    ] + [{"account_id": account_id, "user_id": 1, "amount": -1, "description": "Padaria"}])
+    await accounts.db.commit()
+
+    repository = TransactionRepository(accounts.db)
+    pages, after = [], None
+    while True:
+        rows = await repository.search(1, "posto", limit=10, after=after, sort=sort)
+        pages.append([transaction.id for transaction, _ in rows])
+        if len(rows) < 10:
+            break
+        last, rank = rows[-1]
+        after = (rank, last.id)
+
+    ids = [transaction_id for page in pages for transaction_id in page]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 25
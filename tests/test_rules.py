@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import CategoryRule
+from app.utils.rule_engine import CompiledRuleSet
+
+pytestmark = pytest.mark.anyio
+
+DEBIT = {"name": "Conta Corrente", "balance": 150.25, "is_credit": False}
+
+TRANSACTIONS = [
+    {"description": "UBER *TRIP", "amount": -23.90, "occurred_at": "2024-05-01T10:00:00"},
+    {"description": "Padaria", "amount": -8.50, "occurred_at": "2024-05-01T11:00:00"},
+]
+
+
+async def _import(client, auth_headers):
+    account_id = (await client.post("/accounts", json=DEBIT, headers=auth_headers)).json()["id"]
+    return await client.post(
+        f"/accounts/{account_id}/transactions/import", json=TRANSACTIONS, headers=auth_headers
+    )
+
+
+@pytest.mark.parametrize("pattern", ["(?i)uber", "(?x) uber", "padaria|(?s)x"])
+async def test_regex_with_global_flag_is_rejected(client, auth_headers, pattern):
+    response = await client.post(
+        "/rules", json={"category": "Transporte", "match_type": "regex", "pattern": pattern},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+    response = await _import(client, auth_headers)
+    assert response.status_code == 201
+    assert response.json() == {"imported": 2, "categorized": 0}
+
+
+async def test_scoped_flag_is_accepted(client, auth_headers):
+    response = await client.post(
+        "/rules", json={"category": "Transporte", "match_type": "regex", "pattern": "(?-i:UBER)"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    response = await _import(client, auth_headers)
+    assert response.json() == {"imported": 2, "categorized": 1}
+
+
+async def test_rule_saved_before_validation_does_not_break_import(client, database, auth_headers, user):
+    # Regra gravada antes da validação de flags globais: a regex combinada não compila
+    async with database.session() as session:
+        await session.execute(insert(CategoryRule), [
+            {"category": "Transporte", "match_type": "regex", "pattern": "(?i)uber", "user_id": user["id"]},
+            {"category": "Alimentação", "match_type": "regex", "pattern": "padaria", "user_id": user["id"]},
+        ])
+        await session.commit()
+
+    response = await _import(client, auth_headers)
+    assert response.status_code == 201
+    assert response.json() == {"imported": 2, "categorized": 2}
+
+
+@pytest.mark.parametrize("pattern", ["(a+)+$", "(.*x)*", "(uber|u*)+", "(\\w{1,3})+", "a.*b.*c.*d.*e"])
+async def test_regex_prone_to_catastrophic_backtracking_is_rejected(client, auth_headers, pattern):
+    response = await client.post(
+        "/rules", json={"category": "Transporte", "match_type": "regex", "pattern": pattern},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+async def test_batch_is_classified_off_the_event_loop(client, auth_headers, monkeypatch):
+    threads = []
+    original = CompiledRuleSet.classify_batch
+
+    def classify_batch(self, rows):
+        threads.append(threading.current_thread())
+        return original(self, rows)
+
+    monkeypatch.setattr(CompiledRuleSet, "classify_batch", classify_batch)
+    await client.post(
+        "/rules", json={"category": "Transporte", "match_type": "regex", "pattern": "uber.*trip"},
+        headers=auth_headers,
+    )
+    response = await _import(client, auth_headers)
+    assert response.json() == {"imported": 2, "categorized": 1}
+    assert threads and threads[0] is not threading.main_thread()
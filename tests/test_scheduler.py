@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from app.models import Account, AccountAuditLog, ScheduledTransfer, Transaction
+from app.repositories.schedule_repository import ScheduleRepository
+from app.services.scheduler_service import TransferScheduler
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2024, 5, 1, 12, 0)
+
+
+@pytest.fixture
+async def schedules(database, user):
+    async with database.session() as session:
+        await session.execute(insert(Account), [
+            {"id": 1, "name": "Corrente", "user_id": user["id"], "is_credit": False, "balance": 0},
+            {"id": 2, "name": "Poupança", "user_id": user["id"], "is_credit": False, "balance": 0},
+            {"id": 3, "name": "Cartão", "user_id": user["id"], "is_credit": True, "credit_limit": 100_000},
+        ])
+        due = NOW - timedelta(hours=1)
+        await session.execute(insert(ScheduledTransfer), [
+            {"id": 1, "account_id": 1, "user_id": user["id"], "amount": 10_000, "next_run_at": due, "interval_days": 30},
+            {"id": 2, "account_id": 1, "user_id": user["id"], "amount": 666, "next_run_at": due},
+            {"id": 3, "account_id": 2, "user_id": user["id"], "amount": 5_000, "next_run_at": due},
+            {"id": 4, "account_id": 3, "user_id": user["id"], "amount": 1_000, "next_run_at": due},
+        ])
+        # O banco recusa o lançamento do agendamento 2 (como uma constraint violada)
+        await session.execute(text(
+            "CREATE TRIGGER reject_666 BEFORE INSERT ON transactions WHEN NEW.amount = 666 "
+            "BEGIN SELECT RAISE(ABORT, 'lançamento recusado'); END"
+        ))
+        await session.commit()
+
+
+async def test_failing_job_does_not_stall_the_batch(database, schedules):
+    async with database.session() as session:
+        processed, user_ids, changes = await ScheduleRepository(session).process_due_batch(NOW, 100)
+    assert (processed, user_ids) == (2, {1})
+    # Alterações de saldo para a auditoria: (usuário, conta, antes, depois)
+    assert sorted(changes) == [(1, 1, 0, 10_000), (1, 2, 0, 5_000)]
+
+    async with database.session() as session:
+        balances = dict((await session.execute(select(Account.id, Account.balance))).all())
+        jobs = {job.id: job for job in (await session.execute(select(ScheduledTransfer))).scalars()}
+        history = (await session.execute(select(Transaction.account_id, Transaction.amount))).all()
+
+    # Conta 1 recebe só o agendamento válido; a conta de crédito não é alterada
+    assert balances == {1: 10_000, 2: 5_000, 3: 0}
+    assert sorted(history) == [(1, 10_000), (2, 5_000)]
+    assert jobs[1].is_active and jobs[1].next_run_at == NOW - timedelta(hours=1) + timedelta(days=30)
+    assert not jobs[2].is_active and jobs[2].last_run_at is None  # falhou: desativado
+    assert not jobs[3].is_active and jobs[3].last_run_at == NOW  # execução única
+    assert not jobs[4].is_active and jobs[4].last_run_at is None  # conta de crédito
+
+    async with database.session() as session:
+        assert await ScheduleRepository(session).process_due_batch(NOW, 100) == (0, set(), [])
+
+
+async def test_scheduler_records_balance_changes_in_audit_trail(database, schedules):
+    await TransferScheduler(batch_size=100).run_once()
+
+    async with database.session() as session:
+        events = (await session.execute(
+            select(AccountAuditLog).order_by(AccountAuditLog.account_id)
+        )).scalars().all()
+    assert [(event.action, event.account_id, event.before, event.after) for event in events] == [
+        ("account.scheduled_transfer", 1, {"balance": 0}, {"balance": 10_000}),
+        ("account.scheduled_transfer", 2, {"balance": 0}, {"balance": 5_000}),
+    ]
@@ -0,0 +1,131 @@
+from collections import Counter
+import json
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.models import Account, Transaction, User
+from app.repositories.user_repository import UserRepository
+from app.schemas.account_schema import ExportFormat
+from app.services import export_service
+from app.services.export_service import ExportService
+from database.rebalance import check_sequences, move_user
+from database.sharding import HashRing, ShardRouter
+from database.testing import create_schema
+
+pytestmark = pytest.mark.anyio
+
+KEYS = [f"usuario-{index}" for index in range(20_000)]
+
+
+@pytest.fixture
+async def router(tmp_path):
+    router = ShardRouter({name: f"sqlite+aiosqlite:///{tmp_path}/{name}.db" for name in ("s0", "s1")})
+    await create_schema(router)
+    yield router
+    await router.dispose()
+
+
+async def _add_user(router, shard, user_id, username, accounts=()):
+    async with router.session(shard) as session:
+        await session.execute(insert(User), [
+            {"id": user_id, "username": username, "email": f"{username}@example.com", "hashed_password": "x"}
+        ])
+        for account_id in accounts:
+            await session.execute(insert(Account), [
+                {"id": account_id, "name": f"conta-{account_id}", "user_id": user_id, "balance": 100}
+            ])
+            await session.execute(insert(Transaction), [
+                {"account_id": account_id, "user_id": user_id, "amount": 100, "description": "Depósito"}
+            ])
+        await session.commit()
+
+
+async def _count(router, shard, model, **filters):
+    async with router.session(shard) as session:
+        query = select(func.count()).select_from(model)
+        for column, value in filters.items():
+            query = query.where(getattr(model, column) == value)
+        return await session.scalar(query)
+
+
+def test_hash_ring_distribution_and_stability():
+    ring = HashRing(["s0", "s1", "s2", "s3"])
+    before = {key: ring.get(key) for key in KEYS}
+    for count in Counter(before.values()).values():
+        assert 0.18 < count / len(KEYS) < 0.32
+
+    # Um shard novo recebe ~1/N das chaves; nenhuma chave troca entre os antigos
+    grown = HashRing(["s0", "s1", "s2", "s3", "s4"])
+    moved = {key for key in KEYS if grown.get(key) != before[key]}
+    assert all(grown.get(key) == "s4" for key in moved)
+    assert 0.12 < len(moved) / len(KEYS) < 0.28
+    assert HashRing(["s0", "s1", "s2", "s3"]).get("ana") == ring.get("ana")
+
+
+async def test_lookup_uses_hash_shard_and_falls_back_to_others(router):
+    home = router.shard_for("ana")
+    other = next(name for name in router.names if name != home)
+    stray = next(key for key in KEYS if router.shard_for(key) == home)
+    await _add_user(router, home, 1, "ana")
+    await _add_user(router, other, 2, stray)
+
+    repository = UserRepository(None, router)
+    user = await repository.get_user_by_username("ana")
+    assert (user.id, user.shard) == (1, home)
+
+    # Usuário ainda não movido por um rebalanceamento: encontrado no outro shard
+    moved = await repository.get_user_by_username(stray)
+    assert (moved.id, moved.shard) == (2, other)
+
+    by_email = await repository.get_user_by_email("ana@example.com")
+    assert (by_email.id, by_email.shard) == (1, home)
+    assert await repository.get_user_by_username("ninguem") is None
+
+
+async def test_move_user_copies_then_deletes_and_can_rerun(router):
+    target = router.shard_for("ana")
+    source = next(name for name in router.names if name != target)
+    await _add_user(router, source, 7, "ana", accounts=(70, 71))
+
+    assert await move_user(router, "ana") is True
+    assert await _count(router, target, Account, user_id=7) == 2
+    assert await _count(router, target, Transaction, user_id=7) == 2
+    assert await _count(router, source, User) == 0
+    assert await _count(router, source, Account) == 0
+
+    # Já no shard do hash: nada a fazer
+    assert await move_user(router, "ana") is False
+
+
+async def test_move_user_resumes_after_copy_was_committed(router):
+    target = router.shard_for("ana")
+    source = next(name for name in router.names if name != target)
+    # Interrompida depois da cópia confirmada no destino e antes de apagar a origem
+    await _add_user(router, source, 7, "ana", accounts=(70,))
+    await _add_user(router, target, 7, "ana", accounts=(70,))
+
+    assert await move_user(router, "ana") is True
+    assert await _count(router, target, Account, user_id=7) == 1
+    assert await _count(router, source, User) == 0
+
+
+async def test_sharded_startup_requires_interleaved_sequences(router, tmp_path):
+    with pytest.raises(RuntimeError, match="Postgres"):
+        await check_sequences(router)
+
+    single = ShardRouter({"s0": f"sqlite+aiosqlite:///{tmp_path}/single.db"})
+    await check_sequences(single)
+    await single.dispose()
+
+
+async def test_admin_export_reads_all_shards(router, monkeypatch):
+    # Fila mínima: os shards esperam o consumidor a cada linha
+    monkeypatch.setattr(export_service, "EXPORT_QUEUE_ROWS", 1)
+    other = next(key for key in KEYS if router.shard_for(key) != router.shard_for("ana"))
+    await _add_user(router, router.shard_for("ana"), 1, "ana", accounts=(10, 11))
+    await _add_user(router, router.shard_for(other), 2, other, accounts=(20,))
+
+    chunks = [chunk async for chunk in ExportService(router).export_accounts(ExportFormat.NDJSON)]
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert sorted(row["id"] for row in rows) == [10, 11, 20]